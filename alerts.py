@@ -0,0 +1,128 @@
+import json
+import queue
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from sqlalchemy import event
+from engine import RoutingSession
+from models import db
+
+ALERT_BACKENDS = ('log', 'webhook', 'queue')
+
+
+class AlertDispatcher:
+    """Push low-stock alerts to a consumer without polling the catalog.
+
+    The 'queue' backend keeps alerts on an in-process queue a consumer thread
+    in the same process drains with get(), 'webhook' POSTs each alert as JSON from a background thread
+    with retries, and 'log' only writes them to the app log.
+    """
+
+    def __init__(self, backend, webhook_url=None, queue_size=10000, max_retries=3, logger=None):
+        if backend not in ALERT_BACKENDS:
+            raise ValueError(f"Unknown ALERT_BACKEND {backend!r}, expected one of {', '.join(ALERT_BACKENDS)}")
+        if backend == 'webhook' and not webhook_url:
+            raise ValueError('ALERT_BACKEND=webhook needs ALERT_WEBHOOK_URL')
+        self.backend = backend
+        self.webhook_url = webhook_url
+        self.max_retries = max_retries
+        self.logger = logger
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish(self, alert):
+        if self.backend == 'log':
+            if self.logger is not None:
+                self.logger.warning(f"Low stock: {alert}")
+            return
+        if self.backend == 'webhook':
+            self._ensure_started()
+        try:
+            self.queue.put_nowait(alert)
+        except queue.Full:
+            if self.logger is not None:
+                self.logger.error(f"Alert queue full, dropping {alert}")
+
+    def get(self, timeout=None):
+        """Block until the next alert on the 'queue' backend, or return None after `timeout` seconds."""
+        if self.backend != 'queue':
+            raise RuntimeError(f"ALERT_BACKEND={self.backend} delivers alerts itself; only 'queue' has alerts to get")
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='alerts', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            alert = self.queue.get()
+            try:
+                self._deliver(alert)
+            except Exception:
+                # Anything unexpected costs this alert, never the thread and the alerts queued behind it
+                if self.logger is not None:
+                    self.logger.exception(f"Failed to deliver alert {alert}")
+
+    def _deliver(self, alert):
+        """POST one alert to the webhook, retrying network errors with exponential backoff."""
+        body = json.dumps(alert).encode()
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                request = urllib.request.Request(
+                    self.webhook_url, data=body, headers={'Content-Type': 'application/json'}, method='POST'
+                )
+                with urllib.request.urlopen(request, timeout=10):
+                    return
+            except OSError as e:
+                if attempt == self.max_retries:
+                    if self.logger is not None:
+                        self.logger.error(f"Failed to deliver alert {alert}: {e}")
+                    return
+                time.sleep(2 ** (attempt - 1))
+
+
+def record_crossing(business_id, inventory_id, quantity, reorder_point):
+    """Queue an alert for an item that just fell to or below its reorder point.
+
+    The alert is held on the session and only published once the transaction
+    that caused it commits.
+    """
+    db.session.info.setdefault('stock_alerts', []).append({
+        'type': 'low_stock',
+        'business_id': business_id,
+        'inventory_id': inventory_id,
+        'quantity': quantity,
+        'reorder_point': reorder_point,
+        'detected_at': datetime.utcnow().isoformat()
+    })
+
+
+def init_alerts(app):
+    dispatcher = AlertDispatcher(
+        app.config['ALERT_BACKEND'],
+        webhook_url=app.config['ALERT_WEBHOOK_URL'],
+        queue_size=app.config['ALERT_QUEUE_SIZE'],
+        max_retries=app.config['ALERT_MAX_RETRIES'],
+        logger=app.logger
+    )
+    app.extensions['alerts'] = dispatcher
+
+    @event.listens_for(RoutingSession, 'after_commit')
+    def publish_alerts(session):
+        for alert in session.info.pop('stock_alerts', []):
+            dispatcher.publish(alert)
+
+    @event.listens_for(RoutingSession, 'after_transaction_end')
+    def discard_alerts(session, transaction):
+        # Alerts still pending when the outermost transaction ends were rolled back
+        if transaction.parent is None:
+            session.info.pop('stock_alerts', None)
+
+    return dispatcher
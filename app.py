@@ -1,174 +1,523 @@
-from flask import Flask, jsonify, request
+import click
+from flask import Flask, Response, jsonify, make_response, request, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from flask_migrate import Migrate
 from flask_restful import Api, Resource
 from dotenv import load_dotenv
-from datetime import datetime
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Import configurations and models
 from config import Config  
-from models import db, User, Business, Inventory, Sales, Insights
+from models import db, User, Business, Inventory, Sales, Insights, BusinessTotals, PriceHistory, StockMovement
 from auth import auth_bp  
+from alerts import init_alerts
+from cache import cached, init_cache, invalidate, invalidate_all
+from engine import init_engine
+from export import EXPORT_FORMATS, EXPORT_TABLES, export_chunks, export_query
+from forecast import forecast_catalog
+from idempotency import idempotent, sweep_expired_keys
+from importer import CSV_MIMETYPE, IMPORT_FORMATS, IMPORT_MODES, import_inventory, parse_records, validate_record
+from ledger import MANUAL_KINDS, inventory_value_as_of, record_movement, record_price, set_price, take_stock_snapshots
+from mailer import init_mailer
+from metrics import init_metrics
+from otp import sweep_expired_otps
+from passwords import init_passwords
+from pagination import NDJSON_MIMETYPE, list_response
+from ratelimit import init_rate_limiter
+from rollups import INTERVALS, apply_rollups, parse_moment, parse_range, rebuild_rollups, sales_series
+from serializers import (
+    FastJSONProvider, USER_FIELDS, BUSINESS_FIELDS, INVENTORY_FIELDS, SALES_FIELDS, INSIGHTS_FIELDS,
+    MOVEMENT_FIELDS, PRICE_FIELDS, instance_to_dict, rows_to_dicts
+)
+from search import rebuild_search_index, search_inventory
+from sales import adjust_stock, bulk_insert_sales, decrement_stock, load_items, parse_sales_body, validate_sale
+from snapshots import compact_insights, take_snapshots, take_snapshots_parallel
+from tokens import auth_required, init_auth
+from totals import apply_delta, get_totals, insight_metrics, rebuild_totals, to_money
 
 # Load environment variables
 load_dotenv()
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config.from_object(Config)
+if app.config['PROXY_TRUSTED_HOPS']:
+    # Client addresses, which key the auth rate limits, come from the trusted proxies' headers
+    hops = app.config['PROXY_TRUSTED_HOPS']
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
 
-api = Api(app)
+# Every resource requires a bearer token; /auth and /metrics are plain routes and stay open
+api = Api(app, decorators=[auth_required])
 
 db.init_app(app)
+init_engine(app)
 migrate = Migrate(app, db)
+init_cache(app)
+init_mailer(app)
+init_passwords(app)
+init_alerts(app)
+init_metrics(app)
+init_auth(app)
+init_rate_limiter(app)
 
 # Register authentication blueprint
 app.register_blueprint(auth_bp, url_prefix='/auth')
 
 # Flask-RESTful Resources
 class UserResource(Resource):
+    @cached('users')
     def get(self):
-        users = User.query.all()
-        return jsonify([user.to_dict() for user in users])
+        return list_response(select(*USER_FIELDS), USER_FIELDS)
 
     def post(self):
         data = request.get_json()
         new_user = User(username=data['username'], email=data['email'], password=data['password'])
         db.session.add(new_user)
         db.session.commit()
-        return jsonify(new_user.to_dict()), 201
+        invalidate('users')
+        return make_response(jsonify(instance_to_dict(new_user, USER_FIELDS)), 201)
 
 class BusinessResource(Resource):
+    @cached('user', 'user_id')
     def get(self, user_id):
-        businesses = Business.query.filter_by(user_id=user_id).all()
-        return jsonify([business.to_dict() for business in businesses])
+        return list_response(select(*BUSINESS_FIELDS).where(Business.user_id == user_id), BUSINESS_FIELDS)
 
+    @idempotent
     def post(self):
         data = request.get_json()
         new_business = Business(name=data['name'], user_id=data['user_id'], category=data.get('category'))
+        new_business.totals = BusinessTotals(total_revenue=0, total_cogs=0, inventory_value=0, transaction_count=0)
         db.session.add(new_business)
         db.session.commit()
-        return jsonify(new_business.to_dict()), 201
+        invalidate('user', new_business.user_id)
+        return make_response(jsonify(instance_to_dict(new_business, BUSINESS_FIELDS)), 201)
 
 class InventoryResource(Resource):
+    @cached('business', 'business_id')
     def get(self, business_id):
-        inventory_items = Inventory.query.filter_by(business_id=business_id).all()
-        return jsonify([item.to_dict() for item in inventory_items])
+        return list_response(select(*INVENTORY_FIELDS).where(Inventory.business_id == business_id), INVENTORY_FIELDS)
 
+    @idempotent
     def post(self):
         data = request.get_json()
-        new_inventory = Inventory(
-            item_name=data['item_name'], 
-            description=data.get('description'),
-            quantity=data['quantity'],
-            price_per_unit=data['price_per_unit'],
-            business_id=data['business_id']
-        )
+        # Same checks as a bulk import row, so bad quantities and prices never reach the running totals
+        row, errors = validate_record(data)
+        if row is not None and row['price_per_unit'] is None:
+            errors['price_per_unit'] = 'Missing required field'
+        business_id = data.get('business_id') if isinstance(data, dict) else None
+        if isinstance(business_id, bool) or not isinstance(business_id, int):
+            errors['business_id'] = 'Must be an integer'
+        if errors:
+            return {'message': 'Invalid item', 'errors': errors}, 400
+
+        new_inventory = Inventory(business_id=business_id, **row)
         db.session.add(new_inventory)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            return {'message': 'This business already has an item with that name'}, 409
+        record_movement(
+            new_inventory.business_id, new_inventory.id, 'opening', new_inventory.quantity, new_inventory.price_per_unit
+        )
+        record_price(new_inventory.business_id, new_inventory.id, new_inventory.price_per_unit)
+        apply_delta(
+            new_inventory.business_id,
+            inventory_value=new_inventory.quantity * new_inventory.price_per_unit
+        )
+        db.session.commit()
+        invalidate('business', new_inventory.business_id)
+        return make_response(jsonify(instance_to_dict(new_inventory, INVENTORY_FIELDS)), 201)
+
+class InventoryImportResource(Resource):
+    # Not @idempotent: that hashes the whole body, and a 'set' import is safe to repeat anyway
+    def post(self, business_id):
+        mode = request.args.get('mode', 'set')
+        if mode not in IMPORT_MODES:
+            return {'message': f"mode must be one of: {', '.join(IMPORT_MODES)}"}, 400
+        if request.mimetype not in IMPORT_FORMATS:
+            return {'message': f"Content-Type must be one of: {', '.join(IMPORT_FORMATS)}"}, 415
+        if db.session.get(Business, business_id) is None:
+            return {'message': 'Business not found'}, 404
+
+        try:
+            summary = import_inventory(
+                business_id, parse_records(request.stream, request.mimetype), mode,
+                app.config['IMPORT_BATCH_ROWS'], app.config['IMPORT_MAX_ERRORS']
+            )
+        finally:
+            # Earlier batches are committed even if a later one fails
+            invalidate('business', business_id)
+        applied = summary['inserted'] + summary['updated'] + summary['unchanged']
+        return summary, 400 if summary['rejected'] and not applied else 200
+
+class LowStockResource(Resource):
+    @cached('business', 'business_id')
+    def get(self, business_id):
+        # Matches the partial index predicate, so only low-stock rows are touched
+        stmt = select(*INVENTORY_FIELDS).where(
+            Inventory.business_id == business_id,
+            Inventory.quantity <= Inventory.reorder_point
+        )
+        return list_response(stmt, INVENTORY_FIELDS)
+
+class StockMovementResource(Resource):
+    def get(self, inventory_id):
+        stmt = select(*MOVEMENT_FIELDS).where(StockMovement.inventory_id == inventory_id)
+        return list_response(stmt, MOVEMENT_FIELDS)
+
+    @idempotent
+    def post(self, inventory_id):
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return {'message': 'Expected a JSON object'}, 400
+        kind, quantity = data.get('kind'), data.get('quantity')
+        errors = {}
+        if kind not in MANUAL_KINDS:
+            errors['kind'] = f"Must be one of {', '.join(MANUAL_KINDS)}"
+        if isinstance(quantity, bool) or not isinstance(quantity, int):
+            errors['quantity'] = 'Must be an integer'
+        elif quantity == 0 or (kind == 'receipt' and quantity < 0):
+            errors['quantity'] = 'Receipts must be positive and adjustments non-zero'
+        if errors:
+            return {'message': 'Invalid movement', 'errors': errors}, 400
+
+        movement = adjust_stock(inventory_id, quantity, kind)
+        if movement is None:
+            db.session.rollback()
+            if db.session.get(Inventory, inventory_id) is None:
+                return {'message': 'Inventory item not found'}, 404
+            return {'message': 'Insufficient stock'}, 409
         db.session.commit()
-        return jsonify(new_inventory.to_dict()), 201
+        invalidate('business', movement['business_id'])
+        return make_response(jsonify(movement), 201)
+
+class PriceHistoryResource(Resource):
+    def get(self, inventory_id):
+        return list_response(select(*PRICE_FIELDS).where(PriceHistory.inventory_id == inventory_id), PRICE_FIELDS)
+
+    def post(self, inventory_id):
+        data = request.get_json()
+        try:
+            # Rounded as the column stores it, so the revaluation in set_price matches a reconcile
+            price = to_money(data.get('price_per_unit') if isinstance(data, dict) else None)
+        except ValueError as e:
+            return {'message': f'price_per_unit: {e}'}, 400
+
+        entry = set_price(inventory_id, price)
+        if entry is None:
+            return {'message': 'Inventory item not found'}, 404
+        db.session.commit()
+        invalidate('business', entry['business_id'])
+        return make_response(jsonify(entry), 201)
+
+class InventorySearchResource(Resource):
+    @cached('business', 'business_id')
+    def get(self, business_id):
+        query = request.args.get('q', '')
+        if not query.strip():
+            return {'message': 'q is required'}, 400
+        limit = request.args.get('limit', app.config['SEARCH_LIMIT_DEFAULT'], type=int)
+        if limit < 1:
+            return {'message': 'limit must be a positive integer'}, 400
+        rows = search_inventory(business_id, query, min(limit, app.config['PAGE_SIZE_MAX']))
+        return jsonify(rows_to_dicts(INVENTORY_FIELDS, rows))
 
 class SalesResource(Resource):
+    @idempotent
     def post(self):
         data = request.get_json()
-        new_sale = Sales(
-            business_id=data['business_id'], 
-            inventory_id=data['inventory_id'],
-            quantity_sold=data['quantity_sold'],
-            total_price=data['total_price'],
-            sold_at=data.get('sold_at', datetime.utcnow())
-        )
+        items = load_items([data.get('inventory_id')], 1) if isinstance(data, dict) else {}
+        row, errors = validate_sale(data, items)
+        if errors:
+            return {'message': 'Invalid sale', 'errors': errors}, 400
+        # Cost the sale at the price read under the stock lock, not the unlocked read above
+        row['unit_cost'] = decrement_stock(row['inventory_id'], row['quantity_sold'])
+        if row['unit_cost'] is None:
+            db.session.rollback()
+            return {'message': 'Insufficient stock'}, 409
+
+        new_sale = Sales(**row)
         db.session.add(new_sale)
+        cost = new_sale.quantity_sold * row['unit_cost']
+        apply_delta(
+            new_sale.business_id,
+            revenue=new_sale.total_price,
+            cogs=cost,
+            inventory_value=-cost,
+            transactions=1
+        )
+        apply_rollups([dict(row, cogs=cost)])
+        db.session.commit()
+        invalidate('business', new_sale.business_id)
+        return make_response(jsonify(instance_to_dict(new_sale, SALES_FIELDS)), 201)
+
+class SalesBulkResource(Resource):
+    @idempotent
+    def post(self):
+        entries, errors = parse_sales_body(request.get_data(as_text=True), request.mimetype)
+        if len(entries) > app.config['SALES_BULK_MAX_ROWS']:
+            return {'message': f"At most {app.config['SALES_BULK_MAX_ROWS']} sales per request"}, 413
+
+        inserted, row_errors, business_ids = bulk_insert_sales(entries, app.config['SALES_BULK_CHUNK_SIZE'])
         db.session.commit()
-        return jsonify(new_sale.to_dict()), 201
+        for business_id in business_ids:
+            invalidate('business', business_id)
+
+        errors.extend(row_errors)
+        status = 201 if inserted else 400
+        return {'inserted': inserted, 'rejected': len(errors), 'errors': errors}, status
 
 class InsightsResource(Resource):
+    @cached('business', 'business_id')
     def get(self, business_id):
-        insights = Insights.query.filter_by(business_id=business_id).all()
-        return jsonify([insight.to_dict() for insight in insights])
+        return list_response(select(*INSIGHTS_FIELDS).where(Insights.business_id == business_id), INSIGHTS_FIELDS)
+
+def metric_response(business_id, metric):
+    """Read one metric from the running totals; snapshots are written by the snapshot job."""
+    totals = get_totals(business_id)
+    return jsonify({
+        'business_id': business_id,
+        'metric': metric,
+        'value': insight_metrics(totals)[metric],
+        'recorded_at': totals.updated_at if totals else None
+    })
 
 class RevenueResource(Resource):
+    @cached('business', 'business_id')
     def get(self, business_id):
-        total_revenue = db.session.query(func.sum(Sales.total_price)).filter_by(business_id=business_id).scalar() or 0.0
-        new_insight = Insights(
-            business_id=business_id,
-            metric='total_revenue',
-            value=total_revenue,
-            recorded_at=datetime.utcnow()
-        )
-        db.session.add(new_insight)
-        db.session.commit()
-        return jsonify(new_insight.to_dict()), 201
+        return metric_response(business_id, 'total_revenue')
 
 class ProfitResource(Resource):
+    @cached('business', 'business_id')
     def get(self, business_id):
-        total_revenue = db.session.query(func.sum(Sales.total_price)).filter_by(business_id=business_id).scalar() or 0.0
-        total_cogs = db.session.query(
-            func.sum(Sales.quantity_sold * Inventory.price_per_unit)
-        ).join(Inventory, Sales.inventory_id == Inventory.id).filter(Sales.business_id == business_id).scalar() or 0.0
-
-        profit = total_revenue - total_cogs
-        new_insight = Insights(
-            business_id=business_id,
-            metric='total_profit',
-            value=profit,
-            recorded_at=datetime.utcnow()
-        )
-        db.session.add(new_insight)
-        db.session.commit()
-        return jsonify(new_insight.to_dict()), 201
+        return metric_response(business_id, 'total_profit')
 
 class InventoryValueResource(Resource):
+    @cached('business', 'business_id')
     def get(self, business_id):
-        total_inventory_value = db.session.query(
-            func.sum(Inventory.quantity * Inventory.price_per_unit)
-        ).filter_by(business_id=business_id).scalar() or 0.0
-
-        new_insight = Insights(
-            business_id=business_id,
-            metric='inventory_value',
-            value=total_inventory_value,
-            recorded_at=datetime.utcnow()
+        as_of = request.args.get('as_of')
+        if not as_of:
+            return metric_response(business_id, 'inventory_value')
+        try:
+            as_of = parse_moment(as_of)
+        except ValueError:
+            return {'message': 'as_of must be an ISO 8601 datetime'}, 400
+        # Replayed from the stock ledger rather than read from the running totals
+        return jsonify({
+            'business_id': business_id,
+            'metric': 'inventory_value',
+            'value': inventory_value_as_of(business_id, as_of),
+            'recorded_at': as_of
+        })
+
+class SalesAnalyticsResource(Resource):
+    @cached('business', 'business_id')
+    def get(self, business_id):
+        interval = request.args.get('interval', 'day')
+        if interval not in INTERVALS:
+            return {'message': f"interval must be one of {', '.join(INTERVALS)}"}, 400
+        try:
+            start, end = parse_range(request.args.get('start'), request.args.get('end'))
+        except ValueError:
+            return {'message': 'start and end must be ISO 8601 datetimes'}, 400
+
+        series = sales_series(
+            business_id, start, end, interval,
+            by_item=request.args.get('group_by') == 'item',
+            inventory_id=request.args.get('inventory_id', type=int)
         )
-        db.session.add(new_insight)
+        return jsonify(series)
+
+class ForecastResource(Resource):
+    @cached('business', 'business_id', ttl=Config.FORECAST_CACHE_TTL)
+    def get(self, business_id):
+        days = request.args.get('days', app.config['FORECAST_WINDOW_DAYS'], type=int)
+        alpha = request.args.get('alpha', app.config['FORECAST_ALPHA'], type=float)
+        horizon = request.args.get('horizon', app.config['FORECAST_HORIZON_DAYS'], type=int)
+        if not 1 <= days <= 366 or not 0 < alpha <= 1 or horizon < 1:
+            return {'message': 'days must be 1-366, alpha in (0, 1] and horizon positive'}, 400
+        return jsonify(forecast_catalog(business_id, days, alpha, horizon))
+
+class InsightsSnapshotResource(Resource):
+    def post(self, business_id):
+        written = take_snapshots([business_id])
         db.session.commit()
-        return jsonify(new_insight.to_dict()), 201
+        invalidate('business', business_id)
+        return {'business_id': business_id, 'written': written}, 201
 
 class ComprehensiveInsightsResource(Resource):
+    @cached('business', 'business_id')
     def get(self, business_id):
-        total_revenue = db.session.query(func.sum(Sales.total_price)).filter_by(business_id=business_id).scalar() or 0.0
-        total_cogs = db.session.query(
-            func.sum(Sales.quantity_sold * Inventory.price_per_unit)
-        ).join(Inventory, Sales.inventory_id == Inventory.id).filter(Sales.business_id == business_id).scalar() or 0.0
-        total_inventory_value = db.session.query(
-            func.sum(Inventory.quantity * Inventory.price_per_unit)
-        ).filter_by(business_id=business_id).scalar() or 0.0
-        total_transactions = db.session.query(func.count(Sales.id)).filter_by(business_id=business_id).scalar() or 1
-
-        profit = total_revenue - total_cogs
-        loss = abs(profit) if profit < 0 else 0.0
-        average_sales_price = total_revenue / total_transactions
+        metrics = insight_metrics(get_totals(business_id))
 
         insights = [
-            {'metric': 'total_revenue', 'value': total_revenue},
-            {'metric': 'total_profit', 'value': profit},
-            {'metric': 'total_losses', 'value': loss},
-            {'metric': 'inventory_value', 'value': total_inventory_value},
-            {'metric': 'average_sales_price', 'value': average_sales_price}
+            {'metric': 'total_revenue', 'value': metrics['total_revenue']},
+            {'metric': 'total_profit', 'value': metrics['total_profit']},
+            {'metric': 'total_losses', 'value': metrics['total_losses']},
+            {'metric': 'inventory_value', 'value': metrics['inventory_value']},
+            {'metric': 'average_sales_price', 'value': metrics['average_sales_price']}
         ]
         return jsonify(insights)
 
+class ExportResource(Resource):
+    def get(self, business_id, table):
+        fmt = request.args.get('format', 'parquet')
+        if fmt not in EXPORT_FORMATS:
+            return {'message': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, 400
+        start, end = request.args.get('start'), request.args.get('end')
+        try:
+            start = parse_moment(start) if start else None
+            end = parse_moment(end) if end else None
+        except ValueError:
+            return {'message': 'start and end must be ISO 8601 datetimes'}, 400
+
+        stmt, fields = export_query(table, business_id, start, end, request.args.get('inventory_id', type=int))
+        mimetype, extension = EXPORT_FORMATS[fmt]
+        chunks = export_chunks(stmt, fields, fmt, app.config['EXPORT_BATCH_ROWS'])
+        return Response(
+            stream_with_context(chunks), mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=business-{business_id}-{table}.{extension}'}
+        )
+
 # Register API resources
 api.add_resource(UserResource, '/users')
 api.add_resource(BusinessResource, '/businesses/<int:user_id>', '/business')
 api.add_resource(InventoryResource, '/inventory/<int:business_id>', '/inventory')
+api.add_resource(LowStockResource, '/inventory/<int:business_id>/low_stock')
+api.add_resource(InventoryImportResource, '/inventory/<int:business_id>/import')
+api.add_resource(InventorySearchResource, '/inventory/<int:business_id>/search')
+api.add_resource(StockMovementResource, '/inventory/<int:inventory_id>/movements')
+api.add_resource(PriceHistoryResource, '/inventory/<int:inventory_id>/prices')
 api.add_resource(SalesResource, '/sales')
+api.add_resource(SalesBulkResource, '/sales/bulk')
 api.add_resource(InsightsResource, '/insights/<int:business_id>')
 api.add_resource(RevenueResource, '/insights/total_revenue/<int:business_id>')
 api.add_resource(ProfitResource, '/insights/total_profit/<int:business_id>')
 api.add_resource(InventoryValueResource, '/insights/inventory_value/<int:business_id>')
 api.add_resource(ComprehensiveInsightsResource, '/insights/comprehensive/<int:business_id>')
+api.add_resource(SalesAnalyticsResource, '/insights/sales/<int:business_id>')
+api.add_resource(ForecastResource, '/insights/forecast/<int:business_id>')
+api.add_resource(InsightsSnapshotResource, '/insights/snapshot/<int:business_id>')
+api.add_resource(ExportResource, '/export/<int:business_id>/<any(sales, inventory):table>')
+
+# CLI commands
+@app.cli.command('reconcile-totals')
+@click.option('--business-id', 'business_ids', type=int, multiple=True, help='Limit to these businesses.')
+def reconcile_totals_command(business_ids):
+    """Rebuild the running business totals from the sales and inventory tables."""
+    count = rebuild_totals(list(business_ids) or None)
+    db.session.commit()
+    invalidate_all()
+    click.echo(f"Reconciled totals for {count} businesses.")
+
+@app.cli.command('rebuild-rollups')
+@click.option('--business-id', 'business_ids', type=int, multiple=True, help='Limit to these businesses.')
+def rebuild_rollups_command(business_ids):
+    """Recompute the hourly and daily sales rollups from the sales table."""
+    written = rebuild_rollups(list(business_ids) or None)
+    db.session.commit()
+    invalidate_all()
+    click.echo(f"Wrote {written} sales rollups.")
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Re-index every inventory item for search."""
+    rebuild_search_index()
+    db.session.commit()
+    invalidate_all()
+    click.echo("Rebuilt the inventory search index.")
+
+@app.cli.command('snapshot-insights')
+@click.option('--business-id', 'business_ids', type=int, multiple=True, help='Limit to these businesses.')
+@click.option('--recompute', is_flag=True, help='Derive metrics from the sales and inventory tables.')
+@click.option('--workers', type=int, default=1, help='Split businesses by id range across processes.')
+def snapshot_insights_command(business_ids, recompute, workers):
+    """Record the current metrics as insight snapshots, skipping unchanged values."""
+    if workers > 1 and business_ids:
+        raise click.UsageError('--workers covers every business; drop --business-id.')
+    if workers > 1:
+        written = take_snapshots_parallel(workers, recompute=recompute)
+    else:
+        written = take_snapshots(list(business_ids) or None, recompute=recompute)
+    db.session.commit()
+    invalidate_all()
+    click.echo(f"Wrote {written} insight snapshots.")
+
+@app.cli.command('compact-insights')
+def compact_insights_command():
+    """Downsample old insight snapshots to hourly and daily resolution."""
+    removed = compact_insights(
+        app.config['INSIGHTS_RAW_RETENTION_HOURS'],
+        app.config['INSIGHTS_HOURLY_RETENTION_DAYS'],
+        app.config['INSIGHTS_RETENTION_DAYS']
+    )
+    db.session.commit()
+    invalidate_all()
+    click.echo(f"Removed {removed} insight snapshots.")
+
+@app.cli.command('snapshot-stock')
+@click.option('--business-id', 'business_ids', type=int, multiple=True, help='Limit to these businesses.')
+def snapshot_stock_command(business_ids):
+    """Snapshot stock levels from the ledger so as-of valuations replay only recent movements."""
+    written = take_stock_snapshots(list(business_ids) or None, app.config['STOCK_SNAPSHOT_LAG_SECONDS'])
+    db.session.commit()
+    click.echo(f"Wrote {written} stock snapshots.")
+
+@app.cli.command('sweep-idempotency-keys')
+def sweep_idempotency_keys_command():
+    """Delete expired Idempotency-Key records in batches."""
+    removed = sweep_expired_keys(app.config['IDEMPOTENCY_SWEEP_BATCH_SIZE'])
+    click.echo(f"Removed {removed} expired idempotency keys.")
+
+@app.cli.command('export-data')
+@click.argument('business_id', type=int)
+@click.argument('table', type=click.Choice(list(EXPORT_TABLES)))
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_FORMATS)), default='parquet')
+@click.option('--start', help='Only sales sold at or after this ISO 8601 datetime.')
+@click.option('--end', help='Only sales sold before this ISO 8601 datetime.')
+@click.option('--inventory-id', type=int, help='Only this item.')
+def export_data_command(business_id, table, path, fmt, start, end, inventory_id):
+    """Write a business's sales or inventory to a Parquet or Arrow IPC file."""
+    stmt, fields = export_query(
+        table, business_id, parse_moment(start) if start else None, parse_moment(end) if end else None, inventory_id
+    )
+    with open(path, 'wb') as out:
+        for chunk in export_chunks(stmt, fields, fmt, app.config['EXPORT_BATCH_ROWS']):
+            out.write(chunk)
+    click.echo(f"Wrote {table} for business {business_id} to {path}.")
+
+@app.cli.command('import-inventory')
+@click.argument('business_id', type=int)
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--mode', type=click.Choice(IMPORT_MODES), default='set',
+              help="'set' replaces stock on hand, 'add' receives quantities on top.")
+def import_inventory_command(business_id, path, mode):
+    """Upsert a business's inventory from a CSV file, or NDJSON if it ends in .ndjson."""
+    mimetype = NDJSON_MIMETYPE if path.endswith('.ndjson') else CSV_MIMETYPE
+    with open(path, 'rb') as source:
+        summary = import_inventory(
+            business_id, parse_records(source, mimetype), mode,
+            app.config['IMPORT_BATCH_ROWS'], app.config['IMPORT_MAX_ERRORS']
+        )
+    invalidate('business', business_id)
+    click.echo(
+        f"Inserted {summary['inserted']}, updated {summary['updated']}, unchanged {summary['unchanged']}, "
+        f"rejected {summary['rejected']} items."
+    )
+    for error in summary['errors']:
+        click.echo(f"line {error['line']}: {error['errors']}", err=True)
+
+@app.cli.command('sweep-otps')
+def sweep_otps_command():
+    """Delete expired email verification codes in batches."""
+    removed = sweep_expired_otps(app.config['OTP_SWEEP_BATCH_SIZE'])
+    click.echo(f"Removed {removed} expired OTPs.")
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # Development server only (FLASK_DEBUG=1 for the debugger); production runs gunicorn -c gunicorn.conf.py
+    app.run()
@@ -0,0 +1,302 @@
+"""ASGI entry point serving every route of app.py.
+
+The list and insight GETs run natively on SQLAlchemy's asyncio engine, so a
+worker keeps thousands of slow or idle clients open without a thread each.
+Every other route is the Flask app itself behind a WSGI bridge. Both paths
+share the Flask app's response cache, token caches and metrics, and native
+routes answer byte-for-byte what the Flask resources would.
+
+Run with: SERVER_MODE=asgi gunicorn -c gunicorn.conf.py
+"""
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlencode
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header, parse_etags
+
+from app import app as flask_app
+from cache import etag_for, response_key
+from config import Config, engine_options
+from engine import sqlite_pragmas
+from ledger import inventory_value_as_of
+from metrics import REQUESTS, REQUEST_SECONDS
+from models import db, Business, BusinessTotals, Insights, Inventory
+from pagination import NDJSON_MIMETYPE
+from rollups import parse_moment
+from serializers import BUSINESS_FIELDS, INSIGHTS_FIELDS, INVENTORY_FIELDS, USER_FIELDS, encode, rows_to_dicts
+from tokens import user_query
+from totals import get_totals, insight_metrics
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+
+def create_read_engine():
+    """Async engine on the database GET requests read from: the replica if one is bound.
+
+    Uses Flask-SQLAlchemy's resolved URL, so relative SQLite paths land in the
+    same instance folder, and the same pool settings and pragmas.
+    """
+    with flask_app.app_context():
+        url = db.engines.get('replica', db.engine).url
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No asyncio driver configured for {backend}')
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+
+    options = engine_options(url.render_as_string(hide_password=False), **Config.POOL_SETTINGS)
+    if 'pool_size' in options:
+        options['poolclass'] = AsyncAdaptedQueuePool
+    engine = create_async_engine(url, **options)
+
+    if backend == 'sqlite':
+        pragmas = sqlite_pragmas(flask_app.config)
+
+        @event.listens_for(engine.sync_engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for statement in pragmas:
+                cursor.execute(statement)
+            cursor.close()
+    return engine
+
+
+engine = create_read_engine()
+
+
+def json_response(obj, status_code=200):
+    return Response(encode(obj), status_code=status_code, media_type='application/json')
+
+
+def arg_int(request, name, default=None):
+    """An integer query parameter, or `default` when missing or malformed (like request.args.get(type=int))."""
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return default
+
+
+async def authenticate(request):
+    """Same checks and caches as tokens.auth_required; the user row is loaded without blocking the loop."""
+    verifier = flask_app.extensions['token_verifier']
+    now = time.time()
+    with flask_app.app_context():
+        claims = verifier.verify(request.headers.get('Authorization', ''), now)
+    if claims is None:
+        return None
+
+    user_id = int(claims['sub'])
+    user = verifier.users.get(user_id, now)
+    if user is None:
+        async with engine.connect() as conn:
+            row = (await conn.execute(user_query(user_id))).first()
+        if row is None:
+            return None
+        user = row._asdict()
+        verifier.remember_user(claims, user, now)
+    return user
+
+
+def native(endpoint, scope, id_arg=None):
+    """Serve a route natively under the Flask endpoint it shadows.
+
+    Auth, the response cache with ETags and the request metrics behave as
+    they do for the Flask resource, and cache entries are shared with it.
+    """
+    def decorator(handler):
+        async def respond(request):
+            if flask_app.config['AUTH_REQUIRED'] and await authenticate(request) is None:
+                return json_response({'message': 'Authentication required'}, 401)
+
+            scope_id = request.path_params.get(id_arg) if id_arg else None
+            cache = flask_app.extensions['response_cache']
+            key = response_key(cache, endpoint, scope, scope_id, request.query_params.multi_items(),
+                               request.headers.get('Accept', ''))
+            entry = cache.get(key)
+            if entry is None:
+                response = await handler(request, scope_id)
+                if response.status_code != 200 or isinstance(response, StreamingResponse):
+                    return response
+                headers = [(k, v) for k, v in response.headers.items() if k not in ('content-length', 'etag')]
+                entry = (response.body, headers, etag_for(response.body))
+                cache.set(key, entry)
+
+            body, headers, etag = entry
+            if parse_etags(request.headers.get('If-None-Match')).contains(etag):
+                return Response(status_code=304, headers={'ETag': f'"{etag}"'})
+            response = Response(body, headers=dict(headers))
+            response.headers['ETag'] = f'"{etag}"'
+            return response
+
+        async def wrapper(request):
+            started = time.perf_counter()
+            response = await respond(request)
+            if flask_app.config['METRICS_ENABLED']:
+                labels = (endpoint, request.method, str(response.status_code))
+                REQUESTS.inc(labels)
+                REQUEST_SECONDS.observe(labels, time.perf_counter() - started)
+            return response
+        return wrapper
+    return decorator
+
+
+def wants_stream(request):
+    """pagination.wants_stream for a Starlette request."""
+    if request.query_params.get('format') == 'ndjson':
+        return True
+    accept = parse_accept_header(request.headers.get('Accept'), MIMEAccept)
+    return accept.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+async def list_response(request, stmt, fields):
+    """pagination.list_response on the async engine: a keyset page, or NDJSON when asked."""
+    id_column = fields[0]
+    after = arg_int(request, 'after')
+    if after is not None:
+        stmt = stmt.where(id_column > after)
+    stmt = stmt.order_by(id_column)
+
+    if wants_stream(request):
+        return stream_ndjson(stmt, fields)
+
+    limit = arg_int(request, 'limit', flask_app.config['PAGE_SIZE_DEFAULT'])
+    if limit < 1:
+        return json_response({'message': 'limit must be a positive integer'}, 400)
+    limit = min(limit, flask_app.config['PAGE_SIZE_MAX'])
+
+    async with engine.connect() as conn:
+        rows = (await conn.execute(stmt.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    response = json_response(rows_to_dicts(fields, rows))
+    if has_more:
+        cursor = rows[-1][0]
+        args = dict(request.query_params, after=cursor, limit=limit)
+        response.headers['X-Next-Cursor'] = str(cursor)
+        response.headers['Link'] = f'<{request.url.replace(query="")}?{urlencode(args)}>; rel="next"'
+    return response
+
+
+def stream_ndjson(stmt, fields):
+    batch_size = flask_app.config['STREAM_BATCH_SIZE']
+
+    async def generate():
+        async with engine.connect() as conn:
+            result = await conn.stream(stmt.execution_options(yield_per=batch_size))
+            async for rows in result.partitions():
+                yield b''.join(encode(row) + b'\n' for row in rows_to_dicts(fields, rows))
+
+    return StreamingResponse(generate(), media_type=NDJSON_MIMETYPE)
+
+
+def computed_totals(business_id):
+    with flask_app.app_context():
+        return get_totals(business_id)
+
+
+async def load_totals(business_id):
+    """The stored totals row; a business without one is computed by the sync code in a thread."""
+    async with engine.connect() as conn:
+        totals = (await conn.execute(
+            select(BusinessTotals.__table__).where(BusinessTotals.business_id == business_id)
+        )).first()
+    if totals is None:
+        totals = await run_in_threadpool(computed_totals, business_id)
+    return totals
+
+
+@native('userresource', 'users')
+async def users(request, scope_id):
+    return await list_response(request, select(*USER_FIELDS), USER_FIELDS)
+
+
+@native('businessresource', 'user', 'user_id')
+async def businesses(request, user_id):
+    return await list_response(request, select(*BUSINESS_FIELDS).where(Business.user_id == user_id), BUSINESS_FIELDS)
+
+
+@native('inventoryresource', 'business', 'business_id')
+async def inventory(request, business_id):
+    return await list_response(
+        request, select(*INVENTORY_FIELDS).where(Inventory.business_id == business_id), INVENTORY_FIELDS
+    )
+
+
+@native('insightsresource', 'business', 'business_id')
+async def insights(request, business_id):
+    return await list_response(
+        request, select(*INSIGHTS_FIELDS).where(Insights.business_id == business_id), INSIGHTS_FIELDS
+    )
+
+
+def valued_as_of(business_id, as_of):
+    with flask_app.app_context():
+        return inventory_value_as_of(business_id, as_of)
+
+
+def metric_route(endpoint, metric):
+    @native(endpoint, 'business', 'business_id')
+    async def handler(request, business_id):
+        if metric == 'inventory_value' and request.query_params.get('as_of'):
+            # Ledger replay is rare and sync-only, so it runs on a thread like the Flask resource would
+            try:
+                as_of = parse_moment(request.query_params['as_of'])
+            except ValueError:
+                return json_response({'message': 'as_of must be an ISO 8601 datetime'}, 400)
+            return json_response({
+                'business_id': business_id,
+                'metric': metric,
+                'value': await run_in_threadpool(valued_as_of, business_id, as_of),
+                'recorded_at': as_of
+            })
+        totals = await load_totals(business_id)
+        return json_response({
+            'business_id': business_id,
+            'metric': metric,
+            'value': insight_metrics(totals)[metric],
+            'recorded_at': totals.updated_at if totals else None
+        })
+    return handler
+
+
+@native('comprehensiveinsightsresource', 'business', 'business_id')
+async def comprehensive_insights(request, business_id):
+    metrics = insight_metrics(await load_totals(business_id))
+    return json_response([
+        {'metric': metric, 'value': metrics[metric]}
+        for metric in ('total_revenue', 'total_profit', 'total_losses', 'inventory_value', 'average_sales_price')
+    ])
+
+
+@asynccontextmanager
+async def lifespan(application):
+    yield
+    await engine.dispose()
+
+
+app = Starlette(
+    routes=[
+        Route('/users', users, methods=['GET']),
+        Route('/businesses/{user_id:int}', businesses, methods=['GET']),
+        Route('/inventory/{business_id:int}', inventory, methods=['GET']),
+        Route('/insights/{business_id:int}', insights, methods=['GET']),
+        Route('/insights/total_revenue/{business_id:int}', metric_route('revenueresource', 'total_revenue'),
+              methods=['GET']),
+        Route('/insights/total_profit/{business_id:int}', metric_route('profitresource', 'total_profit'),
+              methods=['GET']),
+        Route('/insights/inventory_value/{business_id:int}',
+              metric_route('inventoryvalueresource', 'inventory_value'), methods=['GET']),
+        Route('/insights/comprehensive/{business_id:int}', comprehensive_insights, methods=['GET']),
+        # Writes, auth, search, analytics, forecasts and /metrics stay on Flask
+        Mount('/', WSGIMiddleware(flask_app, workers=flask_app.config['ASGI_WSGI_THREADS'])),
+    ],
+    lifespan=lifespan
+)
@@ -1,13 +1,17 @@
-from datetime import datetime, timedelta
+from concurrent.futures import TimeoutError
+from datetime import timedelta
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token
-from werkzeug.security import generate_password_hash, check_password_hash
 from models import db, User
+from otp import check_otp, issue_otp
+from passwords import get_hasher
+from ratelimit import limit_auth_attempts
 from utils import send_otp_to_email, generate_otp
 
 
 # Create a Blueprint for authentication routes
 auth_bp = Blueprint('auth', __name__)
+auth_bp.before_request(limit_auth_attempts)
 
 # Login Route
 @auth_bp.route('/login', methods=['POST'])
@@ -19,10 +23,26 @@ def login():
     # Query the database for the user
     user = User.query.filter_by(username=username).first()
 
-    if user and check_password_hash(user.password, password):
+    try:
+        valid = bool(user and password) and user.check_password(password)
+    except TimeoutError:
+        return jsonify({"error": "Server busy, please retry"}), 503
+
+    if valid:
+        # Upgrade hashes made with an older method or cost while we have the plaintext
+        if get_hasher().needs_rehash(user.password):
+            try:
+                user.set_password(password)
+                db.session.commit()
+            except TimeoutError:
+                # The pool is busy; the upgrade can wait for the next login
+                db.session.rollback()
+
         # Set token expiration based on stay_logged_in flag
         expires = timedelta(days=30) if stay_logged_in else timedelta(hours=1)
-        access_token = create_access_token(identity={'user_id': user.id, 'role': user.role}, expires_delta=expires)
+        access_token = create_access_token(
+            identity=str(user.id), additional_claims={'role': user.role}, expires_delta=expires
+        )
         return jsonify({
             'message': f"Welcome {user.username}",
             'access_token': access_token,
@@ -55,41 +75,43 @@ def register():
         return {'message': 'User already exists'}, 400
 
     # Hash the password for security
-    hashed_password = generate_password_hash(password)
+    try:
+        hashed_password = get_hasher().hash(password)
+    except TimeoutError:
+        return jsonify({"error": "Server busy, please retry"}), 503
+
+    # Create new user and store in the database along with a hashed OTP
+    new_user = User(username=username, email=email, password=hashed_password, role=role)
+    db.session.add(new_user)
+    db.session.flush()
 
-    # Generate OTP and set its expiration time
     otp_code = generate_otp()
-    otp_expiration = datetime.utcnow() + timedelta(minutes=10)
+    issue_otp(new_user.id, otp_code)
+    db.session.commit()
 
     # Send OTP to user's email
     send_otp_to_email(email, otp_code)
 
-    # Create new user and store in the database
-    new_user = User(username=username, email=email, password=hashed_password, role=role, otp=otp_code, otp_expiration=otp_expiration)
-    db.session.add(new_user)
-    db.session.commit()
-
     return {'message': 'OTP sent to email. Please verify.'}, 200
 
 # Verify OTP Route
 @auth_bp.route('/verify_otp', methods=['POST'])
 def verify_otp():
     entered_otp = request.json.get('otp')
+    identifier = request.json.get('email') or request.json.get('username')
 
-    # Check if OTP is provided
-    if not entered_otp:
-        return {'message': 'OTP is required'}, 400
+    # Check if OTP and the user it was sent to are provided
+    if not entered_otp or not identifier:
+        return {'message': 'OTP and email or username are required'}, 400
 
-    # Look for the user in the database using the entered OTP
-    user = User.query.filter_by(otp=entered_otp).first()
+    # Find the user through the indexed unique columns, then the OTP by its hash
+    user = User.query.filter((User.email == identifier) | (User.username == identifier)).first()
+    result = check_otp(user.id, entered_otp) if user else 'invalid'
+    db.session.commit()
 
-    # Validate if OTP exists and is not expired
-    if not user or datetime.utcnow() > user.otp_expiration:
+    if result == 'locked':
+        return {'message': 'Too many attempts. Please request a new OTP.'}, 429
+    if result != 'ok':
         return {'message': 'Invalid or expired OTP'}, 400
 
-    # Clear OTP and expiration from the database once validated
-    user.otp = None
-    user.otp_expiration = None
-    db.session.commit()
-
     return {'message': 'User registered successfully'}, 201
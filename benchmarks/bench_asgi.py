@@ -0,0 +1,124 @@
+"""Compare the WSGI and ASGI servers under many concurrent keep-alive clients.
+
+Seeds a scratch database, then starts each server through gunicorn.conf.py
+with the same worker count and drives it with --clients concurrent
+connections, each sending --requests list and insight GETs back to back.
+The response cache is off, so every request reads the database. Reports
+throughput, latency percentiles and failed requests (non-200s, resets and
+timeouts). The client shares the machine with the server, so compare the
+two rows rather than reading the absolute numbers.
+
+Usage: python -m benchmarks.bench_asgi [--clients 1000] [--requests 20] [--workers 1]
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROUTES = ('/inventory/{b}?limit=50', '/insights/comprehensive/{b}', '/insights/total_revenue/{b}', '/businesses/{u}')
+
+
+def percentile(ordered, share):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+async def client(port, paths, timings, failures, timeout):
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        failures.append('connect')
+        return
+    try:
+        for path in paths:
+            started = time.perf_counter()
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n'.encode())
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+            lines = head.decode('latin-1').split('\r\n')
+            headers = dict(line.lower().split(': ', 1) for line in lines[1:] if ': ' in line)
+            await asyncio.wait_for(reader.readexactly(int(headers.get('content-length', 0))), timeout)
+            if lines[0].split(' ')[1] != '200':
+                failures.append(lines[0])
+            else:
+                timings.append(time.perf_counter() - started)
+            if headers.get('connection') == 'close':
+                break
+    except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as exc:
+        failures.append(type(exc).__name__)
+    finally:
+        writer.close()
+
+
+async def drive(port, args):
+    rng = random.Random(args.seed)
+    businesses = args.users * 2
+    workloads = [
+        [rng.choice(ROUTES).format(b=rng.randint(1, businesses), u=rng.randint(1, args.users))
+         for _ in range(args.requests)]
+        for _ in range(args.clients)
+    ]
+    timings, failures = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, paths, timings, failures, args.timeout) for paths in workloads))
+    return timings, failures, time.perf_counter() - started
+
+
+def wait_until_up(port, deadline=30):
+    started = time.time()
+    while time.time() - started < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/users?limit=1', timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=20, help='Requests per client connection.')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--sales', type=int, default=50000)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', default='/tmp/bench_asgi.db')
+    args = parser.parse_args()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=f'sqlite:///{args.db}', CACHE_BACKEND='null',
+               AUTH_REQUIRED='false', METRICS_ENABLED='false', WEB_CONCURRENCY=str(args.workers))
+    subprocess.run([sys.executable, 'seed.py', '--users', str(args.users), '--businesses-per-user', '2',
+                    '--items-per-business', '100', '--sales', str(args.sales)],
+                   env=env, check=True, stdout=subprocess.DEVNULL)
+
+    results = {}
+    for port, mode in ((8701, 'wsgi'), (8702, 'asgi')):
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}'],
+            env=dict(env, SERVER_MODE=mode), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_until_up(port)
+            results[mode] = asyncio.run(drive(port, args))
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+
+    print(f"{args.clients} clients x {args.requests} requests, {args.workers} worker(s)")
+    print(f"{'server':<8}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'failed':>8}")
+    for mode, (timings, failures, elapsed) in results.items():
+        ordered = sorted(timings) or [0]
+        print(f"{mode:<8}{len(timings) / elapsed:>9.0f}{percentile(ordered, 0.5) * 1000:>9.1f}"
+              f"{percentile(ordered, 0.99) * 1000:>9.1f}{len(failures):>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Measure token verification with and without the claims/user cache, and the cost of a shed login.
+
+Usage: python -m benchmarks.bench_auth [--requests 3000]
+"""
+import argparse
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=3000)
+    args = parser.parse_args()
+
+    os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    os.environ['CACHE_BACKEND'] = 'null'
+    os.environ['METRICS_ENABLED'] = 'false'
+
+    # Imported late so the app picks up the in-memory database
+    from flask_jwt_extended import create_access_token
+    from app import app
+    from models import db, User
+    from tokens import TokenVerifier
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', role='customer')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+        header = f"Bearer {create_access_token(identity=str(user.id))}"
+
+    def verify(verifier):
+        with app.test_request_context('/'):
+            started = time.perf_counter()
+            for _ in range(args.requests):
+                verifier.authenticate(header)
+            elapsed = time.perf_counter() - started
+        return elapsed / args.requests * 10 ** 6
+
+    uncached = verify(TokenVerifier(max_entries=0))
+    cached = verify(TokenVerifier())
+
+    client = app.test_client()
+    timings = []
+    for _ in range(30):
+        started = time.perf_counter()
+        response = client.post('/auth/login', data={'username': 'bench', 'password': 'wrong'})
+        timings.append((response.status_code, (time.perf_counter() - started) * 1000))
+    checked = [ms for status, ms in timings if status == 401]
+    shed = [ms for status, ms in timings if status == 429]
+
+    print(f"{'path':<34}{'per call':>12}")
+    print(f"{'verify + user load, no cache':<34}{uncached:>9.0f} us")
+    print(f"{'verify + user load, cached':<34}{cached:>9.0f} us")
+    print(f"{'login, password checked':<34}{sum(checked) / len(checked):>9.1f} ms")
+    print(f"{'login, shed by rate limit':<34}{sum(shed) / len(shed):>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Time a full Parquet / Arrow export against paging the same rows as JSON.
+
+Seeds one business with --items inventory rows and --sales sales, then reads
+each table end to end three ways: keyset JSON pages of --page-size through
+the API's list path, a Parquet export and an Arrow IPC export. Reports rows
+per second, bytes produced and the largest chunk the export held at once.
+
+Usage: python -m benchmarks.bench_export [--items 200000] [--sales 1000000] [--batch-rows 65536]
+"""
+import argparse
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=200000)
+    parser.add_argument('--sales', type=int, default=1000000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--batch-rows', type=int, default=65536)
+    parser.add_argument('--db', default='/tmp/bench_export.db')
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{args.db}'
+    os.environ['CACHE_BACKEND'] = 'null'
+    os.environ['PAGE_SIZE_MAX'] = str(args.page_size)
+
+    # Imported late so the app picks up the benchmark database
+    import pyarrow as pa
+    from sqlalchemy import select
+    from app import app
+    from export import export_chunks, export_query
+    from models import Inventory, Sales
+    from pagination import list_response
+    from seed import generate
+    from serializers import INVENTORY_FIELDS, SALES_FIELDS
+
+    def page_json(model, fields):
+        size = largest = 0
+        query = {'limit': args.page_size}
+        while True:
+            with app.test_request_context(query_string=query):
+                response = list_response(select(*fields).where(model.business_id == 1), fields)
+                body = response.get_data()
+            size += len(body)
+            largest = max(largest, len(body))
+            if 'X-Next-Cursor' not in response.headers:
+                return size, largest
+            query['after'] = response.headers['X-Next-Cursor']
+
+    def export(table, fmt):
+        stmt, fields = export_query(table, 1)
+        size = largest = 0
+        for chunk in export_chunks(stmt, fields, fmt, args.batch_rows):
+            size += len(chunk)
+            largest = max(largest, len(chunk))
+        return size, largest
+
+    with app.app_context():
+        generate(users=1, items_per_business=args.items, sales=args.sales, log=lambda message: None)
+        for table, model, fields, count in (
+            ('inventory', Inventory, INVENTORY_FIELDS, args.items), ('sales', Sales, SALES_FIELDS, args.sales)
+        ):
+            print(f"{table}: {count:,} rows")
+            baseline = None
+            for label, run in (
+                ('json pages', lambda: page_json(model, fields)),
+                ('parquet', lambda: export(table, 'parquet')),
+                ('arrow ipc', lambda: export(table, 'arrow')),
+            ):
+                pa.default_memory_pool().release_unused()
+                started = time.perf_counter()
+                size, largest = run()
+                elapsed = time.perf_counter() - started
+                baseline = baseline or elapsed
+                print(f"  {label:<12}{elapsed:>8.2f} s{count / elapsed:>12,.0f} rows/s{size / 2 ** 20:>9.1f} MB"
+                      f"{largest / 2 ** 20:>8.1f} MB max chunk{baseline / elapsed:>7.1f}x")
+            print(f"  arrow pool peak {pa.default_memory_pool().max_memory() / 2 ** 20:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Compare a per-item Python forecast over ORM rows with the vectorized NumPy engine.
+
+Usage: python -m benchmarks.bench_forecast [--items 100000] [--density 0.2] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--days', type=int, default=28)
+    parser.add_argument('--density', type=float, default=0.2, help='Share of item-days with sales.')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    os.environ['CACHE_BACKEND'] = 'null'
+
+    # Imported late so the app picks up the in-memory database
+    from sqlalchemy import insert
+    from app import app
+    from forecast import forecast_catalog
+    from models import db, User, Business, Inventory, SalesRollup
+    from rollups import truncate
+
+    rng = random.Random(42)
+    today = truncate(datetime.utcnow(), 'day')
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username='bench', email='bench@example.com', password='x'))
+        db.session.add(Business(id=1, user_id=1, name='Bench Shop'))
+        db.session.execute(insert(Inventory), [
+            {'business_id': 1, 'item_name': f'Item {n}', 'quantity': rng.randint(0, 500), 'price_per_unit': 1}
+            for n in range(args.items)
+        ])
+        db.session.execute(insert(SalesRollup), [
+            {
+                'business_id': 1, 'inventory_id': item_id, 'granularity': 'day',
+                'bucket_start': today - timedelta(days=day), 'units': units,
+                'revenue': units, 'cogs': 0, 'transactions': 1
+            }
+            for item_id in range(1, args.items + 1)
+            for day in range(1, args.days + 1)
+            if rng.random() < args.density
+            for units in (rng.randint(1, 20),)
+        ])
+        db.session.commit()
+
+        def per_item():
+            # What the endpoint would look like without the array engine
+            start = today - timedelta(days=args.days)
+            history = {}
+            for rollup in SalesRollup.query.filter(
+                SalesRollup.business_id == 1, SalesRollup.granularity == 'day',
+                SalesRollup.bucket_start >= start, SalesRollup.bucket_start < today
+            ):
+                history.setdefault(rollup.inventory_id, {})[(rollup.bucket_start - start).days] = rollup.units
+            results = []
+            for item in Inventory.query.filter_by(business_id=1).order_by(Inventory.id):
+                series = [history.get(item.id, {}).get(day, 0) for day in range(args.days)]
+                level = series[0]
+                for units in series[1:]:
+                    level = 0.3 * units + 0.7 * level
+                results.append({
+                    'inventory_id': item.id,
+                    'velocity': sum(series) / args.days,
+                    'forecast_daily': level,
+                    'days_of_cover': item.quantity / level if level > 0 else None
+                })
+            db.session.expunge_all()
+            return results
+
+        def vectorized():
+            return forecast_catalog(1, args.days, 0.3, 7, now=today)
+
+        loop_ms, loop_result = measure(per_item, args.repeat)
+        numpy_ms, numpy_result = measure(vectorized, args.repeat)
+
+    mismatches = sum(
+        abs(a['forecast_daily'] - b['forecast_daily']) > 1e-3 for a, b in zip(loop_result, numpy_result)
+    )
+    print(f"{args.items} items x {args.days} days, density {args.density}")
+    print(f"{'path':<22}{'ms':>10}")
+    print(f"{'per-item ORM loop':<22}{loop_ms:>10.1f}")
+    print(f"{'vectorized NumPy':<22}{numpy_ms:>10.1f}")
+    print(f"speedup: {loop_ms / numpy_ms:.1f}x, forecast mismatches: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
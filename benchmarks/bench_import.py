@@ -0,0 +1,92 @@
+"""Compare onboarding items with POST /inventory (one per request) and a CSV import.
+
+Creates --posts items one request at a time, then imports --items new items
+from a CSV file streamed off disk, then restocks every item with a second
+import in 'add' mode, and traces peak Python memory over one more restock.
+
+Usage: python -m benchmarks.bench_import [--posts 2000] [--items 200000] [--db /tmp/bench_import.db]
+"""
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='/tmp/bench_import.db')
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--items', type=int, default=200000)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{args.db}'
+    os.environ['CACHE_BACKEND'] = 'null'
+    # Measures the write path, not token checks
+    os.environ['AUTH_REQUIRED'] = 'false'
+
+    # Imported late so the app picks up the scratch database
+    from app import app
+    from models import db, User, Business
+
+    rng = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password='x')
+        business = Business(name='Bench Shop', owner=user)
+        db.session.add_all([user, business])
+        db.session.commit()
+        business_id = business.id
+
+    client = app.test_client()
+
+    started = time.perf_counter()
+    for n in range(args.posts):
+        client.post('/inventory', json={
+            'business_id': business_id, 'item_name': f'Posted item {n}', 'quantity': rng.randint(0, 500),
+            'price_per_unit': rng.randint(100, 100000) / 100
+        })
+    per_item = args.posts / (time.perf_counter() - started)
+
+    def run_import(path, mode, rows):
+        with open(path, 'rb') as body:
+            started = time.perf_counter()
+            response = client.post(
+                f'/inventory/{business_id}/import?mode={mode}', input_stream=body, content_type='text/csv',
+                content_length=os.path.getsize(path)
+            )
+        summary = response.get_json()
+        print(f"  {mode}: inserted={summary['inserted']} updated={summary['updated']} rejected={summary['rejected']}")
+        return rows / (time.perf_counter() - started)
+
+    path = f'{args.db}.csv'
+    with open(path, 'w') as out:
+        out.write('item_name,quantity,price_per_unit,description,reorder_point\n')
+        for n in range(args.items):
+            out.write(f'Item {n},{rng.randint(0, 500)},{rng.randint(100, 100000) / 100},Imported stock item,10\n')
+    print(f"import file: {os.path.getsize(path) / 2 ** 20:.1f} MB, {args.items:,} rows")
+    imported = run_import(path, 'set', args.items)
+
+    with open(path, 'w') as out:
+        out.write('item_name,quantity\n')
+        for n in range(args.items):
+            out.write(f'Item {n},{rng.randint(1, 50)}\n')
+    restocked = run_import(path, 'add', args.items)
+    # Traced separately: tracemalloc slows the import several times over
+    tracemalloc.start()
+    run_import(path, 'add', args.items)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    os.remove(path)
+
+    print(f"{'path':<22}{'items/sec':>12}")
+    print(f"{'POST /inventory':<22}{per_item:>12.0f}")
+    print(f"{'import (new items)':<22}{imported:>12.0f}")
+    print(f"{'import (restock)':<22}{restocked:>12.0f}")
+    print(f"speedup: {imported / per_item:.0f}x, restock peak Python memory {peak / 2 ** 20:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Seed a large scratch database and time the hot queries with and without indexes.
+
+Usage: python -m benchmarks.bench_indexes [--sales 2000000] [--db /tmp/bench_indexes.db]
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, func, insert, select
+from models import db, User, Business, Inventory, Sales, Insights
+
+HOT_INDEXES = [
+    index
+    for table in (Sales.__table__, Inventory.__table__, Insights.__table__)
+    for index in table.indexes
+]
+
+
+def seed(engine, businesses, items_per_business, sales, insights_per_business, chunk=50000):
+    """Bulk-load users, businesses, inventory, sales and insights with core inserts."""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{'id': 1, 'username': 'bench', 'email': 'bench@example.com', 'password': 'x'}])
+        conn.execute(insert(Business.__table__), [
+            {'id': b, 'user_id': 1, 'name': f'Business {b}'} for b in range(1, businesses + 1)
+        ])
+        conn.execute(insert(Inventory.__table__), [
+            {
+                'business_id': (i % businesses) + 1,
+                'item_name': f'Item {i}',
+                'quantity': rng.randint(0, 500),
+                'price_per_unit': rng.randint(1, 1000)
+            }
+            for i in range(businesses * items_per_business)
+        ])
+
+    item_count = businesses * items_per_business
+    for start in range(0, sales, chunk):
+        rows = []
+        for _ in range(min(chunk, sales - start)):
+            item_id = rng.randint(1, item_count)
+            rows.append({
+                'business_id': ((item_id - 1) % businesses) + 1,
+                'inventory_id': item_id,
+                'quantity_sold': rng.randint(1, 5),
+                'total_price': rng.randint(1, 5000),
+                'sold_at': now - timedelta(minutes=rng.randint(0, 525600))
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(Sales.__table__), rows)
+
+    metrics = ['total_revenue', 'total_profit', 'inventory_value']
+    with engine.begin() as conn:
+        conn.execute(insert(Insights.__table__), [
+            {
+                'business_id': b,
+                'metric': metrics[n % len(metrics)],
+                'value': rng.randint(1, 100000),
+                'recorded_at': now - timedelta(hours=n)
+            }
+            for b in range(1, businesses + 1)
+            for n in range(insights_per_business)
+        ])
+
+
+def hot_queries(business_id, inventory_id):
+    """The statements behind the list and insight endpoints in app.py."""
+    since = datetime.utcnow() - timedelta(days=7)
+    return {
+        'inventory by business': select(Inventory.id).where(Inventory.business_id == business_id),
+        'revenue by business': select(func.sum(Sales.total_price)).where(Sales.business_id == business_id),
+        'sales last 7 days': select(func.count(Sales.id)).where(Sales.business_id == business_id, Sales.sold_at >= since),
+        'sales by item': select(func.sum(Sales.quantity_sold)).where(Sales.inventory_id == inventory_id),
+        'latest insight': (
+            select(Insights.value)
+            .where(Insights.business_id == business_id, Insights.metric == 'total_revenue')
+            .order_by(Insights.recorded_at.desc())
+            .limit(1)
+        ),
+    }
+
+
+def time_queries(engine, businesses, repeat):
+    rng = random.Random(7)
+    results = {}
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            business_id = rng.randint(1, businesses)
+            for name, stmt in hot_queries(business_id, business_id).items():
+                started = time.perf_counter()
+                conn.execute(stmt).all()
+                results.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+    return {name: statistics.median(samples) for name, samples in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='/tmp/bench_indexes.db')
+    parser.add_argument('--businesses', type=int, default=500)
+    parser.add_argument('--items', type=int, default=200, help='Items per business.')
+    parser.add_argument('--sales', type=int, default=2000000)
+    parser.add_argument('--insights', type=int, default=300, help='Insight rows per business.')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    engine = create_engine(f'sqlite:///{args.db}')
+    db.metadata.create_all(engine)
+    for index in HOT_INDEXES:
+        index.drop(engine)
+
+    started = time.perf_counter()
+    seed(engine, args.businesses, args.items, args.sales, args.insights)
+    print(f"Seeded {args.sales} sales in {time.perf_counter() - started:.1f}s")
+
+    before = time_queries(engine, args.businesses, args.repeat)
+    for index in HOT_INDEXES:
+        index.create(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql('ANALYZE')
+    after = time_queries(engine, args.businesses, args.repeat)
+
+    print(f"{'query':<24}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in before:
+        print(f"{name:<24}{before[name]:>12.2f}{after[name]:>12.2f}{before[name] / max(after[name], 1e-6):>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
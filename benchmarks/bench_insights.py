@@ -0,0 +1,69 @@
+"""Compare per-business insight computation with the batch GROUP BY engine.
+
+The per-business path issues the four aggregate queries for each business in
+turn, as the API used to; the batch path computes every business with a
+handful of GROUP BY business_id queries, in one process or split by id range
+across a process pool.
+
+Usage: python -m benchmarks.bench_insights [--businesses 5000] [--sales 500000] [--workers 2]
+"""
+import argparse
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--businesses', type=int, default=5000)
+    parser.add_argument('--items-per-business', type=int, default=20)
+    parser.add_argument('--sales', type=int, default=500000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--db', default='/tmp/bench_insights.db')
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{args.db}'
+    os.environ['CACHE_BACKEND'] = 'null'
+
+    # Imported late so the app picks up the scratch database
+    from sqlalchemy import delete, select
+    from app import app
+    from models import db, Business, Insights
+    from seed import generate
+    from snapshots import take_snapshots, take_snapshots_parallel
+    from totals import compute_totals, insight_metrics
+
+    with app.app_context():
+        generate(args.businesses, 1, args.items_per_business, args.sales, log=lambda message: None)
+
+        def reset():
+            db.session.execute(delete(Insights))
+            db.session.commit()
+
+        reset()
+        started = time.perf_counter()
+        for business_id in db.session.execute(select(Business.id)).scalars().all():
+            insight_metrics(compute_totals([business_id])[business_id])
+        per_business = time.perf_counter() - started
+
+        started = time.perf_counter()
+        written = take_snapshots(recompute=True)
+        db.session.commit()
+        batch = time.perf_counter() - started
+
+        reset()
+        started = time.perf_counter()
+        parallel_written = take_snapshots_parallel(args.workers, recompute=True)
+        parallel = time.perf_counter() - started
+
+    print(f"{args.businesses} businesses, {args.sales} sales, {os.cpu_count()} CPUs")
+    print(f"{'path':<30}{'seconds':>10}")
+    print(f"{'per business (compute only)':<30}{per_business:>10.2f}")
+    print(f"{'batch, 1 process':<30}{batch:>10.2f}")
+    print(f"{f'batch, {args.workers} processes':<30}{parallel:>10.2f}")
+    print(f"rows written: {written} batch, {parallel_written} parallel")
+
+
+if __name__ == '__main__':
+    main()
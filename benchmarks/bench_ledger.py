@@ -0,0 +1,67 @@
+"""Time point-in-time inventory valuation by full ledger replay and from daily snapshots.
+
+Builds a business whose items have --movements stock movements spread
+over --days days, values it as of a recent moment by replaying the whole
+ledger, then takes one snapshot per day and values it again.
+
+Usage: python -m benchmarks.bench_ledger [--items 500] [--movements 200000] [--days 90]
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--movements', type=int, default=200000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    os.environ['CACHE_BACKEND'] = 'null'
+
+    # Imported late so the app picks up the in-memory database
+    import numpy as np
+    from app import app
+    from ledger import inventory_value_as_of, take_stock_snapshots
+    from models import db, StockMovement
+    from seed import generate, insert_rows
+
+    with app.app_context():
+        generate(users=1, items_per_business=args.items, sales=0, days=args.days, log=lambda message: None)
+        rng = np.random.default_rng(7)
+        start = datetime.utcnow() - timedelta(days=args.days)
+        offsets = np.sort(rng.integers(args.days * 86400, size=args.movements)).tolist()
+        items = rng.integers(1, args.items + 1, size=args.movements).tolist()
+        changes = rng.integers(-3, 5, size=args.movements).tolist()
+        insert_rows(StockMovement, (
+            {'business_id': 1, 'inventory_id': item, 'kind': 'adjustment', 'quantity': change, 'unit_cost': 1,
+             'occurred_at': start + timedelta(seconds=offset)}
+            for item, change, offset in zip(items, changes, offsets)
+        ), 10000)
+        db.session.commit()
+        as_of = start + timedelta(days=args.days - 1, hours=12)
+
+        def value():
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                result = inventory_value_as_of(1, as_of)
+            return result, (time.perf_counter() - started) / args.repeat * 1000
+
+        replayed, replay_ms = value()
+        for day in range(1, args.days + 1):
+            take_stock_snapshots(lag_seconds=0, now=start + timedelta(days=day))
+        db.session.commit()
+        snapshotted, snapshot_ms = value()
+
+    assert replayed == snapshotted, (replayed, snapshotted)
+    print(f"{args.movements:,} movements over {args.days} days, {args.items} items, value {snapshotted}")
+    print(f"{'full replay':<22}{replay_ms:>9.1f} ms")
+    print(f"{'snapshot + replay':<22}{snapshot_ms:>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Report password verifications (logins) per second per core for several hash costs.
+
+Each method is timed single-threaded, which is the per-core rate, and through
+the app's bounded PasswordHasher pool with one worker per CPU.
+
+Usage: python -m benchmarks.bench_login [--seconds 3] [--method scrypt:16384:8:1 ...]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+from passwords import PasswordHasher
+
+DEFAULT_METHODS = [
+    'scrypt:32768:8:1',
+    'scrypt:16384:8:1',
+    'scrypt:8192:8:1',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:100000',
+]
+
+
+def rate(verify, seconds):
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        verify()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def pooled_rate(hasher, pwhash, seconds, clients):
+    def client():
+        return rate(lambda: hasher.verify(pwhash, 'correct horse'), seconds)
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        return sum(pool.map(lambda _: client(), range(clients)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--method', action='append', help='werkzeug hash method; repeatable.')
+    args = parser.parse_args()
+
+    cores = os.cpu_count()
+    print(f"{'method':<24}{'logins/sec/core':>16}{f'pool x{cores}':>14}{'ms/login':>10}")
+    for method in args.method or DEFAULT_METHODS:
+        pwhash = generate_password_hash('correct horse', method)
+        single = rate(lambda: check_password_hash(pwhash, 'correct horse'), args.seconds)
+        hasher = PasswordHasher(method, cores, timeout=60)
+        pooled = pooled_rate(hasher, pwhash, args.seconds, clients=cores * 2)
+        hasher.executor.shutdown()
+        print(f"{method:<24}{single:>16.1f}{pooled:>14.1f}{1000 / single:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Measure the per-request overhead of the metrics middleware and cursor hooks.
+
+Each setting runs in a fresh subprocess (Config is read at import time) and
+times the same sequence of list, insight and sale requests.
+
+Usage: python -m benchmarks.bench_metrics [--requests 3000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def run_worker(requests):
+    from app import app
+    from models import db, User, Business, Inventory
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username='bench', email='bench@example.com', password='x'))
+        db.session.add(Business(id=1, user_id=1, name='Bench Shop'))
+        db.session.add_all([
+            Inventory(item_name=f'Item {n}', quantity=10 ** 6, price_per_unit=5, business_id=1) for n in range(100)
+        ])
+        db.session.commit()
+
+    client = app.test_client()
+    started = time.perf_counter()
+    for n in range(requests):
+        if n % 3 == 0:
+            client.post('/sales', json={'business_id': 1, 'inventory_id': n % 100 + 1, 'quantity_sold': 1, 'total_price': 5})
+        elif n % 3 == 1:
+            client.get('/inventory/1?limit=50')
+        else:
+            client.get('/insights/comprehensive/1')
+    print(json.dumps({'seconds': time.perf_counter() - started}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.requests)
+        return
+
+    results = {}
+    for name, enabled in (('metrics off', 'false'), ('metrics on', 'true')):
+        env = dict(os.environ, SQLALCHEMY_DATABASE_URI='sqlite://', CACHE_BACKEND='null', AUTH_REQUIRED='false',
+                   METRICS_ENABLED=enabled)
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_metrics', '--worker', '--requests', str(args.requests)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        results[name] = json.loads(output)['seconds'] / args.requests * 10 ** 6
+
+    print(f"{'setting':<14}{'us/request':>12}")
+    for name, micros in results.items():
+        print(f"{name:<14}{micros:>12.0f}")
+    print(f"overhead: {results['metrics on'] - results['metrics off']:.0f} us/request "
+          f"({(results['metrics on'] / results['metrics off'] - 1) * 100:.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
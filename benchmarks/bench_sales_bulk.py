@@ -0,0 +1,71 @@
+"""Compare sales ingestion throughput of POST /sales (one per request) and POST /sales/bulk.
+
+Usage: python -m benchmarks.bench_sales_bulk [--sales 5000] [--db /tmp/bench_sales_bulk.db]
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='/tmp/bench_sales_bulk.db')
+    parser.add_argument('--sales', type=int, default=5000)
+    parser.add_argument('--items', type=int, default=100)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{args.db}'
+    # Measures the write path, not token checks
+    os.environ['AUTH_REQUIRED'] = 'false'
+
+    # Imported late so the app picks up the scratch database
+    from app import app
+    from models import db, User, Business, Inventory
+
+    rng = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password='x')
+        business = Business(name='Bench Shop', owner=user)
+        db.session.add_all([user, business])
+        db.session.flush()
+        db.session.add_all([
+            Inventory(item_name=f'Item {n}', quantity=10 ** 6, price_per_unit=rng.randint(1, 100), business_id=business.id)
+            for n in range(args.items)
+        ])
+        db.session.commit()
+        business_id = business.id
+
+    def sale():
+        return {
+            'business_id': business_id,
+            'inventory_id': rng.randint(1, args.items),
+            'quantity_sold': rng.randint(1, 5),
+            'total_price': rng.randint(1, 500)
+        }
+
+    client = app.test_client()
+
+    started = time.perf_counter()
+    for _ in range(args.sales):
+        client.post('/sales', json=sale())
+    per_row = args.sales / (time.perf_counter() - started)
+
+    body = '\n'.join(json.dumps(sale()) for _ in range(args.sales))
+    started = time.perf_counter()
+    response = client.post('/sales/bulk', data=body, content_type='application/x-ndjson')
+    bulk = args.sales / (time.perf_counter() - started)
+
+    print(f"bulk response: {response.status_code} inserted={response.get_json()['inserted']}")
+    print(f"{'path':<14}{'sales/sec':>12}")
+    print(f"{'/sales':<14}{per_row:>12.0f}")
+    print(f"{'/sales/bulk':<14}{bulk:>12.0f}")
+    print(f"speedup: {bulk / per_row:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
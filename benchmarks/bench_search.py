@@ -0,0 +1,89 @@
+"""Time type-ahead inventory search against a LIKE scan on a large catalog.
+
+Usage: python -m benchmarks.bench_search [--items 1000000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import time
+
+
+def percentile(timings, share):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000000)
+    parser.add_argument('--vocabulary', type=int, default=20000, help='Distinct words in item names.')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--db', default='/tmp/bench_search.db')
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{args.db}'
+    os.environ['CACHE_BACKEND'] = 'null'
+
+    # Imported late so the app picks up the scratch database
+    from sqlalchemy import func, insert, or_, select
+    from app import app
+    from models import db, User, Business, Inventory
+    from search import search_inventory
+    from serializers import INVENTORY_FIELDS
+
+    rng = random.Random(42)
+    words = sorted({''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(args.vocabulary)})
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username='bench', email='bench@example.com', password='x'))
+        db.session.add(Business(id=1, user_id=1, name='Bench Shop'))
+        for offset in range(0, args.items, 50000):
+            db.session.execute(insert(Inventory), [
+                {
+                    'business_id': 1,
+                    # Numbered because names are unique per business
+                    'item_name': f"{' '.join(rng.choices(words, k=3))} {n}",
+                    'description': ' '.join(rng.choices(words, k=8)),
+                    'quantity': 1,
+                    'price_per_unit': 1
+                }
+                for n in range(offset, min(offset + 50000, args.items))
+            ])
+        db.session.commit()
+
+        # Type-ahead traffic: a word typed out one letter at a time from its third letter
+        queries = []
+        while len(queries) < args.queries:
+            first, second = rng.sample(words, 2)
+            queries += [first[:n] for n in range(3, len(first) + 1)] + [f'{first} {second[:3]}']
+        queries = queries[:args.queries]
+
+        def like_scan(query):
+            stmt = select(*INVENTORY_FIELDS).where(Inventory.business_id == 1)
+            for term in query.split():
+                stmt = stmt.where(or_(
+                    func.lower(Inventory.item_name).contains(term), func.lower(Inventory.description).contains(term)
+                ))
+            return db.session.execute(stmt.order_by(Inventory.id).limit(20)).all()
+
+        results = {}
+        for name, fn in (('LIKE scan', like_scan), ('FTS5 search', lambda q: search_inventory(1, q, 20))):
+            timings = []
+            for query in queries[:20] if name == 'LIKE scan' else queries:
+                started = time.perf_counter()
+                fn(query)
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = timings
+
+    print(f"{args.items} items, {len(queries)} type-ahead queries (LIKE scan sampled on 20)")
+    print(f"{'path':<14}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, timings in results.items():
+        print(f"{name:<14}{statistics.median(timings):>10.1f}{percentile(timings, 0.95):>10.1f}{max(timings):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Compare the old ORM + marshmallow listing path with projected rows + the fast encoder.
+
+Usage: python -m benchmarks.bench_serialization [--rows 100000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+import tracemalloc
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings) * 1000, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    os.environ['CACHE_BACKEND'] = 'null'
+
+    # Imported late so the app picks up the in-memory database
+    from flask import json
+    from marshmallow import Schema, fields
+    from sqlalchemy import insert, select
+    from app import app
+    from models import db, User, Business, Inventory
+    from serializers import INVENTORY_FIELDS, encode, rows_to_dicts
+
+    class InventorySchema(Schema):
+        # The schema the listing used before the projection layer
+        id = fields.Int()
+        business_id = fields.Int()
+        item_name = fields.Str()
+        description = fields.Str()
+        quantity = fields.Int()
+        price_per_unit = fields.Decimal()
+        created_at = fields.DateTime()
+
+    rng = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username='bench', email='bench@example.com', password='x'))
+        db.session.add(Business(id=1, user_id=1, name='Bench Shop'))
+        db.session.execute(insert(Inventory), [
+            {
+                'business_id': 1,
+                'item_name': f'Item {n}',
+                'description': 'A reasonably descriptive sentence about this stock keeping unit.',
+                'quantity': rng.randint(0, 1000),
+                'price_per_unit': rng.randint(100, 100000) / 100
+            }
+            for n in range(args.rows)
+        ])
+        db.session.commit()
+
+        def orm_marshmallow():
+            items = Inventory.query.filter_by(business_id=1).order_by(Inventory.id).all()
+            body = json.dumps(InventorySchema().dump(items, many=True), default=str)
+            db.session.expunge_all()
+            return body
+
+        def projected_fast():
+            stmt = select(*INVENTORY_FIELDS).where(Inventory.business_id == 1).order_by(Inventory.id)
+            return encode(rows_to_dicts(INVENTORY_FIELDS, db.session.execute(stmt).all()))
+
+        old_ms, old_mb = measure(orm_marshmallow, args.repeat)
+        new_ms, new_mb = measure(projected_fast, args.repeat)
+
+    print(f"{args.rows} inventory rows")
+    print(f"{'path':<26}{'ms':>10}{'peak MiB':>10}")
+    print(f"{'ORM + marshmallow':<26}{old_ms:>10.1f}{old_mb:>10.1f}")
+    print(f"{'projection + encoder':<26}{new_ms:>10.1f}{new_mb:>10.1f}")
+    print(f"speedup: {old_ms / new_ms:.1f}x, memory: {old_mb / new_mb:.1f}x less")
+
+
+if __name__ == '__main__':
+    main()
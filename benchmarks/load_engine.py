@@ -0,0 +1,110 @@
+"""Concurrent load test of the app under different engine and SQLite settings.
+
+Each setting runs in a fresh subprocess (Config is read at import time) against
+its own scratch database: a mixed workload of list, insight and sale requests
+from many threads, with the response cache disabled so every request reaches
+the database.
+
+Usage: python -m benchmarks.load_engine [--threads 16] [--requests 300]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+SETTINGS = {
+    'sqlite defaults': {'SQLITE_JOURNAL_MODE': '', 'SQLITE_SYNCHRONOUS': '', 'SQLALCHEMY_POOL_SIZE': '5'},
+    'WAL': {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': '', 'SQLALCHEMY_POOL_SIZE': '5'},
+    'WAL + synchronous=NORMAL': {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL', 'SQLALCHEMY_POOL_SIZE': '5'},
+    'WAL + NORMAL + pool 20': {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL', 'SQLALCHEMY_POOL_SIZE': '20'},
+    'WAL + NORMAL + no pre-ping': {
+        'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL', 'SQLALCHEMY_POOL_SIZE': '20',
+        'SQLALCHEMY_POOL_PRE_PING': 'false'
+    },
+}
+
+
+def run_worker(threads, requests, items):
+    """Body of one subprocess: seed, drive the app from `threads` threads, print JSON stats."""
+    from app import app
+    from models import db, User, Business, Inventory
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='load', email='load@example.com', password='x')
+        business = Business(name='Load Shop', owner=user)
+        db.session.add_all([user, business])
+        db.session.flush()
+        db.session.add_all([
+            Inventory(item_name=f'Item {n}', quantity=10 ** 6, price_per_unit=5, business_id=business.id)
+            for n in range(items)
+        ])
+        db.session.commit()
+        business_id = business.id
+
+    errors = []
+
+    def client(seed):
+        rng = random.Random(seed)
+        test_client = app.test_client()
+        for _ in range(requests):
+            roll = rng.random()
+            if roll < 0.3:
+                response = test_client.post('/sales', json={
+                    'business_id': business_id,
+                    'inventory_id': rng.randint(1, items),
+                    'quantity_sold': 1,
+                    'total_price': 5
+                })
+            elif roll < 0.65:
+                response = test_client.get(f'/inventory/{business_id}?limit=50')
+            else:
+                response = test_client.get(f'/insights/comprehensive/{business_id}')
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    print(json.dumps({'requests': threads * requests, 'seconds': elapsed, 'errors': len(errors)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=300, help='Requests per thread.')
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.threads, args.requests, args.items)
+        return
+
+    print(f"{'setting':<30}{'req/sec':>10}{'errors':>8}")
+    for name, overrides in SETTINGS.items():
+        db_path = '/tmp/load_engine.db'
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        env = dict(os.environ, SQLALCHEMY_DATABASE_URI=f'sqlite:///{db_path}', CACHE_BACKEND='null',
+                   AUTH_REQUIRED='false', **overrides)
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.load_engine', '--worker',
+             '--threads', str(args.threads), '--requests', str(args.requests), '--items', str(args.items)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        stats = json.loads(output)
+        print(f"{name:<30}{stats['requests'] / stats['seconds']:>10.0f}{stats['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
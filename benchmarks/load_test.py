@@ -0,0 +1,226 @@
+"""Repeatable load test over every route in app.py and auth.py, tracked against a baseline.
+
+Seeds a scratch database with seed.generate, then replays a fixed, seeded
+mix of requests from several threads and reports per-route p50/p95/p99
+latency, client and server errors and overall throughput. Results are
+compared with the saved baseline; --save-baseline records the current run
+instead.
+
+Usage: python -m benchmarks.load_test [--threads 8] [--requests 500] [--save-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'load_baseline.json')
+
+# (label, weight): reads dominate, as they do in production
+MIX = (
+    ('GET /users', 2), ('POST /users', 1), ('GET /businesses/<user_id>', 3), ('POST /business', 1),
+    ('GET /inventory/<business_id>', 10), ('POST /inventory', 2), ('GET /inventory/<business_id>/low_stock', 3),
+    ('POST /inventory/<business_id>/import', 1), ('GET /inventory/<business_id>/search', 6),
+    ('GET /inventory/<item_id>/movements', 1),
+    ('POST /inventory/<item_id>/movements', 1), ('GET /inventory/<item_id>/prices', 1),
+    ('POST /inventory/<item_id>/prices', 1), ('POST /sales', 10), ('POST /sales/bulk', 1),
+    ('GET /insights/<business_id>', 3), ('GET /insights/total_revenue/<business_id>', 3),
+    ('GET /insights/total_profit/<business_id>', 3), ('GET /insights/inventory_value/<business_id>', 3),
+    ('GET /insights/comprehensive/<business_id>', 6), ('GET /insights/sales/<business_id>', 4),
+    ('GET /insights/forecast/<business_id>', 2), ('POST /insights/snapshot/<business_id>', 1),
+    ('GET /export/<business_id>/<table>', 1),
+    ('GET /metrics', 1), ('POST /auth/login', 1), ('POST /auth/register', 1), ('POST /auth/verify_otp', 1),
+)
+SEARCH_TERMS = ('blue', 'lap', 'ham', 'fresh kett', 'cotton', 'wire', 'note', 'so')
+
+
+def percentile(ordered, share):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def make_request(client, label, rng, dataset, counter):
+    users, businesses, items_per_business = dataset
+    user_id = rng.randint(1, users)
+    business_id = rng.randint(1, businesses)
+    item_id = (business_id - 1) * items_per_business + rng.randint(1, items_per_business)
+    unique = next(counter)
+    method, path = label.split(' ')
+
+    if label == 'POST /users':
+        return client.post('/users', json={'username': f'load{unique}', 'email': f'load{unique}@example.com',
+                                           'password': 'password123'})
+    if label == 'POST /business':
+        return client.post('/business', json={'name': f'Load {unique}', 'user_id': user_id, 'category': 'Retail'})
+    if label == 'POST /inventory':
+        return client.post('/inventory', json={'item_name': f'Load item {unique}', 'quantity': 100,
+                                               'price_per_unit': 5, 'business_id': business_id, 'reorder_point': 10})
+    if label == 'POST /inventory/<business_id>/import':
+        body = 'item_name,quantity,price_per_unit,reorder_point\n' + ''.join(
+            f'Load import {unique}-{n},{rng.randint(1, 100)},{rng.randint(100, 10000) / 100},10\n' for n in range(20)
+        )
+        return client.post(f'/inventory/{business_id}/import', data=body, content_type='text/csv')
+    if label == 'POST /sales':
+        return client.post('/sales', json={'business_id': business_id, 'inventory_id': item_id,
+                                           'quantity_sold': 1, 'total_price': 10})
+    if label == 'POST /sales/bulk':
+        return client.post('/sales/bulk', json=[
+            {'business_id': business_id, 'inventory_id': (business_id - 1) * items_per_business + rng.randint(1, items_per_business),
+             'quantity_sold': 1, 'total_price': 10}
+            for _ in range(50)
+        ])
+    if label == 'POST /inventory/<item_id>/movements':
+        return client.post(f'/inventory/{item_id}/movements', json={'kind': 'receipt', 'quantity': rng.randint(1, 20)})
+    if label == 'POST /inventory/<item_id>/prices':
+        return client.post(f'/inventory/{item_id}/prices', json={'price_per_unit': round(rng.uniform(1, 100), 2)})
+    if label == 'POST /auth/login':
+        return client.post('/auth/login', data={'username': f'user{user_id}', 'password': 'password123'})
+    if label == 'POST /auth/register':
+        return client.post('/auth/register', data={'username': f'reg{unique}', 'email': f'reg{unique}@example.com',
+                                              'password': 'password123', 'role': 'customer'})
+    if label == 'POST /auth/verify_otp':
+        return client.post('/auth/verify_otp', json={'username': f'user{user_id}', 'otp': '000000'})
+
+    url = path.replace('<user_id>', str(user_id)).replace('<business_id>', str(business_id)).replace('<item_id>', str(item_id))
+    if label == 'GET /export/<business_id>/<table>':
+        url = url.replace('<table>', rng.choice(('sales', 'inventory')))
+        response = client.get(url + f"?format={rng.choice(('parquet', 'arrow'))}")
+        # The export streams, so the time to encode it is only spent once the body is read
+        response.get_data()
+        return response
+    if label == 'GET /inventory/<business_id>/search':
+        url += f'?q={rng.choice(SEARCH_TERMS)}'
+    elif label == 'GET /insights/sales/<business_id>':
+        url += f"?interval={rng.choice(('hour', 'day', 'week'))}"
+    elif label == 'GET /inventory/<business_id>':
+        url += '?limit=50'
+    return client.post(url) if method == 'POST' else client.get(url)
+
+
+def run(args):
+    # Imported late so the app picks up the scratch database and settings
+    import itertools
+    from flask_jwt_extended import create_access_token
+    from app import app
+    from seed import generate
+
+    with app.app_context():
+        generate(args.users, args.businesses_per_user, args.items_per_business, args.sales,
+                 seed=args.seed, log=lambda message: None)
+    dataset = (args.users, args.users * args.businesses_per_user, args.items_per_business)
+    labels = [label for label, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    counter = itertools.count()
+    timings = {label: [] for label in labels}
+    rejected = {label: 0 for label in labels}
+    errors = {label: 0 for label in labels}
+    lock = threading.Lock()
+
+    def client_thread(seed):
+        rng = random.Random(seed)
+        # Each thread is its own client address, so rate limits apply as they would per user
+        client = app.test_client()
+        client.environ_base['REMOTE_ADDR'] = f'10.0.0.{seed % 250 + 1}'
+        with app.app_context():
+            token = create_access_token(identity=str(rng.randint(1, args.users)))
+        client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        local = []
+        for label in rng.choices(labels, weights, k=args.requests):
+            started = time.perf_counter()
+            response = make_request(client, label, rng, dataset, counter)
+            local.append((label, (time.perf_counter() - started) * 1000, response.status_code))
+        with lock:
+            for label, elapsed, status in local:
+                timings[label].append(elapsed)
+                rejected[label] += 400 <= status < 500
+                errors[label] += status >= 500
+
+    threads = [threading.Thread(target=client_thread, args=(args.seed + n,)) for n in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for label in labels:
+        ordered = sorted(timings[label])
+        if ordered:
+            routes[label] = {
+                'count': len(ordered), 'rejected': rejected[label], 'errors': errors[label],
+                'p50_ms': round(percentile(ordered, 0.5), 2), 'p95_ms': round(percentile(ordered, 0.95), 2),
+                'p99_ms': round(percentile(ordered, 0.99), 2)
+            }
+    every = sorted(value for values in timings.values() for value in values)
+    return {
+        'settings': {key: value for key, value in vars(args).items() if key not in ('save_baseline', 'tolerance', 'db')},
+        'machine': {'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'throughput_rps': round(len(every) / elapsed, 1),
+        'overall': {'p50_ms': round(percentile(every, 0.5), 2), 'p95_ms': round(percentile(every, 0.95), 2),
+                    'p99_ms': round(percentile(every, 0.99), 2)},
+        'routes': routes
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=500, help='Requests per thread.')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--businesses-per-user', type=int, default=2)
+    parser.add_argument('--items-per-business', type=int, default=200)
+    parser.add_argument('--sales', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', default='/tmp/load_test.db')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95/throughput regression.')
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{args.db}'
+    os.environ.setdefault('CACHE_BACKEND', 'memory')
+    # Keep registration from trying to reach a real mail server
+    os.environ.setdefault('SMTP_SERVER', 'localhost')
+    os.environ.setdefault('SMTP_PORT', '1')
+
+    result = run(args)
+    baseline = None
+    if os.path.exists(BASELINE) and not args.save_baseline:
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+        if baseline['settings'] != result['settings']:
+            baseline = None
+            print("Baseline was recorded with different settings; not comparing.")
+
+    print(f"{'route':<46}{'count':>7}{'4xx':>6}{'5xx':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'p95 vs base':>13}")
+    for label, stats in result['routes'].items():
+        change = ''
+        if baseline and label in baseline['routes']:
+            change = f"{stats['p95_ms'] / max(baseline['routes'][label]['p95_ms'], 0.01) - 1:+.0%}"
+        print(f"{label:<46}{stats['count']:>7}{stats['rejected']:>6}{stats['errors']:>6}{stats['p50_ms']:>9.1f}"
+              f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{change:>13}")
+    overall = result['overall']
+    print(f"overall p50 {overall['p50_ms']:.1f} ms, p95 {overall['p95_ms']:.1f} ms, "
+          f"p99 {overall['p99_ms']:.1f} ms, {result['throughput_rps']:.0f} req/s")
+
+    if args.save_baseline:
+        with open(BASELINE, 'w') as f:
+            json.dump(result, f, indent=2)
+            f.write('\n')
+        print(f"Saved baseline to {BASELINE}")
+    elif baseline:
+        slower = result['throughput_rps'] < baseline['throughput_rps'] * (1 - args.tolerance)
+        p95_worse = overall['p95_ms'] > baseline['overall']['p95_ms'] * (1 + args.tolerance)
+        print(f"baseline: {baseline['throughput_rps']:.0f} req/s, p95 {baseline['overall']['p95_ms']:.1f} ms")
+        if slower or p95_worse:
+            print("Regression beyond tolerance against the baseline.")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
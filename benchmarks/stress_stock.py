@@ -0,0 +1,103 @@
+"""Hammer POST /sales from many threads and check that no item is ever oversold.
+
+A few hot items get far more demand than stock while the rest of the catalog
+sees light traffic. At the end every item must satisfy
+    initial stock - units sold == remaining stock >= 0
+and the running inventory value must match the table.
+
+Usage: python -m benchmarks.stress_stock [--threads 16] [--requests 400] [--db /tmp/stress_stock.db]
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='/tmp/stress_stock.db')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=400, help='Sales attempted per thread.')
+    parser.add_argument('--items', type=int, default=50)
+    parser.add_argument('--hot-items', type=int, default=3)
+    parser.add_argument('--stock', type=int, default=100)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{args.db}'
+    # Measures the write path, not token checks
+    os.environ['AUTH_REQUIRED'] = 'false'
+
+    # Imported late so the app picks up the scratch database
+    from app import app
+    from models import db, User, Business, Inventory, Sales
+    from sqlalchemy import func
+    from totals import get_totals
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='stress', email='stress@example.com', password='x')
+        business = Business(name='Stress Shop', owner=user)
+        db.session.add_all([user, business])
+        db.session.flush()
+        db.session.add_all([
+            Inventory(item_name=f'Item {n}', quantity=args.stock, price_per_unit=10, business_id=business.id)
+            for n in range(args.items)
+        ])
+        db.session.commit()
+        business_id = business.id
+
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        local = Counter()
+        for _ in range(args.requests):
+            hot = rng.random() < 0.5
+            inventory_id = rng.randint(1, args.hot_items) if hot else rng.randint(args.hot_items + 1, args.items)
+            response = client.post('/sales', json={
+                'business_id': business_id,
+                'inventory_id': inventory_id,
+                'quantity_sold': rng.randint(1, 3),
+                'total_price': 30
+            })
+            local[response.status_code] += 1
+        with lock:
+            statuses.update(local)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        sold = dict(
+            db.session.query(Sales.inventory_id, func.sum(Sales.quantity_sold)).group_by(Sales.inventory_id).all()
+        )
+        oversold = [
+            item.id for item in Inventory.query.all()
+            if item.quantity < 0 or args.stock - sold.get(item.id, 0) != item.quantity
+        ]
+        table_value = db.session.query(func.sum(Inventory.quantity * Inventory.price_per_unit)).scalar()
+        totals_value = get_totals(business_id).inventory_value
+
+    attempts = args.threads * args.requests
+    print(f"attempts: {attempts} in {elapsed:.1f}s ({attempts / elapsed:.0f} req/sec)")
+    print(f"accepted: {statuses[201]} ({statuses[201] / elapsed:.0f} sales/sec), rejected for stock: {statuses[409]}")
+    print(f"other statuses: {dict((k, v) for k, v in statuses.items() if k not in (201, 409))}")
+    print(f"inventory value: table={table_value} totals={totals_value}")
+    if oversold or table_value != totals_value:
+        raise SystemExit(f"FAILED: inconsistent items {oversold}")
+    print("OK: no item oversold, stock and totals consistent")
+
+
+if __name__ == '__main__':
+    main()
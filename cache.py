@@ -0,0 +1,178 @@
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request
+
+
+class MemoryCache:
+    """In-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries=10000, default_ttl=30):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counters(self, keys):
+        with self._lock:
+            return [self._counters.get(key, 0) for key in keys]
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class RedisCache:
+    """Cache shared across workers through any Redis-protocol server."""
+
+    def __init__(self, url, default_ttl=30, prefix='inventory:'):
+        import redis  # Optional dependency, only needed for this backend
+        self.client = redis.Redis.from_url(url)
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def counters(self, keys):
+        return [int(value or 0) for value in self.client.mget([self.prefix + key for key in keys])]
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class NullCache:
+    """Backend that stores nothing; responses still get ETags."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def counters(self, keys):
+        return [0] * len(keys)
+
+    def incr(self, key):
+        return 0
+
+    def clear(self):
+        pass
+
+
+def init_cache(app):
+    """Create the response cache backend configured by CACHE_BACKEND."""
+    backend = app.config['CACHE_BACKEND']
+    ttl = app.config['CACHE_DEFAULT_TTL']
+    if backend == 'redis':
+        cache = RedisCache(app.config['CACHE_REDIS_URL'], default_ttl=ttl)
+    elif backend == 'memory':
+        cache = MemoryCache(app.config['CACHE_MAX_ENTRIES'], default_ttl=ttl)
+    else:
+        cache = NullCache()
+    app.extensions['response_cache'] = cache
+    return cache
+
+
+def get_cache():
+    return current_app.extensions['response_cache']
+
+
+def invalidate(scope, scope_id=None):
+    """Drop every cached response for a scope, e.g. ('business', 3), by bumping its generation."""
+    get_cache().incr(f'gen:{scope}:{scope_id}')
+
+
+def invalidate_all():
+    """Drop every cached response, e.g. after a CLI job rewrote tables behind the API."""
+    get_cache().incr('gen:*')
+
+
+def etag_for(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def response_key(cache, endpoint, scope, scope_id, args, accept):
+    """Cache key for one response under the current generations of its scope and of everything.
+
+    `args` are the query (key, value) pairs; asgi.py builds the same keys, so
+    both servers share entries.
+    """
+    global_gen, scope_gen = cache.counters(['gen:*', f'gen:{scope}:{scope_id}'])
+    params = '&'.join(f'{key}={value}' for key, value in sorted(args))
+    return f'resp:{endpoint}:{scope}:{scope_id}:{global_gen}:{scope_gen}:{params}:{accept}'
+
+
+def cached(scope, id_arg=None, ttl=None):
+    """Cache a Resource GET by (endpoint, scope id, query params) and answer If-None-Match.
+
+    Entries are keyed under the scope's generation counter, so `invalidate()`
+    retires them precisely without enumerating keys. Only complete 200
+    responses are stored; streamed responses pass through untouched.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            scope_id = kwargs.get(id_arg) if id_arg else None
+            key = response_key(cache, request.endpoint, scope, scope_id, request.args.items(multi=True),
+                               request.headers.get('Accept', ''))
+
+            entry = cache.get(key)
+            if entry is None:
+                response = current_app.make_response(method(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                body = response.get_data()
+                headers = [(k, v) for k, v in response.headers.items() if k not in ('Content-Length', 'ETag')]
+                entry = (body, headers, etag_for(body))
+                cache.set(key, entry, ttl)
+
+            body, headers, etag = entry
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.response_class(body, headers=headers)
+            response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
@@ -1,7 +1,142 @@
 import os
 
+
+def engine_options(uri, pool_size, max_overflow, pool_recycle, pool_timeout, pool_pre_ping, query_cache_size):
+    """SQLALCHEMY_ENGINE_OPTIONS for a database URI.
+
+    In-memory SQLite uses a single-connection pool that takes no sizing options.
+    """
+    options = {'pool_pre_ping': pool_pre_ping, 'query_cache_size': query_cache_size}
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        return options
+    options.update(
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=pool_recycle,
+        pool_timeout=pool_timeout
+    )
+    return options
+
+
 class Config:
     """Base config class."""
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')  # Set default if not provided
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI', 'sqlite:///inventory.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = os.getenv('SQLALCHEMY_TRACK_MODIFICATIONS', False)
+
+    # Engine and connection pool tuning, applied to the primary and the replica
+    POOL_SETTINGS = dict(
+        pool_size=int(os.getenv('SQLALCHEMY_POOL_SIZE', 10)),
+        max_overflow=int(os.getenv('SQLALCHEMY_MAX_OVERFLOW', 20)),
+        pool_recycle=int(os.getenv('SQLALCHEMY_POOL_RECYCLE', 1800)),
+        pool_timeout=int(os.getenv('SQLALCHEMY_POOL_TIMEOUT', 30)),
+        pool_pre_ping=os.getenv('SQLALCHEMY_POOL_PRE_PING', 'true').lower() == 'true',
+        query_cache_size=int(os.getenv('SQLALCHEMY_QUERY_CACHE_SIZE', 500))
+    )
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI, **POOL_SETTINGS)
+
+    # Optional read replica; GET requests are routed to it when set
+    SQLALCHEMY_REPLICA_URI = os.getenv('SQLALCHEMY_REPLICA_URI')
+    SQLALCHEMY_BINDS = {
+        'replica': dict(url=SQLALCHEMY_REPLICA_URI, **engine_options(SQLALCHEMY_REPLICA_URI, **POOL_SETTINGS))
+    } if SQLALCHEMY_REPLICA_URI else {}
+
+    # SQLite connection pragmas (ignored on other databases); empty values keep SQLite's defaults
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+    # List endpoints: keyset page sizes and NDJSON streaming batch size
+    PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', 100))
+    PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', 1000))
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 1000))
+    SEARCH_LIMIT_DEFAULT = int(os.getenv('SEARCH_LIMIT_DEFAULT', 20))
+
+    # Bulk sales ingestion
+    SALES_BULK_CHUNK_SIZE = int(os.getenv('SALES_BULK_CHUNK_SIZE', 1000))
+    SALES_BULK_MAX_ROWS = int(os.getenv('SALES_BULK_MAX_ROWS', 50000))
+
+    # Insight snapshot retention: raw for hours, then hourly for days, then daily (0 keeps forever)
+    INSIGHTS_RAW_RETENTION_HOURS = int(os.getenv('INSIGHTS_RAW_RETENTION_HOURS', 48))
+    INSIGHTS_HOURLY_RETENTION_DAYS = int(os.getenv('INSIGHTS_HOURLY_RETENTION_DAYS', 30))
+    INSIGHTS_RETENTION_DAYS = int(os.getenv('INSIGHTS_RETENTION_DAYS', 0))
+
+    # Response cache: 'memory' is per process, 'redis' is shared across workers, 'null' disables it
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TTL = int(os.getenv('CACHE_DEFAULT_TTL', 30))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 10000))
+
+    # Outgoing mail, delivered by a background worker over a reused SMTP connection
+    SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
+    SMTP_PORT = int(os.getenv('SMTP_PORT', 587))
+    SMTP_USERNAME = os.getenv('SMTP_USERNAME')
+    SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
+    SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+    MAIL_QUEUE_SIZE = int(os.getenv('MAIL_QUEUE_SIZE', 1000))
+    MAIL_BATCH_SIZE = int(os.getenv('MAIL_BATCH_SIZE', 50))
+    MAIL_MAX_RETRIES = int(os.getenv('MAIL_MAX_RETRIES', 3))
+    MAIL_RETRY_BACKOFF = float(os.getenv('MAIL_RETRY_BACKOFF', 1.0))
+    MAIL_IDLE_TIMEOUT = int(os.getenv('MAIL_IDLE_TIMEOUT', 60))
+
+    # Email verification codes
+    OTP_TTL_MINUTES = int(os.getenv('OTP_TTL_MINUTES', 10))
+    OTP_MAX_ATTEMPTS = int(os.getenv('OTP_MAX_ATTEMPTS', 5))
+    OTP_SWEEP_BATCH_SIZE = int(os.getenv('OTP_SWEEP_BATCH_SIZE', 1000))
+
+    # Password hashing: werkzeug method string with its cost, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 0))  # 0 means one per CPU
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', 16))  # Waiting hashes before 503s
+
+    # Low-stock alerts: 'queue' keeps them in process for a consumer thread to get(), 'webhook' POSTs them, 'log' only logs
+    ALERT_BACKEND = os.getenv('ALERT_BACKEND', 'log')
+    ALERT_WEBHOOK_URL = os.getenv('ALERT_WEBHOOK_URL')
+    ALERT_QUEUE_SIZE = int(os.getenv('ALERT_QUEUE_SIZE', 10000))
+    ALERT_MAX_RETRIES = int(os.getenv('ALERT_MAX_RETRIES', 3))
+
+    # Sales forecasting over the daily rollups; results stay cached until the business records a sale
+    FORECAST_WINDOW_DAYS = int(os.getenv('FORECAST_WINDOW_DAYS', 28))
+    FORECAST_ALPHA = float(os.getenv('FORECAST_ALPHA', 0.3))
+    FORECAST_HORIZON_DAYS = int(os.getenv('FORECAST_HORIZON_DAYS', 7))
+    FORECAST_CACHE_TTL = int(os.getenv('FORECAST_CACHE_TTL', 3600))
+
+    # Request metrics served at /metrics, plus the slow-query log and N+1 detection
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+    N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 10))
+
+    # Bearer-token auth on every API resource, with verified claims and users cached in process
+    AUTH_REQUIRED = os.getenv('AUTH_REQUIRED', 'true').lower() == 'true'
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', SECRET_KEY)
+    AUTH_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_CACHE_MAX_ENTRIES', 10000))
+    AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 60))
+
+    # Load balancers in front of the app that append X-Forwarded-For/-Proto/-Host; 0 trusts none. Set it behind
+    # a proxy, or every client shares the proxy's address and with it one /auth rate-limit bucket.
+    PROXY_TRUSTED_HOPS = int(os.getenv('PROXY_TRUSTED_HOPS', 0))
+
+    # Token-bucket limits on /auth routes per client: 'memory' counts per worker process, so the effective limit
+    # is the configured one times the worker count; 'redis' enforces one shared limit; 'none' turns them off
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', CACHE_REDIS_URL)
+    RATE_LIMIT_AUTH_BURST = int(os.getenv('RATE_LIMIT_AUTH_BURST', 10))
+    RATE_LIMIT_AUTH_PER_MINUTE = float(os.getenv('RATE_LIMIT_AUTH_PER_MINUTE', 12))
+
+    # Stock ledger snapshots (`flask snapshot-stock`), taken this far in the past so in-flight writes are settled
+    STOCK_SNAPSHOT_LAG_SECONDS = int(os.getenv('STOCK_SNAPSHOT_LAG_SECONDS', 60))
+
+    # Idempotency-Key on write endpoints: how long a key replays its response, and the sweep batch size
+    IDEMPOTENCY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_TTL_HOURS', 24))
+    IDEMPOTENCY_SWEEP_BATCH_SIZE = int(os.getenv('IDEMPOTENCY_SWEEP_BATCH_SIZE', 1000))
+
+    # Bulk inventory import (/inventory/<business_id>/import): rows per upsert batch and transaction, errors reported
+    IMPORT_BATCH_ROWS = int(os.getenv('IMPORT_BATCH_ROWS', 5000))
+    IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', 100))
+
+    # Parquet / Arrow exports (/export/<business_id>/<table>): rows per row group, the unit of memory and of each flush
+    EXPORT_BATCH_ROWS = int(os.getenv('EXPORT_BATCH_ROWS', 65536))
+
+    # ASGI serving (asgi.py): threads the WSGI bridge gives routes that still run on Flask
+    ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 10))
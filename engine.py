@@ -0,0 +1,49 @@
+import sqlite3
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the 'replica' bind while a request is marked read-only.
+
+    Flushes always go to the primary, so a read-only request that ends up
+    writing still writes to the right database.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context() and g.get('use_replica'):
+            replica = self._db.engines.get('replica')
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def sqlite_pragmas(config):
+    """The PRAGMA statements every new SQLite connection runs, from the SQLITE_* settings."""
+    statements = [f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}"]
+    if config['SQLITE_JOURNAL_MODE']:
+        statements.append(f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}")
+    if config['SQLITE_SYNCHRONOUS']:
+        statements.append(f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}")
+    return statements
+
+
+def init_engine(app):
+    """Apply the SQLite connection pragmas and route GET requests to the read replica."""
+    pragmas = sqlite_pragmas(app.config)
+
+    @event.listens_for(Engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for statement in pragmas:
+            cursor.execute(statement)
+        cursor.close()
+
+    if 'replica' in app.config.get('SQLALCHEMY_BINDS', {}):
+        @app.before_request
+        def route_reads_to_replica():
+            g.use_replica = request.method in ('GET', 'HEAD')
@@ -0,0 +1,126 @@
+from sqlalchemy import DateTime, Integer, Numeric, select, type_coerce
+from sqlalchemy.types import NullType
+from models import db, Inventory, Sales
+from serializers import INVENTORY_FIELDS, SALES_FIELDS
+
+EXPORT_TABLES = {'sales': (Sales, SALES_FIELDS), 'inventory': (Inventory, INVENTORY_FIELDS)}
+EXPORT_FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+def arrow_schema(fields):
+    """Arrow schema for projected columns; Numeric stays exact as decimal128."""
+    import pyarrow as pa  # Imported on first export: slow to load and unused by every other route
+
+    def arrow_type(column_type):
+        if isinstance(column_type, Integer):
+            return pa.int64()
+        if isinstance(column_type, Numeric):
+            return pa.decimal128(column_type.precision, column_type.scale)
+        if isinstance(column_type, DateTime):
+            return pa.timestamp('us')
+        return pa.string()
+
+    return pa.schema([pa.field(field.key, arrow_type(field.type)) for field in fields])
+
+
+def export_query(table, business_id, start=None, end=None, inventory_id=None):
+    """The rows of one business to export and their fields.
+
+    Sales come in sold_at order and inventory in id order, each the order of
+    the business's index, so the database never sorts. `start`/`end` bound
+    sales by sold_at.
+    """
+    model, fields = EXPORT_TABLES[table]
+    # Raw driver values: Arrow converts whole columns far faster than per-value Decimal/datetime processing
+    stmt = select(*(type_coerce(field, NullType()).label(field.key) for field in fields)).where(
+        model.business_id == business_id
+    )
+    stmt = stmt.order_by(Sales.sold_at if table == 'sales' else Inventory.id)
+    if table == 'sales':
+        if start is not None:
+            stmt = stmt.where(Sales.sold_at >= start)
+        if end is not None:
+            stmt = stmt.where(Sales.sold_at < end)
+        if inventory_id is not None:
+            stmt = stmt.where(Sales.inventory_id == inventory_id)
+    elif inventory_id is not None:
+        stmt = stmt.where(Inventory.id == inventory_id)
+    return stmt, fields
+
+
+def column_array(column, arrow_type):
+    """Build one batch column from raw driver values and cast it to its export type."""
+    import pyarrow as pa
+
+    array = pa.array(column)
+    # Postgres returns Numeric as Decimal, but SQLite gives floats, or ints for whole numbers, which
+    # only cast to decimal128 by way of float64
+    if pa.types.is_decimal(arrow_type) and not pa.types.is_decimal(array.type):
+        array = array.cast(pa.float64())
+    return array.cast(arrow_type)
+
+
+class ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def export_chunks(stmt, fields, fmt, batch_rows):
+    """Encode an export query as Parquet or an Arrow IPC stream, yielding bytes as each batch is written.
+
+    Rows come from a server-side cursor `batch_rows` at a time and each batch
+    becomes one Parquet row group or IPC record batch, so memory stays
+    bounded by a single batch however many rows are exported.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(fields)
+    sink = ChunkSink()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    result = db.session.connection().execute(stmt.execution_options(stream_results=True))
+    try:
+        # The first batch also drains the rows SQLAlchemy read ahead; after that the columns carry no
+        # result processing, so the driver's own tuples skip building a Row per row
+        rows = result.fetchmany(batch_rows)
+        while rows:
+            columns = zip(*rows)
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [column_array(column, field.type) for column, field in zip(columns, schema)], schema=schema
+            ))
+            yield sink.drain()
+            rows = result.cursor.fetchmany(batch_rows)
+    finally:
+        result.close()
+    writer.close()
+    yield sink.drain()
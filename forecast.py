@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import select
+from models import db, Inventory, SalesRollup
+from rollups import truncate
+
+
+def smoothing_weights(days, alpha):
+    """Weights that reduce a day series to its simple exponential smoothing level.
+
+    Seeding the level with the first day and applying
+    level = alpha * units + (1 - alpha) * level for each later day is the same
+    as a dot product with these weights, so the recurrence never runs per item.
+    """
+    weights = alpha * (1 - alpha) ** np.arange(days - 1, -1, -1, dtype=np.float64)
+    weights[0] = (1 - alpha) ** (days - 1)
+    return weights
+
+
+def forecast_catalog(business_id, days, alpha, horizon, now=None):
+    """Sales velocity, smoothed daily forecast and days of cover for every item of a business.
+
+    Reads the last `days` whole days from the daily sales rollups, one column
+    query each for items and rollups, and computes every item at once on a
+    dense (items x days) array. Days of cover is None for items with no
+    forecast demand.
+    """
+    today = truncate(now or datetime.utcnow(), 'day')
+    start = today - timedelta(days=days)
+
+    # Core execution on the session's connection skips ORM row processing, which dominates at catalog scale
+    connection = db.session.connection()
+    items = connection.execute(
+        select(Inventory.id, Inventory.item_name, Inventory.quantity)
+        .where(Inventory.business_id == business_id)
+        .order_by(Inventory.id)
+    ).all()
+    if not items:
+        return []
+    item_ids, names, quantities = zip(*items)
+    item_ids = np.fromiter(item_ids, dtype=np.int64, count=len(items))
+    quantities = np.fromiter(quantities, dtype=np.float64, count=len(items))
+
+    units = np.zeros((len(items), days), dtype=np.float64)
+    rollups = connection.execute(
+        select(SalesRollup.inventory_id, SalesRollup.bucket_start, SalesRollup.units)
+        .where(
+            SalesRollup.business_id == business_id,
+            SalesRollup.granularity == 'day',
+            SalesRollup.bucket_start >= start,
+            SalesRollup.bucket_start < today
+        )
+    ).all()
+    if rollups:
+        rollup_items, buckets, rollup_units = zip(*rollups)
+        rollup_items = np.fromiter(rollup_items, dtype=np.int64, count=len(rollups))
+        day_index = np.fromiter((bucket.toordinal() for bucket in buckets), dtype=np.int64, count=len(rollups))
+        day_index -= start.toordinal()
+        # Rollups of deleted items have no row to land in
+        rows = np.searchsorted(item_ids, rollup_items).clip(max=len(items) - 1)
+        known = item_ids[rows] == rollup_items
+        units[rows[known], day_index[known]] = np.fromiter(rollup_units, dtype=np.float64, count=len(rollups))[known]
+
+    velocity = units.mean(axis=1)
+    level = units @ smoothing_weights(days, alpha)
+    cover = np.full(len(items), np.nan)
+    np.divide(quantities, level, out=cover, where=level > 0)
+
+    return [
+        {
+            'inventory_id': item_id,
+            'item_name': name,
+            'quantity': int(quantity),
+            'velocity': round(item_velocity, 3),
+            'forecast_daily': round(item_level, 3),
+            'forecast_units': round(item_level * horizon, 3),
+            'days_of_cover': None if item_cover != item_cover else round(item_cover, 1)
+        }
+        for item_id, name, quantity, item_velocity, item_level, item_cover in zip(
+            item_ids.tolist(), names, quantities.tolist(), velocity.tolist(), level.tolist(), cover.tolist()
+        )
+    ]
@@ -0,0 +1,36 @@
+"""Production launcher: gunicorn -c gunicorn.conf.py
+
+SERVER_MODE=wsgi (the default) runs app:app on threaded workers.
+SERVER_MODE=asgi runs asgi:app on uvicorn event-loop workers, which hold
+thousands of concurrent clients per worker while the list and insight reads
+wait on the database.
+"""
+import multiprocessing
+import os
+
+mode = os.getenv('SERVER_MODE', 'wsgi')
+cpus = multiprocessing.cpu_count()
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+if mode == 'asgi':
+    wsgi_app = 'asgi:app'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # One event loop per core is enough; more workers only add memory and connection pools
+    workers = int(os.getenv('WEB_CONCURRENCY', cpus))
+else:
+    wsgi_app = 'app:app'
+    worker_class = 'gthread'
+    workers = int(os.getenv('WEB_CONCURRENCY', cpus * 2 + 1))
+    threads = int(os.getenv('WEB_THREADS', 8))
+
+# Proxies whose X-Forwarded-* headers gunicorn and uvicorn honour; pair with PROXY_TRUSTED_HOPS for the app
+forwarded_allow_ips = os.getenv('FORWARDED_ALLOW_IPS', '127.0.0.1,::1')
+backlog = int(os.getenv('WEB_BACKLOG', 2048))
+timeout = int(os.getenv('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('WEB_KEEPALIVE', 5))
+# Recycle workers now and then so slow leaks cannot grow without bound
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv('WEB_ACCESS_LOG') or None
+errorlog = '-'
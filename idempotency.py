@@ -0,0 +1,114 @@
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, g, request
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from models import db, IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+keys = IdempotencyKey.__table__
+
+
+def request_fingerprint():
+    """Hash of the method, path and body, so a key cannot be reused for a different request."""
+    digest = hashlib.blake2b(f'{request.method} {request.path}\n'.encode(), digest_size=16)
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def find_key(client, key):
+    return db.session.execute(select(keys).where(keys.c.client == client, keys.c.key == key)).first()
+
+
+def claim_key(client, key, fingerprint, expired, now):
+    """Insert the key's row in the current transaction; False if another request holds it."""
+    try:
+        if expired is not None:
+            db.session.execute(delete(keys).where(keys.c.id == expired.id))
+        db.session.execute(insert(keys).values(
+            client=client, key=key, request_hash=fingerprint, created_at=now,
+            expires_at=now + timedelta(hours=current_app.config['IDEMPOTENCY_TTL_HOURS'])
+        ))
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
+
+
+def release_key(client, key):
+    """Drop an unfinished claim so the client can correct the request and retry with the same key."""
+    db.session.rollback()
+    db.session.execute(delete(keys).where(keys.c.client == client, keys.c.key == key, keys.c.status_code.is_(None)))
+    db.session.commit()
+
+
+def replay(entry, fingerprint):
+    if entry is None or entry.status_code is None:
+        return {'message': f'A request with this {HEADER} is still in progress'}, 409, {'Retry-After': '1'}
+    if entry.request_hash != fingerprint:
+        return {'message': f'{HEADER} was already used for a different request'}, 422
+    return current_app.response_class(
+        entry.response_body, status=entry.status_code, mimetype='application/json',
+        headers={'Idempotent-Replayed': 'true'}
+    )
+
+
+def idempotent(method):
+    """Make a Resource write safe to retry under the client's Idempotency-Key header.
+
+    The key's row is inserted before the write and commits with it, so a
+    concurrent duplicate waits on the unique (client, key) index and then
+    replays the stored response instead of writing again. Only 2xx
+    responses are kept; any other outcome releases the key.
+    """
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return method(*args, **kwargs)
+        if not 0 < len(key) <= 255:
+            return {'message': f'{HEADER} must be 1 to 255 characters'}, 400
+
+        user = g.get('current_user')
+        client = str(user['id']) if user else ''
+        fingerprint = request_fingerprint()
+        now = datetime.utcnow()
+
+        entry = find_key(client, key)
+        if entry is not None and entry.expires_at > now:
+            return replay(entry, fingerprint)
+        if not claim_key(client, key, fingerprint, entry, now):
+            return replay(find_key(client, key), fingerprint)
+
+        try:
+            response = current_app.make_response(method(*args, **kwargs))
+        except Exception:
+            release_key(client, key)
+            raise
+        if not 200 <= response.status_code < 300:
+            release_key(client, key)
+            return response
+
+        db.session.execute(
+            update(keys).where(keys.c.client == client, keys.c.key == key)
+            .values(status_code=response.status_code, response_body=response.get_data())
+        )
+        db.session.commit()
+        return response
+    return wrapper
+
+
+def sweep_expired_keys(batch_size=1000, now=None):
+    """Delete expired keys in batches along the expiry index; returns the number removed."""
+    now = now or datetime.utcnow()
+    removed = 0
+    while True:
+        ids = db.session.execute(
+            select(keys.c.id).where(keys.c.expires_at < now).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return removed
+        db.session.execute(delete(keys).where(keys.c.id.in_(ids)))
+        db.session.commit()
+        removed += len(ids)
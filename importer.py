@@ -0,0 +1,283 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Inventory, PriceHistory, StockMovement
+from pagination import NDJSON_MIMETYPE
+from sales import check_reorder_point
+from totals import apply_delta, to_money
+
+CSV_MIMETYPE = 'text/csv'
+IMPORT_FORMATS = (CSV_MIMETYPE, NDJSON_MIMETYPE)
+# 'set' makes a row's quantity the item's stock on hand; 'add' receives it on top
+IMPORT_MODES = ('set', 'add')
+IMPORT_KEY = ('business_id', 'item_name')
+# Columns an import may leave blank to keep what an existing item has
+OPTIONAL_FIELDS = ('description', 'reorder_point')
+
+
+def parse_records(stream, mimetype):
+    """Read an import body incrementally, yielding (line, record, error) for each item.
+
+    `stream` is a binary file object holding CSV with a header row or NDJSON;
+    `line` is 1-based. A record is a dict of raw values, or None with an error
+    message when its line cannot be parsed. Undecodable input ends the stream
+    with a final error.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        if mimetype == NDJSON_MIMETYPE:
+            for line, raw in enumerate(text, 1):
+                if not raw.strip():
+                    continue
+                try:
+                    yield line, json.loads(raw), None
+                except ValueError as e:
+                    yield line, None, f'Invalid JSON: {e}'
+            return
+
+        reader = csv.DictReader(text)
+        if reader.fieldnames is None or 'item_name' not in reader.fieldnames:
+            yield 1, None, 'CSV header must name an item_name column'
+            return
+        for data in reader:
+            if None in data:
+                yield reader.line_num, None, 'More values than header columns'
+            else:
+                yield reader.line_num, data, None
+    except (UnicodeDecodeError, csv.Error) as e:
+        yield None, None, f'Unreadable input: {e}'
+
+
+def parse_int(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(value)
+    return int(value)
+
+
+def validate_record(data):
+    """Validate one import record, returning the item row and an empty dict, or None and field errors.
+
+    Blank optional values come back as None, meaning "leave as is" for an
+    existing item; a price is only required for items the import creates.
+    """
+    if not isinstance(data, dict):
+        return None, {'item': 'Expected a JSON object'}
+
+    errors, row = {}, {}
+    name = data.get('item_name')
+    if not isinstance(name, str) or not name.strip():
+        errors['item_name'] = 'Missing required field'
+    elif len(name.strip()) > 100:
+        errors['item_name'] = 'At most 100 characters'
+    else:
+        row['item_name'] = name.strip()
+
+    for field, required in (('quantity', True), ('reorder_point', False)):
+        value = data.get(field)
+        if value is None or value == '':
+            if required:
+                errors[field] = 'Missing required field'
+            row[field] = None
+            continue
+        try:
+            row[field] = parse_int(value)
+        except ValueError:
+            errors[field] = 'Must be an integer'
+            continue
+        if row[field] < 0:
+            errors[field] = 'Must not be negative'
+
+    price = data.get('price_per_unit')
+    row['price_per_unit'] = None
+    if price is not None and price != '':
+        try:
+            row['price_per_unit'] = to_money(price)
+        except ValueError as e:
+            errors['price_per_unit'] = str(e)
+
+    description = data.get('description')
+    if description is not None and not isinstance(description, str):
+        errors['description'] = 'Must be a string'
+    row['description'] = description or None
+
+    if errors:
+        return None, errors
+    return row, {}
+
+
+def upsert_items(business_id, rows, mode):
+    """Insert or update items by (business_id, item_name) with the dialect's native upsert.
+
+    A blank description or reorder point keeps the stored value. Rows are
+    grouped by which of the two they give, so an update only touches the
+    columns it changes and leaves the search index alone unless the
+    description moved. In 'add' mode quantities are added to the stored
+    stock, so even an item created by a concurrent request since the batch
+    read it is restocked correctly.
+    """
+    table = Inventory.__table__
+    groups = defaultdict(list)
+    for row in rows:
+        given = tuple(field for field in OPTIONAL_FIELDS if row[field] is not None)
+        groups[given].append(dict(row, business_id=business_id))
+    dialect = db.session.get_bind().dialect.name
+
+    for given, group in groups.items():
+        if dialect in ('sqlite', 'postgresql'):
+            stmt = (sqlite.insert if dialect == 'sqlite' else postgresql.insert)(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(IMPORT_KEY),
+                set_=dict(
+                    {field: stmt.excluded[field] for field in given},
+                    quantity=stmt.excluded.quantity if mode == 'set' else table.c.quantity + stmt.excluded.quantity,
+                    price_per_unit=stmt.excluded.price_per_unit
+                )
+            )
+            db.session.execute(stmt, group)
+            continue
+
+        # Other dialects: update in place and insert the items that did not exist yet
+        for row in group:
+            result = db.session.execute(
+                update(table)
+                .where(table.c.business_id == business_id, table.c.item_name == row['item_name'])
+                .values(dict(
+                    {field: row[field] for field in given},
+                    quantity=row['quantity'] if mode == 'set' else table.c.quantity + row['quantity'],
+                    price_per_unit=row['price_per_unit']
+                ))
+            )
+            if not result.rowcount:
+                db.session.execute(table.insert(), row)
+
+
+def import_batch(business_id, batch, mode):
+    """Apply one batch of validated rows, keyed by item name, in the current transaction.
+
+    The batch's existing items are locked and read first, which decides what
+    is inserted, updated or unchanged and gives the old stock and price for
+    the ledger and the running inventory value. Returns those counts and the
+    (line, errors) of rows rejected for lacking a price on a new item.
+    """
+    existing = {
+        item.item_name: item for item in db.session.execute(
+            select(Inventory.id, Inventory.item_name, Inventory.quantity, Inventory.price_per_unit,
+                   Inventory.description, Inventory.reorder_point)
+            .where(Inventory.business_id == business_id, Inventory.item_name.in_(list(batch)))
+            .with_for_update()
+        )
+    }
+
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    rejected, writes, changes = [], [], []
+    for name, (line, row) in batch.items():
+        item = existing.get(name)
+        if item is None:
+            if row['price_per_unit'] is None:
+                rejected.append((line, {'price_per_unit': 'Required for a new item'}))
+                continue
+            counts['inserted'] += 1
+            writes.append(row)
+            continue
+
+        # The upsert writes the price as given, so a blank one carries the stored price
+        row = dict(row, price_per_unit=item.price_per_unit if row['price_per_unit'] is None else row['price_per_unit'])
+        quantity = row['quantity'] if mode == 'set' else item.quantity + row['quantity']
+        if (quantity, row['price_per_unit']) == (item.quantity, item.price_per_unit) and all(
+            row[field] in (None, getattr(item, field)) for field in OPTIONAL_FIELDS
+        ):
+            counts['unchanged'] += 1
+            continue
+        counts['updated'] += 1
+        writes.append(row)
+        changes.append((item, row, quantity))
+
+    if not writes:
+        return counts, rejected
+    upsert_items(business_id, writes, mode)
+
+    now = datetime.utcnow()
+    movements, prices, value = [], [], Decimal(0)
+    created = [row['item_name'] for row in writes if row['item_name'] not in existing]
+    if created:
+        ids = dict(db.session.execute(
+            select(Inventory.item_name, Inventory.id)
+            .where(Inventory.business_id == business_id, Inventory.item_name.in_(created))
+        ).all())
+        for name in created:
+            row = batch[name][1]
+            movements.append({'business_id': business_id, 'inventory_id': ids[name], 'kind': 'opening',
+                              'quantity': row['quantity'], 'unit_cost': row['price_per_unit'], 'occurred_at': now})
+            prices.append({'business_id': business_id, 'inventory_id': ids[name],
+                           'price_per_unit': row['price_per_unit'], 'effective_from': now})
+            value += row['quantity'] * row['price_per_unit']
+
+    for item, row, quantity in changes:
+        price = row['price_per_unit']
+        if quantity != item.quantity:
+            movements.append({'business_id': business_id, 'inventory_id': item.id,
+                              'kind': 'adjustment' if mode == 'set' else 'receipt',
+                              'quantity': quantity - item.quantity, 'unit_cost': price, 'occurred_at': now})
+        if price != item.price_per_unit:
+            prices.append({'business_id': business_id, 'inventory_id': item.id,
+                           'price_per_unit': price, 'effective_from': now})
+        value += quantity * price - item.quantity * item.price_per_unit
+        if quantity < item.quantity:
+            reorder_point = item.reorder_point if row['reorder_point'] is None else row['reorder_point']
+            check_reorder_point(business_id, item.id, quantity, reorder_point, item.quantity - quantity)
+
+    if movements:
+        db.session.execute(insert(StockMovement.__table__), movements)
+    if prices:
+        db.session.execute(insert(PriceHistory.__table__), prices)
+    apply_delta(business_id, inventory_value=value)
+    return counts, rejected
+
+
+def import_inventory(business_id, records, mode='set', batch_rows=5000, max_errors=100):
+    """Upsert a business's items from parsed records, committing every `batch_rows` rows.
+
+    Each batch is its own transaction, so memory stays bounded however large
+    the import and a failure keeps the batches before it. A name seen twice
+    ends the batch early, so later rows apply on top of earlier ones. Returns
+    counts of inserted, updated, unchanged and rejected rows with the first
+    `max_errors` errors.
+    """
+    summary = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'rejected': 0, 'errors': []}
+
+    def reject(line, errors):
+        summary['rejected'] += 1
+        if len(summary['errors']) < max_errors:
+            summary['errors'].append({'line': line, 'errors': errors})
+
+    def flush():
+        counts, rejected = import_batch(business_id, batch, mode)
+        db.session.commit()
+        for field, count in counts.items():
+            summary[field] += count
+        for line, errors in rejected:
+            reject(line, errors)
+        batch.clear()
+
+    batch = {}
+    for line, data, error in records:
+        if error is not None:
+            reject(line, {'body': error})
+            continue
+        row, errors = validate_record(data)
+        if errors:
+            reject(line, errors)
+            continue
+        if row['item_name'] in batch or len(batch) >= batch_rows:
+            flush()
+        batch[row['item_name']] = (line, row)
+    if batch:
+        flush()
+
+    summary['errors'].sort(key=lambda error: error['line'] or 0)
+    return summary
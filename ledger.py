@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import and_, func, insert, select, update
+from models import db, Business, Inventory, PriceHistory, StockMovement, StockSnapshot
+from totals import apply_delta, scope_businesses
+
+# Movements clients may post; opening balances and sales are recorded by the server
+MANUAL_KINDS = ('receipt', 'adjustment')
+# Lower bound for replaying a business that has no snapshot yet
+EPOCH = datetime(1970, 1, 1)
+
+
+def record_movement(business_id, inventory_id, kind, quantity, unit_cost, occurred_at=None):
+    """Append a stock movement inside the current transaction and return it as a dict.
+
+    Movements are stamped when the stock changed, not with a sale's `sold_at`,
+    so the ledger only ever grows forward in time and snapshots stay valid.
+    """
+    movement = {
+        'business_id': business_id,
+        'inventory_id': inventory_id,
+        'kind': kind,
+        'quantity': quantity,
+        'unit_cost': unit_cost,
+        'occurred_at': occurred_at or datetime.utcnow()
+    }
+    db.session.execute(insert(StockMovement.__table__), movement)
+    return movement
+
+
+def record_price(business_id, inventory_id, price, effective_from=None):
+    entry = {
+        'business_id': business_id,
+        'inventory_id': inventory_id,
+        'price_per_unit': price,
+        'effective_from': effective_from or datetime.utcnow()
+    }
+    db.session.execute(insert(PriceHistory.__table__), entry)
+    return entry
+
+
+def set_price(inventory_id, price):
+    """Change an item's price from now on, keeping the old one in its history.
+
+    The stock on hand is revalued in the running totals; past sales keep the
+    unit cost they were recorded with. Returns the history entry, or None if
+    the item does not exist.
+    """
+    item = db.session.execute(
+        select(Inventory.business_id, Inventory.quantity, Inventory.price_per_unit)
+        .where(Inventory.id == inventory_id)
+        .with_for_update()
+    ).first()
+    if item is None:
+        return None
+
+    business_id, quantity, old_price = item
+    db.session.execute(
+        update(Inventory).where(Inventory.id == inventory_id).values(price_per_unit=price)
+        .execution_options(synchronize_session=False)
+    )
+    apply_delta(business_id, inventory_value=quantity * (price - old_price))
+    return record_price(business_id, inventory_id, price)
+
+
+def snapshot_times(as_of, business_ids=None, id_range=None):
+    """Subquery of each business's latest snapshot time at or before `as_of`, or the epoch if none."""
+    taken_at = select(func.max(StockSnapshot.taken_at)).where(
+        StockSnapshot.business_id == Business.id, StockSnapshot.taken_at <= as_of
+    ).scalar_subquery()
+    return scope_businesses(
+        select(Business.id.label('business_id'), func.coalesce(taken_at, EPOCH).label('taken_at')),
+        Business.id, business_ids, id_range
+    ).subquery()
+
+
+def stock_levels(as_of, business_ids=None, id_range=None):
+    """Each item's units on hand at `as_of`: its business's nearest snapshot plus the movements since.
+
+    Returns {inventory_id: (business_id, quantity)} and the ids of the
+    businesses whose stock moved after that snapshot. Both reads are index
+    range scans, so the cost is bounded by the snapshot interval rather than
+    the length of the history.
+    """
+    latest = snapshot_times(as_of, business_ids, id_range)
+    levels = {}
+    snapshots = select(StockSnapshot.inventory_id, StockSnapshot.business_id, StockSnapshot.quantity).join(
+        latest, and_(StockSnapshot.business_id == latest.c.business_id, StockSnapshot.taken_at == latest.c.taken_at)
+    )
+    for inventory_id, business_id, quantity in db.session.execute(snapshots):
+        levels[inventory_id] = (business_id, quantity)
+
+    replay = (
+        select(StockMovement.inventory_id, StockMovement.business_id, func.sum(StockMovement.quantity))
+        .join(latest, StockMovement.business_id == latest.c.business_id)
+        .where(StockMovement.occurred_at > latest.c.taken_at, StockMovement.occurred_at <= as_of)
+        .group_by(StockMovement.inventory_id, StockMovement.business_id)
+    )
+    moved = set()
+    for inventory_id, business_id, change in db.session.execute(replay):
+        levels[inventory_id] = (business_id, levels.get(inventory_id, (business_id, 0))[1] + change)
+        moved.add(business_id)
+    return levels, moved
+
+
+def prices_as_of(as_of, business_ids=None):
+    """Each item's price at `as_of`, from its price history."""
+    latest = scope_businesses(
+        select(PriceHistory.inventory_id, func.max(PriceHistory.effective_from).label('effective_from'))
+        .where(PriceHistory.effective_from <= as_of)
+        .group_by(PriceHistory.inventory_id),
+        PriceHistory.business_id, business_ids
+    ).subquery()
+    stmt = select(PriceHistory.inventory_id, PriceHistory.price_per_unit).join(latest, and_(
+        PriceHistory.inventory_id == latest.c.inventory_id, PriceHistory.effective_from == latest.c.effective_from
+    ))
+    return dict(db.session.execute(stmt).all())
+
+
+def inventory_value_as_of(business_id, as_of):
+    """What a business's stock was worth at `as_of`, at the prices in effect then.
+
+    History starts at each item's opening movement; earlier moments value it at zero.
+    """
+    levels, _ = stock_levels(as_of, [business_id])
+    prices = prices_as_of(as_of, [business_id])
+    return sum(
+        (quantity * prices.get(inventory_id, Decimal(0)) for inventory_id, (_, quantity) in levels.items()),
+        Decimal(0)
+    )
+
+
+def take_stock_snapshots(business_ids=None, lag_seconds=60, id_range=None, now=None):
+    """Snapshot the stock of every business whose stock moved since its last snapshot.
+
+    A snapshot holds every item of the business with stock at that moment;
+    items missing from it had none. Levels come from the ledger, not the
+    inventory table, and are taken `lag_seconds` in the past so writes still
+    in flight when the job runs are not left out of both a snapshot and the
+    replay after it. Returns the number of rows written.
+    """
+    taken_at = (now or datetime.utcnow()) - timedelta(seconds=lag_seconds)
+    levels, moved = stock_levels(taken_at, business_ids, id_range)
+    rows = [
+        {'business_id': business_id, 'inventory_id': inventory_id, 'taken_at': taken_at, 'quantity': quantity}
+        for inventory_id, (business_id, quantity) in levels.items() if business_id in moved and quantity
+    ]
+    if rows:
+        db.session.execute(insert(StockSnapshot.__table__), rows)
+    return len(rows)
@@ -0,0 +1,142 @@
+import os
+import queue
+import smtplib
+import threading
+import time
+
+_STOP = object()
+
+
+class Mailer:
+    """Deliver email from a background thread over one long-lived SMTP connection.
+
+    Messages are queued by `send()` and return immediately; the worker drains
+    the queue in batches, reuses its authenticated connection across messages,
+    reconnects when the server drops it and retries failed deliveries with
+    exponential backoff.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True, queue_size=1000,
+                 batch_size=50, max_retries=3, retry_backoff=1.0, idle_timeout=60, timeout=10, logger=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.logger = logger
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._smtp = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        """Queue a message for delivery; False if the queue is full."""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            self._log('error', f"Mail queue full, dropping message to {message['To']}")
+            return False
+
+    def stop(self, timeout=None):
+        """Deliver what is already queued, then close the connection and stop the worker."""
+        if self._thread is None:
+            return
+        self.queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _ensure_started(self):
+        # Also restarts after a fork, where the parent's worker thread does not exist
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._smtp = None
+                self._thread = threading.Thread(target=self._run, name='mailer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                message = self.queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self._disconnect()
+                continue
+
+            batch = [message]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for message in batch:
+                if message is _STOP:
+                    self._disconnect()
+                    return
+                self._deliver(message)
+
+    def _deliver(self, message):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self._connection().send_message(message)
+                self._log('info', f"Mail sent to {message['To']}")
+                return
+            except smtplib.SMTPRecipientsRefused as e:
+                self._log('error', f"Mail to {message['To']} refused: {e}")
+                return
+            except (smtplib.SMTPException, OSError) as e:
+                self._disconnect()
+                if attempt == self.max_retries:
+                    self._log('error', f"Failed to send mail to {message['To']} after {attempt} attempts: {e}")
+                    return
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+    def _connection(self):
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            self._smtp = smtp
+        return self._smtp
+
+    def _disconnect(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._smtp = None
+
+    def _log(self, level, text):
+        if self.logger is not None:
+            getattr(self.logger, level)(text)
+
+
+def init_mailer(app):
+    """Create the app's background mailer from the SMTP_* and MAIL_* settings."""
+    mailer = Mailer(
+        app.config['SMTP_SERVER'],
+        app.config['SMTP_PORT'],
+        username=app.config['SMTP_USERNAME'],
+        password=app.config['SMTP_PASSWORD'],
+        use_tls=app.config['SMTP_USE_TLS'],
+        queue_size=app.config['MAIL_QUEUE_SIZE'],
+        batch_size=app.config['MAIL_BATCH_SIZE'],
+        max_retries=app.config['MAIL_MAX_RETRIES'],
+        retry_backoff=app.config['MAIL_RETRY_BACKOFF'],
+        idle_timeout=app.config['MAIL_IDLE_TIMEOUT'],
+        logger=app.logger
+    )
+    app.extensions['mailer'] = mailer
+    return mailer
@@ -0,0 +1,168 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f'{self.name}{{{format_labels(self.labels, label_values)}}} {value}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(label_values)
+            if series is None:
+                # One count per bucket plus +Inf, then the running sum
+                series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = sorted((label_values, list(series)) for label_values, series in self.series.items())
+        for label_values, series in snapshot:
+            labels = format_labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {series[-1]}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+def format_labels(names, values):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for value in values)
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+REQUESTS = Counter('http_requests_total', 'Requests handled.', ('endpoint', 'method', 'status'))
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Time spent handling a request.', ('endpoint', 'method', 'status'), LATENCY_BUCKETS
+)
+DB_SECONDS = Histogram('http_request_db_seconds', 'Database time per request.', ('endpoint',), LATENCY_BUCKETS)
+DB_QUERIES = Histogram('http_request_db_queries', 'Statements executed per request.', ('endpoint',), QUERY_COUNT_BUCKETS)
+SERIALIZE_SECONDS = Histogram(
+    'http_request_serialize_seconds', 'JSON encoding time per request.', ('endpoint',), LATENCY_BUCKETS
+)
+SLOW_QUERIES = Counter('db_slow_queries_total', 'Statements slower than SLOW_QUERY_MS.', ('endpoint',))
+N_PLUS_ONE = Counter('db_n_plus_one_total', 'Requests repeating one statement past N_PLUS_ONE_THRESHOLD.', ('endpoint',))
+METRICS = (REQUESTS, REQUEST_SECONDS, DB_SECONDS, DB_QUERIES, SERIALIZE_SECONDS, SLOW_QUERIES, N_PLUS_ONE)
+
+
+def request_stats():
+    """The timing record of the current request, or None outside one or with metrics disabled."""
+    return g.get('request_stats') if has_request_context() else None
+
+
+def add_serialize_time(seconds):
+    stats = request_stats()
+    if stats is not None:
+        stats['serialize'] += seconds
+
+
+def render():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app):
+    """Time every request and statement, log slow queries and flag N+1 patterns.
+
+    Per-request numbers accumulate on `g` and are folded into the histograms
+    once in after_request; the cursor hooks only do a clock read and a dict
+    update. Metrics live in process memory, so each worker reports its own.
+    """
+    if not app.config['METRICS_ENABLED']:
+        return
+    slow_query_seconds = app.config['SLOW_QUERY_MS'] / 1000
+    n_plus_one_threshold = app.config['N_PLUS_ONE_THRESHOLD']
+    logger = app.logger
+
+    @app.before_request
+    def start_request_stats():
+        g.request_stats = {
+            'started': time.perf_counter(), 'db': 0.0, 'queries': 0, 'serialize': 0.0, 'statements': {}
+        }
+
+    @app.after_request
+    def record_request_stats(response):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        status = str(response.status_code)
+        REQUESTS.inc((endpoint, request.method, status))
+        REQUEST_SECONDS.observe((endpoint, request.method, status), time.perf_counter() - stats['started'])
+        DB_SECONDS.observe((endpoint,), stats['db'])
+        DB_QUERIES.observe((endpoint,), stats['queries'])
+        SERIALIZE_SECONDS.observe((endpoint,), stats['serialize'])
+
+        repeated = [(statement, count) for statement, count in stats['statements'].items() if count >= n_plus_one_threshold]
+        if repeated:
+            N_PLUS_ONE.inc((endpoint,))
+            for statement, count in repeated:
+                logger.warning(f"Possible N+1 in {endpoint}: {count} executions of {statement}")
+        return response
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        # On the execution context, not a stack in conn.info: a statement that raises never
+        # reaches after_cursor_execute, and its start would pair with the next statement's end
+        context.query_started = time.perf_counter()
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context.query_started
+        stats = request_stats()
+        if stats is not None:
+            stats['db'] += elapsed
+            stats['queries'] += 1
+            # Lazy relationship loads repeat one compiled statement with new parameters
+            if not executemany and statement.lstrip()[:6].upper() == 'SELECT':
+                stats['statements'][statement] = stats['statements'].get(statement, 0) + 1
+        # Batched executemany writes are long by design and would drown out real slow queries
+        if elapsed >= slow_query_seconds and not executemany:
+            endpoint = request.endpoint if has_request_context() else None
+            SLOW_QUERIES.inc((endpoint or 'none',))
+            logger.warning(f"Slow query ({elapsed * 1000:.0f} ms) in {endpoint or 'no request'}: "
+                           f"{statement} {str(parameters)[:500]}")
+
+    app.add_url_rule('/metrics', 'metrics', lambda: Response(render(), mimetype=PROMETHEUS_MIMETYPE))
@@ -51,6 +51,20 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_name(name, type_, parent_names):
+    """Leave the search index objects search.py creates with raw DDL out of autogenerate.
+
+    They are not in the models' metadata, so autogenerate and `flask db check`
+    would otherwise see them as removed: the FTS5 table and its shadow tables
+    on SQLite, the GIN indexes on Postgres.
+    """
+    if type_ == 'table':
+        return not name.startswith('inventory_fts')
+    if type_ == 'index':
+        return name not in ('ix_inventory_search_document', 'ix_inventory_item_name_trgm')
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +79,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_name=include_name
     )
 
     with context.begin_transaction():
@@ -100,6 +115,7 @@ def run_migrations_online():
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
+            include_name=include_name,
             **conf_args
         )
 
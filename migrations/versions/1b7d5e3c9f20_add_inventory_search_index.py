@@ -0,0 +1,64 @@
+"""add inventory search index
+
+Revision ID: 1b7d5e3c9f20
+Revises: f42a9c1e7d63
+Create Date: 2024-12-27 11:08:51.274390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b7d5e3c9f20'
+down_revision = 'f42a9c1e7d63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE inventory_fts USING fts5("
+            "item_name, description, content='inventory', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(
+            "CREATE TRIGGER inventory_fts_insert AFTER INSERT ON inventory BEGIN "
+            "INSERT INTO inventory_fts(rowid, item_name, description) "
+            "VALUES (new.id, new.item_name, new.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER inventory_fts_delete AFTER DELETE ON inventory BEGIN "
+            "INSERT INTO inventory_fts(inventory_fts, rowid, item_name, description) "
+            "VALUES ('delete', old.id, old.item_name, old.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER inventory_fts_update AFTER UPDATE OF item_name, description "
+            "ON inventory BEGIN "
+            "INSERT INTO inventory_fts(inventory_fts, rowid, item_name, description) "
+            "VALUES ('delete', old.id, old.item_name, old.description); "
+            "INSERT INTO inventory_fts(rowid, item_name, description) "
+            "VALUES (new.id, new.item_name, new.description); END"
+        )
+        op.execute("INSERT INTO inventory_fts(inventory_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX ix_inventory_search_document ON inventory USING gin "
+            "(to_tsvector('simple', coalesce(item_name, '') || ' ' || coalesce(description, '')))"
+        )
+        op.execute("CREATE INDEX ix_inventory_item_name_trgm ON inventory USING gin (lower(item_name) gin_trgm_ops)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER inventory_fts_update")
+        op.execute("DROP TRIGGER inventory_fts_delete")
+        op.execute("DROP TRIGGER inventory_fts_insert")
+        op.execute("DROP TABLE inventory_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX ix_inventory_item_name_trgm")
+        op.execute("DROP INDEX ix_inventory_search_document")
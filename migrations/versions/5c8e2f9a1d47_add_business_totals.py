@@ -0,0 +1,47 @@
+"""add business totals
+
+Revision ID: 5c8e2f9a1d47
+Revises: 23b11e7139ef
+Create Date: 2024-12-18 09:14:02.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c8e2f9a1d47'
+down_revision = '23b11e7139ef'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('business_totals',
+    sa.Column('business_id', sa.Integer(), nullable=False),
+    sa.Column('total_revenue', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('total_cogs', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('inventory_value', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['business.id'], name=op.f('fk_business_totals_business_id_business')),
+    sa.PrimaryKeyConstraint('business_id', name=op.f('pk_business_totals'))
+    )
+
+    # Backfill from existing history; `flask reconcile-totals` does the same at runtime.
+    op.execute("""
+        INSERT INTO business_totals (business_id, total_revenue, total_cogs, inventory_value, transaction_count, updated_at)
+        SELECT b.id,
+               COALESCE((SELECT SUM(s.total_price) FROM sales s WHERE s.business_id = b.id), 0),
+               COALESCE((SELECT SUM(s.quantity_sold * i.price_per_unit)
+                         FROM sales s JOIN inventory i ON s.inventory_id = i.id
+                         WHERE s.business_id = b.id), 0),
+               COALESCE((SELECT SUM(i.quantity * i.price_per_unit) FROM inventory i WHERE i.business_id = b.id), 0),
+               (SELECT COUNT(s.id) FROM sales s WHERE s.business_id = b.id),
+               CURRENT_TIMESTAMP
+        FROM business b
+    """)
+
+
+def downgrade():
+    op.drop_table('business_totals')
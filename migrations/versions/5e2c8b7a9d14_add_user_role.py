@@ -0,0 +1,26 @@
+"""add user role
+
+Revision ID: 5e2c8b7a9d14
+Revises: 1b7d5e3c9f20
+Create Date: 2025-01-06 10:21:44.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2c8b7a9d14'
+down_revision = '1b7d5e3c9f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('role', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('role')
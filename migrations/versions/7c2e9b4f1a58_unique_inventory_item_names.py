@@ -0,0 +1,34 @@
+"""unique inventory item names
+
+Revision ID: 7c2e9b4f1a58
+Revises: 4f8b2d6e0a13
+Create Date: 2025-01-16 11:08:44.219537
+
+Bulk imports match items by name within a business. Where a business already
+has two items of the same name, every one but the oldest gets its id appended
+so the names are distinct; downgrading keeps those names.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9b4f1a58'
+down_revision = '4f8b2d6e0a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        UPDATE inventory SET item_name = substr(item_name, 1, 80) || ' (' || id || ')'
+        WHERE id NOT IN (SELECT min(id) FROM inventory GROUP BY business_id, item_name)
+    """)
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.create_index('uq_inventory_business_id_item_name', ['business_id', 'item_name'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.drop_index('uq_inventory_business_id_item_name')
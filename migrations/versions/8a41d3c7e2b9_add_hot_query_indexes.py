@@ -0,0 +1,40 @@
+"""add hot query indexes
+
+Revision ID: 8a41d3c7e2b9
+Revises: 5c8e2f9a1d47
+Create Date: 2024-12-18 15:42:37.603112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a41d3c7e2b9'
+down_revision = '5c8e2f9a1d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.create_index('ix_sales_business_id_sold_at', ['business_id', 'sold_at'], unique=False)
+        batch_op.create_index('ix_sales_inventory_id', ['inventory_id'], unique=False)
+
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.create_index('ix_inventory_business_id', ['business_id'], unique=False)
+
+    with op.batch_alter_table('insights', schema=None) as batch_op:
+        batch_op.create_index('ix_insights_business_id_metric_recorded_at', ['business_id', 'metric', 'recorded_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('insights', schema=None) as batch_op:
+        batch_op.drop_index('ix_insights_business_id_metric_recorded_at')
+
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.drop_index('ix_inventory_business_id')
+
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_index('ix_sales_inventory_id')
+        batch_op.drop_index('ix_sales_business_id_sold_at')
@@ -0,0 +1,101 @@
+"""add stock ledger
+
+Revision ID: 9d3a6f1c2b87
+Revises: 5e2c8b7a9d14
+Create Date: 2025-01-09 14:37:12.604118
+
+Every existing item gets an opening movement for its current stock and a
+price history entry from its creation; existing sales are costed at today's
+prices, the best record there is of what they cost.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3a6f1c2b87'
+down_revision = '5e2c8b7a9d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_movements',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('business_id', sa.Integer(), nullable=False),
+    sa.Column('inventory_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_cost', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['business.id'], name=op.f('fk_stock_movements_business_id_business')),
+    sa.ForeignKeyConstraint(['inventory_id'], ['inventory.id'], name=op.f('fk_stock_movements_inventory_id_inventory')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_stock_movements'))
+    )
+    with op.batch_alter_table('stock_movements', schema=None) as batch_op:
+        batch_op.create_index('ix_stock_movements_inventory_id_occurred_at', ['inventory_id', 'occurred_at'], unique=False)
+        batch_op.create_index('ix_stock_movements_business_id_occurred_at', ['business_id', 'occurred_at'], unique=False)
+
+    op.create_table('stock_snapshots',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('business_id', sa.Integer(), nullable=False),
+    sa.Column('inventory_id', sa.Integer(), nullable=False),
+    sa.Column('taken_at', sa.DateTime(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['business.id'], name=op.f('fk_stock_snapshots_business_id_business')),
+    sa.ForeignKeyConstraint(['inventory_id'], ['inventory.id'], name=op.f('fk_stock_snapshots_inventory_id_inventory')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_stock_snapshots')),
+    sa.UniqueConstraint('inventory_id', 'taken_at', name='uq_stock_snapshots_item_taken_at')
+    )
+    with op.batch_alter_table('stock_snapshots', schema=None) as batch_op:
+        batch_op.create_index('ix_stock_snapshots_business_id_taken_at', ['business_id', 'taken_at'], unique=False)
+
+    op.create_table('price_history',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('business_id', sa.Integer(), nullable=False),
+    sa.Column('inventory_id', sa.Integer(), nullable=False),
+    sa.Column('price_per_unit', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('effective_from', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['business.id'], name=op.f('fk_price_history_business_id_business')),
+    sa.ForeignKeyConstraint(['inventory_id'], ['inventory.id'], name=op.f('fk_price_history_inventory_id_inventory')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_price_history'))
+    )
+    with op.batch_alter_table('price_history', schema=None) as batch_op:
+        batch_op.create_index('ix_price_history_inventory_id_effective_from', ['inventory_id', 'effective_from'], unique=False)
+        batch_op.create_index('ix_price_history_business_id', ['business_id'], unique=False)
+
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unit_cost', sa.Numeric(precision=10, scale=2), nullable=True))
+
+    op.execute("""
+        INSERT INTO stock_movements (business_id, inventory_id, kind, quantity, unit_cost, occurred_at)
+        SELECT business_id, id, 'opening', quantity, price_per_unit, CURRENT_TIMESTAMP FROM inventory
+    """)
+    op.execute("""
+        INSERT INTO price_history (business_id, inventory_id, price_per_unit, effective_from)
+        SELECT business_id, id, price_per_unit, COALESCE(created_at, CURRENT_TIMESTAMP) FROM inventory
+    """)
+    op.execute("""
+        UPDATE sales SET unit_cost = (SELECT i.price_per_unit FROM inventory i WHERE i.id = sales.inventory_id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_column('unit_cost')
+
+    with op.batch_alter_table('price_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_price_history_business_id')
+        batch_op.drop_index('ix_price_history_inventory_id_effective_from')
+
+    op.drop_table('price_history')
+    with op.batch_alter_table('stock_snapshots', schema=None) as batch_op:
+        batch_op.drop_index('ix_stock_snapshots_business_id_taken_at')
+
+    op.drop_table('stock_snapshots')
+    with op.batch_alter_table('stock_movements', schema=None) as batch_op:
+        batch_op.drop_index('ix_stock_movements_business_id_occurred_at')
+        batch_op.drop_index('ix_stock_movements_inventory_id_occurred_at')
+
+    op.drop_table('stock_movements')
@@ -0,0 +1,45 @@
+"""add sales rollups
+
+Revision ID: c3f7a2e81b05
+Revises: 8a41d3c7e2b9
+Create Date: 2024-12-20 11:03:48.275190
+
+Existing sales are rolled up with `flask rebuild-rollups` after upgrading.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f7a2e81b05'
+down_revision = '8a41d3c7e2b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_rollups',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('business_id', sa.Integer(), nullable=False),
+    sa.Column('inventory_id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('cogs', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('transactions', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['business.id'], name=op.f('fk_sales_rollups_business_id_business')),
+    sa.ForeignKeyConstraint(['inventory_id'], ['inventory.id'], name=op.f('fk_sales_rollups_inventory_id_inventory')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_sales_rollups')),
+    sa.UniqueConstraint('business_id', 'inventory_id', 'granularity', 'bucket_start', name='uq_sales_rollups_bucket')
+    )
+    with op.batch_alter_table('sales_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_sales_rollups_business_id_granularity_bucket_start', ['business_id', 'granularity', 'bucket_start'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sales_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_sales_rollups_business_id_granularity_bucket_start')
+
+    op.drop_table('sales_rollups')
@@ -0,0 +1,40 @@
+"""add one time passwords
+
+Revision ID: e91b4d0c6a38
+Revises: c3f7a2e81b05
+Create Date: 2024-12-23 10:27:55.841620
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91b4d0c6a38'
+down_revision = 'c3f7a2e81b05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('one_time_passwords',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('code_hash', sa.String(length=64), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], name=op.f('fk_one_time_passwords_user_id_user')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_one_time_passwords')),
+    sa.UniqueConstraint('code_hash', name=op.f('uq_one_time_passwords_code_hash')),
+    sa.UniqueConstraint('user_id', name=op.f('uq_one_time_passwords_user_id'))
+    )
+    with op.batch_alter_table('one_time_passwords', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_one_time_passwords_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('one_time_passwords', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_one_time_passwords_expires_at'))
+
+    op.drop_table('one_time_passwords')
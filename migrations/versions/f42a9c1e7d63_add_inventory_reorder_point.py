@@ -0,0 +1,34 @@
+"""add inventory reorder point
+
+Revision ID: f42a9c1e7d63
+Revises: e91b4d0c6a38
+Create Date: 2025-01-06 14:18:09.532847
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f42a9c1e7d63'
+down_revision = 'e91b4d0c6a38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reorder_point', sa.Integer(), nullable=True))
+
+    op.create_index(
+        'ix_inventory_low_stock', 'inventory', ['business_id'], unique=False,
+        sqlite_where=sa.text('quantity <= reorder_point'),
+        postgresql_where=sa.text('quantity <= reorder_point')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_inventory_low_stock', table_name='inventory')
+
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.drop_column('reorder_point')
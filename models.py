@@ -1,8 +1,8 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from marshmallow import Schema, fields
-from sqlalchemy import MetaData
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import MetaData, text
+from engine import RoutingSession
+from passwords import get_hasher
 
 convention = {
     "ix": "ix_%(column_0_label)s",
@@ -13,36 +13,7 @@ convention = {
 }
 
 metadata = MetaData(naming_convention=convention)
-db = SQLAlchemy(metadata=metadata)
-
-
-# Marshmallow Schemas
-class UserSchema(Schema):
-    id = fields.Int()
-    username = fields.Str()
-    email = fields.Str()
-
-class BusinessSchema(Schema):
-    id = fields.Int()
-    name = fields.Str()
-    user_id = fields.Int()
-
-class InventorySchema(Schema):
-    id = fields.Int()
-    item_name = fields.Str()
-    description = fields.Str()
-    quantity = fields.Int()
-    price_per_unit = fields.Decimal()
-
-class SalesSchema(Schema):
-    id = fields.Int()
-    quantity_sold = fields.Int()
-    total_price = fields.Decimal()
-
-class InsightsSchema(Schema):
-    id = fields.Int()
-    metric = fields.Str()
-    value = fields.Decimal()
+db = SQLAlchemy(metadata=metadata, session_options={'class_': RoutingSession})
 
 
 class User(db.Model):
@@ -53,16 +24,17 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
+    role = db.Column(db.String(20), nullable=True)
 
     businesses = db.relationship('Business', back_populates='owner', lazy=True)
 
     def set_password(self, password):
         """Hash the password before storing it."""
-        self.password = generate_password_hash(password)
+        self.password = get_hasher().hash(password)
 
     def check_password(self, password):
         """Check if the provided password matches the stored hash."""
-        return check_password_hash(self.password, password)
+        return get_hasher().verify(self.password, password)
 
 class Business(db.Model):
     __tablename__ = 'business'
@@ -77,10 +49,22 @@ class Business(db.Model):
     inventory_items = db.relationship('Inventory', back_populates='business', lazy=True)
     sales_records = db.relationship('Sales', back_populates='business', lazy=True)
     insights = db.relationship('Insights', back_populates='business', lazy=True)  # Add this line
+    totals = db.relationship('BusinessTotals', back_populates='business', uselist=False, lazy=True)
 
 
 class Inventory(db.Model):
     __tablename__ = 'inventory'
+    __table_args__ = (
+        db.Index('ix_inventory_business_id', 'business_id'),
+        # Item names are unique per business; bulk imports upsert on them
+        db.Index('uq_inventory_business_id_item_name', 'business_id', 'item_name', unique=True),
+        # Partial index: only items at or below their reorder point are indexed
+        db.Index(
+            'ix_inventory_low_stock', 'business_id',
+            sqlite_where=text('quantity <= reorder_point'),
+            postgresql_where=text('quantity <= reorder_point')
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -89,12 +73,17 @@ class Inventory(db.Model):
     description = db.Column(db.Text, nullable=True)
     quantity = db.Column(db.Integer, nullable=False)
     price_per_unit = db.Column(db.Numeric(10, 2), nullable=False)
+    reorder_point = db.Column(db.Integer, nullable=True)
 
     business = db.relationship('Business', back_populates='inventory_items')
     sales_records = db.relationship('Sales', back_populates='inventory_item', lazy=True)
 
 class Sales(db.Model):
     __tablename__ = 'sales'
+    __table_args__ = (
+        db.Index('ix_sales_business_id_sold_at', 'business_id', 'sold_at'),
+        db.Index('ix_sales_inventory_id', 'inventory_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -102,6 +91,8 @@ class Sales(db.Model):
     inventory_id = db.Column(db.Integer, db.ForeignKey('inventory.id'), nullable=False)
     quantity_sold = db.Column(db.Integer, nullable=False)
     total_price = db.Column(db.Numeric(10, 2), nullable=False)
+    # Cost per unit when sold, so later price changes do not rewrite past COGS
+    unit_cost = db.Column(db.Numeric(10, 2), nullable=True)
     sold_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     business = db.relationship('Business', back_populates='sales_records')
@@ -109,6 +100,9 @@ class Sales(db.Model):
 
 class Insights(db.Model):
     __tablename__ = 'insights'
+    __table_args__ = (
+        db.Index('ix_insights_business_id_metric_recorded_at', 'business_id', 'metric', 'recorded_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -118,3 +112,109 @@ class Insights(db.Model):
     recorded_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     business = db.relationship('Business', back_populates='insights')  # This is fine
+
+class BusinessTotals(db.Model):
+    """Running per-business totals, kept in step with every sale and inventory write."""
+    __tablename__ = 'business_totals'
+
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id'), primary_key=True)
+    total_revenue = db.Column(db.Numeric(18, 2), nullable=False, default=0)
+    total_cogs = db.Column(db.Numeric(18, 2), nullable=False, default=0)
+    inventory_value = db.Column(db.Numeric(18, 2), nullable=False, default=0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    business = db.relationship('Business', back_populates='totals')
+
+class SalesRollup(db.Model):
+    """Pre-aggregated sales per item and hour or day bucket, maintained on every sale."""
+    __tablename__ = 'sales_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('business_id', 'inventory_id', 'granularity', 'bucket_start', name='uq_sales_rollups_bucket'),
+        db.Index('ix_sales_rollups_business_id_granularity_bucket_start', 'business_id', 'granularity', 'bucket_start'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id'), nullable=False)
+    inventory_id = db.Column(db.Integer, db.ForeignKey('inventory.id'), nullable=False)
+    granularity = db.Column(db.String(10), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(18, 2), nullable=False, default=0)
+    cogs = db.Column(db.Numeric(18, 2), nullable=False, default=0)
+    transactions = db.Column(db.Integer, nullable=False, default=0)
+
+class StockMovement(db.Model):
+    """Append-only ledger of every change to an item's stock: opening balance, receipts, sales and adjustments."""
+    __tablename__ = 'stock_movements'
+    __table_args__ = (
+        db.Index('ix_stock_movements_inventory_id_occurred_at', 'inventory_id', 'occurred_at'),
+        db.Index('ix_stock_movements_business_id_occurred_at', 'business_id', 'occurred_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id'), nullable=False)
+    inventory_id = db.Column(db.Integer, db.ForeignKey('inventory.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)  # Signed change in units
+    unit_cost = db.Column(db.Numeric(10, 2), nullable=False)
+    occurred_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class StockSnapshot(db.Model):
+    """An item's stock level at a moment, derived from the ledger so as-of reads replay only what follows."""
+    __tablename__ = 'stock_snapshots'
+    __table_args__ = (
+        db.UniqueConstraint('inventory_id', 'taken_at', name='uq_stock_snapshots_item_taken_at'),
+        db.Index('ix_stock_snapshots_business_id_taken_at', 'business_id', 'taken_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id'), nullable=False)
+    inventory_id = db.Column(db.Integer, db.ForeignKey('inventory.id'), nullable=False)
+    taken_at = db.Column(db.DateTime, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+
+class PriceHistory(db.Model):
+    """Every price an item has had, from the moment it took effect."""
+    __tablename__ = 'price_history'
+    __table_args__ = (
+        db.Index('ix_price_history_inventory_id_effective_from', 'inventory_id', 'effective_from'),
+        db.Index('ix_price_history_business_id', 'business_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id'), nullable=False)
+    inventory_id = db.Column(db.Integer, db.ForeignKey('inventory.id'), nullable=False)
+    price_per_unit = db.Column(db.Numeric(10, 2), nullable=False)
+    effective_from = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class OneTimePassword(db.Model):
+    """Pending email verification code, stored as a keyed hash of (user, code)."""
+    __tablename__ = 'one_time_passwords'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), unique=True, nullable=False)
+    code_hash = db.Column(db.String(64), unique=True, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+class IdempotencyKey(db.Model):
+    """A client's Idempotency-Key and the response its first successful request produced.
+
+    The unique (client, key) pair is what collapses concurrent duplicates: a
+    second claim waits on the first transaction and then fails to insert.
+    """
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('client', 'key', name='uq_idempotency_keys_client_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    client = db.Column(db.String(64), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(32), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)  # NULL while the first request is in flight
+    response_body = db.Column(db.LargeBinary, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
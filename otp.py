@@ -0,0 +1,68 @@
+import hashlib
+import hmac
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, select, update
+from models import db, OneTimePassword
+
+
+def hash_otp(user_id, otp_code):
+    """Keyed hash of (user, code), so equal codes for different users never collide."""
+    key = current_app.config['SECRET_KEY'].encode()
+    return hmac.new(key, f'{user_id}:{otp_code}'.encode(), hashlib.sha256).hexdigest()
+
+
+def issue_otp(user_id, otp_code):
+    """Store a fresh code for the user, replacing any earlier one."""
+    db.session.execute(delete(OneTimePassword).where(OneTimePassword.user_id == user_id))
+    db.session.add(OneTimePassword(
+        user_id=user_id,
+        code_hash=hash_otp(user_id, otp_code),
+        expires_at=datetime.utcnow() + timedelta(minutes=current_app.config['OTP_TTL_MINUTES'])
+    ))
+
+
+def check_otp(user_id, otp_code):
+    """Consume the user's code if it matches; returns 'ok', 'invalid' or 'locked'.
+
+    The match is a single unique-index lookup on the hash. Misses count against
+    the user's pending code, which is discarded after OTP_MAX_ATTEMPTS.
+    """
+    now = datetime.utcnow()
+    match = db.session.execute(
+        select(OneTimePassword).where(OneTimePassword.code_hash == hash_otp(user_id, otp_code))
+    ).scalar_one_or_none()
+
+    max_attempts = current_app.config['OTP_MAX_ATTEMPTS']
+    if match is not None and match.expires_at >= now and match.attempts < max_attempts:
+        db.session.delete(match)
+        return 'ok'
+
+    db.session.execute(
+        update(OneTimePassword)
+        .where(OneTimePassword.user_id == user_id)
+        .values(attempts=OneTimePassword.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    attempts = db.session.execute(
+        select(OneTimePassword.attempts).where(OneTimePassword.user_id == user_id)
+    ).scalar_one_or_none()
+    if attempts is not None and attempts >= max_attempts:
+        db.session.execute(delete(OneTimePassword).where(OneTimePassword.user_id == user_id))
+        return 'locked'
+    return 'invalid'
+
+
+def sweep_expired_otps(batch_size=1000, now=None):
+    """Delete expired codes in batches along the expiry index; returns the number removed."""
+    now = now or datetime.utcnow()
+    removed = 0
+    while True:
+        ids = db.session.execute(
+            select(OneTimePassword.id).where(OneTimePassword.expires_at < now).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return removed
+        db.session.execute(delete(OneTimePassword).where(OneTimePassword.id.in_(ids)))
+        db.session.commit()
+        removed += len(ids)
@@ -0,0 +1,65 @@
+import time
+from urllib.parse import urlencode
+from flask import Response, current_app, request, stream_with_context
+from metrics import add_serialize_time
+from models import db
+from serializers import encode, rows_to_dicts
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_stream():
+    """True when the client asked for NDJSON via ?format=ndjson or the Accept header."""
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def list_response(stmt, fields):
+    """Serve a column-projected select as a keyset page, or as an NDJSON stream when requested.
+
+    `fields` are the selected columns, the first being the id used as the cursor.
+    Both modes accept `after` (the last id seen); pages also accept `limit` and
+    advertise the next cursor in the X-Next-Cursor and Link headers.
+    """
+    id_column = fields[0]
+    after = request.args.get('after', type=int)
+    if after is not None:
+        stmt = stmt.where(id_column > after)
+    stmt = stmt.order_by(id_column)
+
+    if wants_stream():
+        return stream_ndjson(stmt, fields)
+
+    limit = request.args.get('limit', current_app.config['PAGE_SIZE_DEFAULT'], type=int)
+    if limit < 1:
+        return {'message': 'limit must be a positive integer'}, 400
+    limit = min(limit, current_app.config['PAGE_SIZE_MAX'])
+
+    # Fetch one extra row to learn whether another page exists without a COUNT
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    started = time.perf_counter()
+    body = encode(rows_to_dicts(fields, rows))
+    add_serialize_time(time.perf_counter() - started)
+    response = current_app.response_class(body, mimetype='application/json')
+    if has_more:
+        cursor = rows[-1][0]
+        args = dict(request.args, after=cursor, limit=limit)
+        response.headers['X-Next-Cursor'] = str(cursor)
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
+
+
+def stream_ndjson(stmt, fields):
+    """Stream every row as one JSON document per line using a server-side cursor."""
+    batch_size = current_app.config['STREAM_BATCH_SIZE']
+
+    def generate():
+        result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            yield b''.join(encode(row) + b'\n' for row in rows_to_dicts(fields, rows))
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,70 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasher:
+    """Hash and verify passwords on a bounded pool of worker threads.
+
+    hashlib's scrypt and pbkdf2 release the GIL, so the pool caps how many
+    cores password work can take while request threads stay free to serve
+    everything else.
+    """
+
+    def __init__(self, method, workers, timeout, queue_size=16):
+        self.method = method
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password')
+        # Jobs running plus waiting; callers beyond that are turned away before anything is queued
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def hash(self, password):
+        return self.run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self.run(check_password_hash, pwhash, password)
+
+    def run(self, fn, *args):
+        """Run `fn` on the pool, raising TimeoutError when the pool is full or the result is late."""
+        if not self.slots.acquire(blocking=False):
+            raise TimeoutError('Password hashing is saturated')
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda future: self.slots.release())
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            # A job still waiting is dropped so an abandoned request burns no CPU; a running one cannot be stopped
+            future.cancel()
+            raise
+
+    def needs_rehash(self, pwhash):
+        """True when a stored hash was made with a different method or cost than configured."""
+        return pwhash.split('$', 1)[0] != hash_prefix(self.method)
+
+
+@lru_cache(maxsize=None)
+def hash_prefix(method):
+    # werkzeug expands short methods ('scrypt', 'pbkdf2') with its defaults, so ask it
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def init_passwords(app):
+    hasher = PasswordHasher(
+        app.config['PASSWORD_HASH_METHOD'],
+        app.config['PASSWORD_HASH_WORKERS'] or os.cpu_count(),
+        app.config['PASSWORD_HASH_TIMEOUT'],
+        app.config['PASSWORD_HASH_QUEUE_SIZE']
+    )
+    app.extensions['password_hasher'] = hasher
+    return hasher
+
+
+def get_hasher():
+    return current_app.extensions['password_hasher']
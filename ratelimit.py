@@ -0,0 +1,96 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request
+
+
+class MemoryBuckets:
+    """Token buckets held in this process; each worker limits on its own."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        """Spend one token from `key`'s bucket. Returns (allowed, seconds until a token is available)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                # Least recently seen buckets are the fullest ones anyway
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+
+class RedisBuckets:
+    """Token buckets shared across workers through any Redis-protocol server."""
+
+    SCRIPT = """
+    local capacity, rate, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url, prefix='inventory:ratelimit:'):
+        import redis  # Optional dependency, only needed for this backend
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+        self.prefix = prefix
+
+    def take(self, key, capacity, rate):
+        allowed, tokens = self.script(keys=[self.prefix + key], args=[capacity, rate, time.time()])
+        if allowed:
+            return True, 0
+        return False, (1 - float(tokens)) / rate
+
+
+class NullBuckets:
+    """Backend that never limits."""
+
+    def take(self, key, capacity, rate):
+        return True, 0
+
+
+def init_rate_limiter(app):
+    """Create the token-bucket backend configured by RATE_LIMIT_BACKEND."""
+    backend = app.config['RATE_LIMIT_BACKEND']
+    if backend == 'redis':
+        limiter = RedisBuckets(app.config['RATE_LIMIT_REDIS_URL'])
+    elif backend == 'memory':
+        limiter = MemoryBuckets()
+    else:
+        limiter = NullBuckets()
+    app.extensions['rate_limiter'] = limiter
+    return limiter
+
+
+def limit_auth_attempts():
+    """before_request hook: shed auth traffic per client and endpoint before it touches the database.
+
+    Returns a 429 with Retry-After once a client has spent its burst, refilled
+    at RATE_LIMIT_AUTH_PER_MINUTE.
+    """
+    capacity = current_app.config['RATE_LIMIT_AUTH_BURST']
+    rate = current_app.config['RATE_LIMIT_AUTH_PER_MINUTE'] / 60
+    allowed, retry_after = current_app.extensions['rate_limiter'].take(
+        f'{request.endpoint}:{request.remote_addr}', capacity, rate
+    )
+    if not allowed:
+        return {'message': 'Too many requests. Please retry later.'}, 429, {'Retry-After': str(math.ceil(retry_after))}
@@ -0,0 +1,214 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Business, Inventory, Sales, SalesRollup
+from totals import sale_unit_cost
+
+GRANULARITIES = ('hour', 'day')
+INTERVALS = ('hour', 'day', 'week', 'month')
+ROLLUP_KEY = ('business_id', 'inventory_id', 'granularity', 'bucket_start')
+
+
+def truncate(moment, interval):
+    """Start of the hour, day, ISO week or month containing `moment`."""
+    if interval == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == 'day':
+        return day
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def ceil(moment, granularity):
+    """Start of the first whole hour or day at or after `moment`."""
+    floor = truncate(moment, granularity)
+    if floor == moment:
+        return floor
+    return floor + (timedelta(hours=1) if granularity == 'hour' else timedelta(days=1))
+
+
+def rollup_rows(sales):
+    """Fold sales into hour and day rollup deltas.
+
+    `sales` yields dicts with business_id, inventory_id, sold_at, quantity_sold,
+    total_price and cogs.
+    """
+    deltas = defaultdict(lambda: {'units': 0, 'revenue': Decimal(0), 'cogs': Decimal(0), 'transactions': 0})
+    for sale in sales:
+        for granularity in GRANULARITIES:
+            delta = deltas[(sale['business_id'], sale['inventory_id'], granularity, truncate(sale['sold_at'], granularity))]
+            delta['units'] += sale['quantity_sold']
+            delta['revenue'] += sale['total_price']
+            delta['cogs'] += sale['cogs']
+            delta['transactions'] += 1
+    return [dict(zip(ROLLUP_KEY, key), **delta) for key, delta in deltas.items()]
+
+
+def apply_rollups(sales):
+    """Add sales to their hour and day rollups inside the current transaction."""
+    rows = rollup_rows(sales)
+    if not rows:
+        return
+    table = SalesRollup.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(ROLLUP_KEY),
+            set_={
+                column: table.c[column] + stmt.excluded[column]
+                for column in ('units', 'revenue', 'cogs', 'transactions')
+            }
+        )
+        db.session.execute(stmt, rows)
+        return
+
+    # Other dialects: update in place and insert the buckets that did not exist yet
+    for row in rows:
+        result = db.session.execute(
+            update(table)
+            .where(*(table.c[column] == row[column] for column in ROLLUP_KEY))
+            .values(**{
+                column: table.c[column] + row[column]
+                for column in ('units', 'revenue', 'cogs', 'transactions')
+            })
+        )
+        if not result.rowcount:
+            db.session.execute(table.insert(), row)
+
+
+def raw_sales(business_id, start=None, end=None, inventory_id=None, batch_size=1000):
+    """Sales with their cost of goods in [start, end), straight from the sales table."""
+    stmt = (
+        select(
+            Sales.business_id, Sales.inventory_id, Sales.sold_at, Sales.quantity_sold, Sales.total_price,
+            (Sales.quantity_sold * sale_unit_cost()).label('cogs')
+        )
+        .join(Inventory, Sales.inventory_id == Inventory.id)
+        .where(Sales.business_id == business_id)
+        .execution_options(yield_per=batch_size)
+    )
+    if start is not None:
+        stmt = stmt.where(Sales.sold_at >= start)
+    if end is not None:
+        stmt = stmt.where(Sales.sold_at < end)
+    if inventory_id is not None:
+        stmt = stmt.where(Sales.inventory_id == inventory_id)
+    for row in db.session.execute(stmt).mappings():
+        yield dict(row)
+
+
+def rebuild_rollups(business_ids=None, batch_size=10000):
+    """Recompute rollups from the raw sales table for the given businesses (or all).
+
+    Works one business at a time so memory is bounded by a single business's buckets.
+    """
+    if business_ids is None:
+        business_ids = db.session.execute(select(Business.id)).scalars().all()
+
+    written = 0
+    for business_id in business_ids:
+        db.session.execute(delete(SalesRollup).where(SalesRollup.business_id == business_id))
+        rows = rollup_rows(raw_sales(business_id, batch_size=batch_size))
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(SalesRollup.__table__.insert(), rows[start:start + batch_size])
+        written += len(rows)
+    return written
+
+
+def plan_range(start, end, interval):
+    """Split [start, end) into the pieces served by day rollups, hour rollups and raw rows.
+
+    Returns a list of (source, start, end) with source one of 'day', 'hour' or 'raw'.
+    Only the ragged edges, such as the still-open current hour, come from raw rows.
+    """
+    pieces = []
+
+    def hours(lo, hi):
+        first, last = ceil(lo, 'hour'), truncate(hi, 'hour')
+        if first >= last:
+            pieces.append(('raw', lo, hi))
+            return
+        if lo < first:
+            pieces.append(('raw', lo, first))
+        pieces.append(('hour', first, last))
+        if last < hi:
+            pieces.append(('raw', last, hi))
+
+    if start >= end:
+        return pieces
+    if interval == 'hour':
+        hours(start, end)
+        return pieces
+
+    first, last = ceil(start, 'day'), truncate(end, 'day')
+    if first >= last:
+        hours(start, end)
+        return pieces
+    if start < first:
+        hours(start, first)
+    pieces.append(('day', first, last))
+    if last < end:
+        hours(last, end)
+    return pieces
+
+
+def sales_series(business_id, start, end, interval, by_item=False, inventory_id=None):
+    """Revenue, units and COGS per `interval` bucket (and per item) over [start, end)."""
+    buckets = defaultdict(lambda: {'units': 0, 'revenue': Decimal(0), 'cogs': Decimal(0), 'transactions': 0})
+
+    def add(moment, item_id, units, revenue, cogs, transactions):
+        bucket = buckets[(truncate(moment, interval), item_id if by_item else None)]
+        bucket['units'] += units
+        bucket['revenue'] += revenue
+        bucket['cogs'] += cogs
+        bucket['transactions'] += transactions
+
+    for source, lo, hi in plan_range(start, end, interval):
+        if source == 'raw':
+            for sale in raw_sales(business_id, lo, hi, inventory_id):
+                add(sale['sold_at'], sale['inventory_id'], sale['quantity_sold'], sale['total_price'], sale['cogs'], 1)
+            continue
+
+        stmt = select(
+            SalesRollup.bucket_start, SalesRollup.inventory_id, SalesRollup.units,
+            SalesRollup.revenue, SalesRollup.cogs, SalesRollup.transactions
+        ).where(
+            SalesRollup.business_id == business_id,
+            SalesRollup.granularity == source,
+            SalesRollup.bucket_start >= lo,
+            SalesRollup.bucket_start < hi
+        )
+        if inventory_id is not None:
+            stmt = stmt.where(SalesRollup.inventory_id == inventory_id)
+        for row in db.session.execute(stmt):
+            add(*row)
+
+    series = []
+    for (bucket, item_id), values in sorted(buckets.items(), key=lambda pair: (pair[0][0], pair[0][1] or 0)):
+        entry = {'bucket': bucket.isoformat(), **values}
+        if by_item:
+            entry['inventory_id'] = item_id
+        series.append(entry)
+    return series
+
+
+def parse_moment(value):
+    """Parse an ISO 8601 timestamp into the naive UTC datetimes stored in the tables."""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def parse_range(start, end, default_days=30):
+    """Parse optional ISO start/end query values, defaulting to the last `default_days` up to now."""
+    end = parse_moment(end) if end else datetime.utcnow()
+    start = parse_moment(start) if start else end - timedelta(days=default_days)
+    return start, end
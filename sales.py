@@ -0,0 +1,235 @@
+import json
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import insert, select, update
+from alerts import record_crossing
+from ledger import record_movement
+from models import db, Inventory, Sales
+from rollups import apply_rollups, parse_moment
+from totals import apply_delta, to_money
+
+REQUIRED_SALE_FIELDS = ('business_id', 'inventory_id', 'quantity_sold', 'total_price')
+
+
+def update_stock(stmt, inventory_id):
+    """Run a conditional single-item UPDATE, returning the row it left or None if nothing matched."""
+    returned = (Inventory.quantity, Inventory.reorder_point, Inventory.business_id, Inventory.price_per_unit)
+    if db.session.get_bind().dialect.update_returning:
+        return db.session.execute(stmt.returning(*returned)).first()
+    if db.session.execute(stmt).rowcount == 1:
+        # The row is locked by our UPDATE, so this read sees exactly what it left
+        return db.session.execute(select(*returned).where(Inventory.id == inventory_id)).first()
+    return None
+
+
+def check_reorder_point(business_id, inventory_id, remaining, reorder_point, removed):
+    if reorder_point is not None and remaining <= reorder_point < remaining + removed:
+        record_crossing(business_id, inventory_id, remaining, reorder_point)
+
+
+def decrement_stock(inventory_id, quantity, kind='sale'):
+    """Atomically take `quantity` units from an item's stock in the current transaction.
+
+    A single conditional UPDATE locks only that inventory row, so concurrent
+    checkouts of other items never wait on each other. Returns the item's
+    price as read under that lock, the unit cost to book the units at, or
+    None, leaving stock untouched, when fewer than `quantity` units remain.
+    The change goes to the stock ledger as a `kind` movement, and falling to
+    or below the reorder point records an alert.
+    """
+    stmt = (
+        update(Inventory)
+        .where(Inventory.id == inventory_id, Inventory.quantity >= quantity)
+        .values(quantity=Inventory.quantity - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    row = update_stock(stmt, inventory_id)
+    if row is None:
+        return None
+
+    remaining, reorder_point, business_id, price = row
+    record_movement(business_id, inventory_id, kind, -quantity, price)
+    check_reorder_point(business_id, inventory_id, remaining, reorder_point, quantity)
+    return price
+
+
+def adjust_stock(inventory_id, quantity, kind):
+    """Receive (positive `quantity`) or write off (negative) units of an item at its current price.
+
+    Records the movement and revalues the business's running inventory value.
+    Returns the movement with the new on-hand quantity, or None when the item
+    does not exist or holds fewer units than a write-off removes.
+    """
+    stmt = (
+        update(Inventory)
+        .where(Inventory.id == inventory_id, Inventory.quantity + quantity >= 0)
+        .values(quantity=Inventory.quantity + quantity)
+        .execution_options(synchronize_session=False)
+    )
+    row = update_stock(stmt, inventory_id)
+    if row is None:
+        return None
+
+    remaining, reorder_point, business_id, price = row
+    movement = record_movement(business_id, inventory_id, kind, quantity, price)
+    if quantity < 0:
+        check_reorder_point(business_id, inventory_id, remaining, reorder_point, -quantity)
+    apply_delta(business_id, inventory_value=quantity * price)
+    return dict(movement, on_hand=remaining)
+
+
+def parse_sales_body(body, content_type):
+    """Parse a bulk body given as a JSON array or as NDJSON.
+
+    Returns a list of (index, payload) pairs and a list of per-line errors.
+    """
+    if content_type == 'application/x-ndjson':
+        entries, errors = [], []
+        for index, line in enumerate(body.splitlines()):
+            if not line.strip():
+                continue
+            try:
+                entries.append((index, json.loads(line)))
+            except ValueError as e:
+                errors.append({'index': index, 'errors': {'body': f'Invalid JSON: {e}'}})
+        return entries, errors
+
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        return [], [{'index': None, 'errors': {'body': f'Invalid JSON: {e}'}}]
+    if not isinstance(payload, list):
+        return [], [{'index': None, 'errors': {'body': 'Expected a JSON array of sales'}}]
+    return list(enumerate(payload)), []
+
+
+def validate_sale(data, items):
+    """Validate one sale payload against the referenced inventory rows.
+
+    `items` maps inventory id to (business_id, price_per_unit). Returns the
+    row, lacking the unit cost decrement_stock reads when it takes the stock,
+    and an empty dict, or None and a dict of field errors.
+    """
+    if not isinstance(data, dict):
+        return None, {'sale': 'Expected a JSON object'}
+
+    errors = {field: 'Missing required field' for field in REQUIRED_SALE_FIELDS if data.get(field) is None}
+    if errors:
+        return None, errors
+
+    row = {}
+    for field in ('business_id', 'inventory_id', 'quantity_sold'):
+        value = data[field]
+        if isinstance(value, bool) or not isinstance(value, int):
+            errors[field] = 'Must be an integer'
+        row[field] = value
+    if not errors.get('quantity_sold') and row['quantity_sold'] <= 0:
+        errors['quantity_sold'] = 'Must be positive'
+
+    try:
+        row['total_price'] = to_money(data['total_price'])
+    except ValueError as e:
+        errors['total_price'] = str(e)
+
+    sold_at = data.get('sold_at')
+    try:
+        # Offsets are converted to UTC so the sale lands in the right rollup bucket
+        row['sold_at'] = parse_moment(sold_at) if sold_at else datetime.utcnow()
+    except (TypeError, ValueError):
+        errors['sold_at'] = 'Must be an ISO 8601 datetime'
+
+    if 'inventory_id' not in errors:
+        item = items.get(row['inventory_id'])
+        if item is None:
+            errors['inventory_id'] = 'Inventory item not found'
+        elif item[0] != row['business_id']:
+            errors['inventory_id'] = 'Inventory item belongs to another business'
+
+    if errors:
+        return None, errors
+    row['created_at'] = datetime.utcnow()
+    return row, {}
+
+
+def load_items(inventory_ids, chunk_size):
+    """Fetch (business_id, price_per_unit) for the referenced inventory ids."""
+    ids = sorted({i for i in inventory_ids if isinstance(i, int) and not isinstance(i, bool)})
+    items = {}
+    for start in range(0, len(ids), chunk_size):
+        stmt = select(Inventory.id, Inventory.business_id, Inventory.price_per_unit).where(
+            Inventory.id.in_(ids[start:start + chunk_size])
+        )
+        for item_id, business_id, price in db.session.execute(stmt):
+            items[item_id] = (business_id, price)
+    return items
+
+
+def bulk_insert_sales(entries, chunk_size):
+    """Validate and insert sales in chunks within the caller's transaction.
+
+    Invalid rows, and rows that would oversell an item, are reported and
+    skipped; valid rows are inserted with executemany and folded into the
+    running totals once per business. Returns the number inserted, the
+    errors and the ids of the businesses that gained sales.
+    """
+    items = load_items((data.get('inventory_id') for _, data in entries if isinstance(data, dict)), chunk_size)
+
+    valid, errors = [], []
+    for index, data in entries:
+        row, row_errors = validate_sale(data, items)
+        if row_errors:
+            errors.append({'index': index, 'errors': row_errors})
+        else:
+            valid.append((index, row))
+
+    reserved = []
+    for index, row in reserve_stock(valid):
+        if row is None:
+            errors.append({'index': index, 'errors': {'quantity_sold': 'Insufficient stock'}})
+        else:
+            reserved.append((index, row))
+    errors.sort(key=lambda error: -1 if error['index'] is None else error['index'])
+    rows = [row for _, row in sorted(reserved, key=lambda pair: pair[0])]
+
+    deltas = defaultdict(lambda: {'revenue': 0, 'cogs': 0, 'inventory_value': 0, 'transactions': 0})
+    costed = []
+    for row in rows:
+        cost = row['quantity_sold'] * row['unit_cost']
+        costed.append(dict(row, cogs=cost))
+        delta = deltas[row['business_id']]
+        delta['revenue'] += row['total_price']
+        delta['cogs'] += cost
+        delta['inventory_value'] -= cost
+        delta['transactions'] += 1
+
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(insert(Sales), rows[start:start + chunk_size])
+    for business_id, delta in deltas.items():
+        apply_delta(business_id, **delta)
+    apply_rollups(costed)
+
+    return len(rows), errors, set(deltas)
+
+
+def reserve_stock(indexed_rows):
+    """Decrement stock for validated sales, yielding (index, row or None on oversell).
+
+    Rows come back with the unit cost read under the stock update's lock. Each item is first decremented by the sum of its rows in one statement; only
+    when that would oversell do we fall back to taking rows one at a time in
+    request order, so the earliest sales win.
+    """
+    by_item = defaultdict(list)
+    for index, row in indexed_rows:
+        by_item[row['inventory_id']].append((index, row))
+
+    # Lock rows in id order so concurrent batches cannot deadlock each other
+    for inventory_id in sorted(by_item):
+        item_rows = by_item[inventory_id]
+        price = decrement_stock(inventory_id, sum(row['quantity_sold'] for _, row in item_rows))
+        if price is not None:
+            for index, row in item_rows:
+                yield index, dict(row, unit_cost=price)
+            continue
+        for index, row in item_rows:
+            price = decrement_stock(inventory_id, row['quantity_sold'])
+            yield index, None if price is None else dict(row, unit_cost=price)
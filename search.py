@@ -0,0 +1,100 @@
+import re
+from sqlalchemy import DDL, column, event, func, literal_column, or_, select, table, text
+from models import db, Inventory
+from serializers import INVENTORY_FIELDS
+
+MAX_TERMS = 8
+
+# SQLite: an external-content FTS5 table over inventory, kept in sync by triggers
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS inventory_fts USING fts5("
+    "item_name, description, content='inventory', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS inventory_fts_insert AFTER INSERT ON inventory BEGIN "
+    "INSERT INTO inventory_fts(rowid, item_name, description) "
+    "VALUES (new.id, new.item_name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS inventory_fts_delete AFTER DELETE ON inventory BEGIN "
+    "INSERT INTO inventory_fts(inventory_fts, rowid, item_name, description) "
+    "VALUES ('delete', old.id, old.item_name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS inventory_fts_update AFTER UPDATE OF item_name, description "
+    "ON inventory BEGIN "
+    "INSERT INTO inventory_fts(inventory_fts, rowid, item_name, description) "
+    "VALUES ('delete', old.id, old.item_name, old.description); "
+    "INSERT INTO inventory_fts(rowid, item_name, description) "
+    "VALUES (new.id, new.item_name, new.description); END",
+)
+
+# Postgres: expression indexes, which the database maintains on every write
+POSTGRES_DOCUMENT = "to_tsvector('simple', coalesce(item_name, '') || ' ' || coalesce(description, ''))"
+POSTGRES_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_inventory_search_document ON inventory USING gin ({POSTGRES_DOCUMENT})",
+    "CREATE INDEX IF NOT EXISTS ix_inventory_item_name_trgm ON inventory USING gin (lower(item_name) gin_trgm_ops)",
+)
+
+for statement in SQLITE_DDL:
+    event.listen(Inventory.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_DDL:
+    event.listen(Inventory.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+event.listen(
+    Inventory.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS inventory_fts').execute_if(dialect='sqlite')
+)
+
+
+def search_terms(query):
+    """Lower-cased word tokens of a user query, capped at MAX_TERMS."""
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def search_inventory(business_id, query, limit):
+    """Rank a business's items against `query`, treating every term as a prefix.
+
+    Returns projected INVENTORY_FIELDS rows, best match first, or an empty
+    list when the query has no searchable terms.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    stmt = select(*INVENTORY_FIELDS).where(Inventory.business_id == business_id)
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        fts = table('inventory_fts', column('rowid'))
+        index = literal_column('inventory_fts')
+        prefixes = ' AND '.join(f'"{term}"*' for term in terms)
+        stmt = (
+            stmt.join(fts, fts.c.rowid == Inventory.id)
+            .where(index.op('MATCH')(prefixes))
+            # Name hits outweigh description hits
+            .order_by(func.bm25(index, 10.0, 1.0), Inventory.id)
+        )
+    elif dialect == 'postgresql':
+        document = literal_column(POSTGRES_DOCUMENT)
+        tsquery = func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+        phrase = query.strip().lower()
+        stmt = (
+            stmt.where(or_(
+                document.op('@@')(tsquery),
+                func.lower(Inventory.item_name).contains(phrase, autoescape=True)
+            ))
+            .order_by(
+                (func.ts_rank(document, tsquery) + func.similarity(func.lower(Inventory.item_name), phrase)).desc(),
+                Inventory.id
+            )
+        )
+    else:
+        # No search index on other databases: every term must appear in the name or description
+        for term in terms:
+            stmt = stmt.where(or_(
+                func.lower(Inventory.item_name).contains(term, autoescape=True),
+                func.lower(Inventory.description).contains(term, autoescape=True)
+            ))
+        stmt = stmt.order_by(Inventory.id)
+
+    return db.session.execute(stmt.limit(limit)).all()
+
+
+def rebuild_search_index():
+    """Re-index every inventory row; only needed on SQLite, where the index is a separate table."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        db.session.execute(text("INSERT INTO inventory_fts(inventory_fts) VALUES ('rebuild')"))
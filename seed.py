@@ -1,99 +1,186 @@
+"""Seed the database with synthetic users, businesses, inventory and sales.
+
+The defaults give a small development dataset; scale the counts up for
+capacity planning, e.g.
+
+    python seed.py --users 2000 --businesses-per-user 2 --items-per-business 250 --sales 5000000
+
+Every table is loaded with batched Core inserts and the derived tables
+(running totals, sales rollups and insight snapshots) are rebuilt once at the end.
+Sales follow a Zipf-like popularity across businesses and items, busier
+afternoons and weekends, and a gentle upward trend over the period.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import insert, text
 from app import app, db
-from models import User, Business, Inventory, Sales, Insights
-from datetime import datetime
-from werkzeug.security import generate_password_hash
-
-def seed_data():
-    with app.app_context():
-        # Clear existing data (optional, for fresh seeding)
-        db.drop_all()
-        db.create_all()
-
-        # Create sample users with hashed passwords
-        user1 = User(username='alice', email='alice@example.com')
-        user1.set_password('password123')  # Hash the password
-        user2 = User(username='bob', email='bob@example.com')
-        user2.set_password('password123')  # Hash the password
-
-        # Add users to session and commit to generate user IDs
-        db.session.add(user1)
-        db.session.add(user2)
-        db.session.commit()  # Commit here to assign user IDs
-
-        # Create sample businesses
-        business1 = Business(name='Tech Shop', user_id=user1.id, category='Technology')
-        business2 = Business(name='Grocery Store', user_id=user2.id, category='Retail')
-
-        db.session.add(business1)
-        db.session.add(business2)
-        db.session.commit()  # Commit businesses to generate business IDs
-
-        # Create sample inventory and commit them
-        inventory1 = Inventory(item_name='Laptop', description='High-end gaming laptop', quantity=50, price_per_unit=1000, business_id=business1.id)
-        inventory2 = Inventory(item_name='Smartphone', description='Latest model', quantity=200, price_per_unit=500, business_id=business1.id)
-        inventory3 = Inventory(item_name='Apple', description='Fresh apples', quantity=300, price_per_unit=1, business_id=business2.id)
-        
-        db.session.add(inventory1)
-        db.session.add(inventory2)
-        db.session.add(inventory3)
-        db.session.commit()  # Commit inventories to generate inventory IDs
-
-        # Create sample sales, ensuring inventory_id is correctly assigned
-        sale1 = Sales(business_id=business1.id, inventory_id=inventory1.id, quantity_sold=5, total_price=5000, sold_at=datetime.utcnow())
-        sale2 = Sales(business_id=business2.id, inventory_id=inventory3.id, quantity_sold=50, total_price=50, sold_at=datetime.utcnow())
-
-        db.session.add(sale1)
-        db.session.add(sale2)
-
-        # Commit all sales changes
+from models import User, Business, Inventory, Sales, PriceHistory, StockMovement
+from passwords import get_hasher
+from rollups import rebuild_rollups
+from snapshots import take_snapshots
+from totals import rebuild_totals
+
+SAMPLE_PASSWORD = 'password123'
+CATEGORIES = ('Technology', 'Retail', 'Grocery', 'Hardware', 'Pharmacy', 'Clothing')
+ADJECTIVES = ('Blue', 'Large', 'Organic', 'Classic', 'Compact', 'Deluxe', 'Fresh', 'Wireless', 'Steel', 'Cotton')
+NOUNS = ('Laptop', 'Apple', 'Hammer', 'Shirt', 'Charger', 'Kettle', 'Notebook', 'Bulb', 'Soap', 'Headphones')
+# Relative sales volume by hour of day and by weekday, Monday first
+HOUR_WEIGHTS = (
+    0.1, 0.05, 0.05, 0.05, 0.1, 0.2, 0.5, 0.9, 1.2, 1.4, 1.6, 1.9,
+    2.2, 2.0, 1.8, 1.8, 1.9, 2.1, 2.0, 1.6, 1.1, 0.7, 0.4, 0.2
+)
+WEEKDAY_WEIGHTS = (1.0, 0.95, 1.0, 1.05, 1.2, 1.5, 1.3)
+
+
+def zipf_weights(count, skew):
+    """Probabilities proportional to 1 / rank ** skew."""
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    return weights / weights.sum()
+
+
+def insert_rows(model, rows, batch_size):
+    """Core-insert an iterable of row dicts in executemany batches of `batch_size`."""
+    # The table rather than the mapped class, which would route through the ORM bulk path
+    stmt = insert(model.__table__)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            db.session.execute(stmt, batch)
+            batch = []
+    if batch:
+        db.session.execute(stmt, batch)
+
+
+def sync_sequences():
+    # Ids are assigned here rather than by the database, so Postgres sequences must catch up
+    if db.session.get_bind().dialect.name == 'postgresql':
+        for table in ('user', 'business', 'inventory'):
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), (SELECT max(id) FROM \"{table}\"))"
+            ))
+
+
+def generate(users=2, businesses_per_user=1, items_per_business=5, sales=200, days=30, skew=1.1,
+             seed=42, batch_size=10000, log=print):
+    """Drop and recreate every table, then fill them with a synthetic dataset."""
+    rng = np.random.default_rng(seed)
+    business_count = users * businesses_per_user
+    item_count = business_count * items_per_business
+    started = time.perf_counter()
+
+    def done(phase, rows):
         db.session.commit()
+        log(f"{phase:<12}{rows:>12,} rows  {time.perf_counter() - started:8.1f} s")
+
+    db.drop_all()
+    db.create_all()
+
+    # Hashing is deliberately slow, so every synthetic user shares one hash
+    password = get_hasher().hash(SAMPLE_PASSWORD)
+    insert_rows(User, (
+        {'id': n, 'username': f'user{n}', 'email': f'user{n}@example.com', 'password': password}
+        for n in range(1, users + 1)
+    ), batch_size)
+    done('users', users)
+
+    categories = rng.integers(len(CATEGORIES), size=business_count).tolist()
+    insert_rows(Business, (
+        {'id': n + 1, 'user_id': n // businesses_per_user + 1, 'name': f'Business {n + 1}',
+         'category': CATEGORIES[categories[n]]}
+        for n in range(business_count)
+    ), batch_size)
+    done('businesses', business_count)
+
+    prices = np.round(rng.lognormal(3.0, 1.2, item_count).clip(0.5, 10000), 2)
+    quantities = rng.integers(0, 500, item_count).tolist()
+    reorder_points = rng.integers(5, 50, item_count).tolist()
+    names = rng.integers(len(ADJECTIVES) * len(NOUNS), size=item_count).tolist()
+    price_list = prices.tolist()
+    insert_rows(Inventory, (
+        {
+            'id': n + 1,
+            'business_id': n // items_per_business + 1,
+            'item_name': f'{ADJECTIVES[names[n] // len(NOUNS)]} {NOUNS[names[n] % len(NOUNS)]} {n + 1}',
+            'description': f'{CATEGORIES[categories[n // items_per_business]]} stock item',
+            'quantity': quantities[n],
+            'price_per_unit': price_list[n],
+            'reorder_point': reorder_points[n]
+        }
+        for n in range(item_count)
+    ), batch_size)
+    done('inventory', item_count)
+
+    # Each item's ledger opens at its current stock; prices are constant over the generated period
+    first_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    opened_at = datetime.utcnow()
+    insert_rows(StockMovement, (
+        {'business_id': n // items_per_business + 1, 'inventory_id': n + 1, 'kind': 'opening',
+         'quantity': quantities[n], 'unit_cost': price_list[n], 'occurred_at': opened_at}
+        for n in range(item_count)
+    ), batch_size)
+    insert_rows(PriceHistory, (
+        {'business_id': n // items_per_business + 1, 'inventory_id': n + 1, 'price_per_unit': price_list[n],
+         'effective_from': first_day}
+        for n in range(item_count)
+    ), batch_size)
+    done('ledger', item_count * 2)
+
+    # Popularity ranks are shuffled so busy businesses are not simply the lowest ids
+    business_p = zipf_weights(business_count, skew)[rng.permutation(business_count)]
+    item_p = zipf_weights(items_per_business, skew)
+    item_shift = rng.integers(items_per_business, size=business_count)
+    day_p = np.array([WEEKDAY_WEIGHTS[(first_day.weekday() + day) % 7] for day in range(days)])
+    day_p *= np.linspace(0.8, 1.2, days)
+    day_p /= day_p.sum()
+    hour_p = np.array(HOUR_WEIGHTS) / sum(HOUR_WEIGHTS)
+
+    for chunk_start in range(0, sales, batch_size * 10):
+        size = min(batch_size * 10, sales - chunk_start)
+        businesses = rng.choice(business_count, size=size, p=business_p)
+        items = businesses * items_per_business + (rng.choice(items_per_business, size=size, p=item_p)
+                                                   + item_shift[businesses]) % items_per_business
+        offsets = (rng.choice(days, size=size, p=day_p) * 86400 + rng.choice(24, size=size, p=hour_p) * 3600
+                   + rng.integers(3600, size=size))
+        sold_at = (np.datetime64(first_day, 's') + offsets.astype('timedelta64[s]')).tolist()
+        sold = rng.geometric(0.6, size=size).clip(max=20)
+        totals = np.round(sold * prices[items] * rng.uniform(1.1, 1.6, size=size), 2)
+        insert_rows(Sales, (
+            {'business_id': business + 1, 'inventory_id': item + 1, 'quantity_sold': quantity,
+             'total_price': total, 'unit_cost': cost, 'sold_at': moment}
+            for business, item, quantity, total, cost, moment in zip(
+                businesses.tolist(), items.tolist(), sold.tolist(), totals.tolist(), prices[items].tolist(), sold_at
+            )
+        ), batch_size)
+    done('sales', sales)
+
+    sync_sequences()
+    rebuild_totals()
+    done('totals', business_count)
+    done('rollups', rebuild_rollups())
+    done('insights', take_snapshots())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=2)
+    parser.add_argument('--businesses-per-user', type=int, default=1)
+    parser.add_argument('--items-per-business', type=int, default=5)
+    parser.add_argument('--sales', type=int, default=200)
+    parser.add_argument('--days', type=int, default=30, help='Spread sales over this many past days.')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent for business and item popularity.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
 
-        # Create Insights for business 1 (Tech Shop)
-        total_revenue_1 = db.session.query(db.func.sum(Sales.total_price)).filter_by(business_id=business1.id).scalar()
-        total_cost_of_goods_sold_1 = db.session.query(
-            db.func.sum(Sales.quantity_sold * Inventory.price_per_unit)
-        ).join(Inventory, Sales.inventory_id == Inventory.id).filter(Sales.business_id == business1.id).scalar()
-        total_inventory_value_1 = db.session.query(
-            db.func.sum(Inventory.quantity * Inventory.price_per_unit)
-        ).filter_by(business_id=business1.id).scalar()
-
-        profit_1 = total_revenue_1 - total_cost_of_goods_sold_1
-        loss_1 = abs(profit_1) if profit_1 < 0 else 0.0
-        average_sales_price_1 = total_revenue_1 / (db.session.query(db.func.count(Sales.id)).filter_by(business_id=business1.id).scalar() or 1)
-
-        # Insert insights into the database for business 1
-        db.session.add(Insights(business_id=business1.id, metric='total_revenue', value=total_revenue_1, recorded_at=datetime.utcnow()))
-        db.session.add(Insights(business_id=business1.id, metric='total_profit', value=profit_1, recorded_at=datetime.utcnow()))
-        db.session.add(Insights(business_id=business1.id, metric='total_losses', value=loss_1, recorded_at=datetime.utcnow()))
-        db.session.add(Insights(business_id=business1.id, metric='inventory_value', value=total_inventory_value_1, recorded_at=datetime.utcnow()))
-        db.session.add(Insights(business_id=business1.id, metric='average_sales_price', value=average_sales_price_1, recorded_at=datetime.utcnow()))
-
-        # Create Insights for business 2 (Grocery Store)
-        total_revenue_2 = db.session.query(db.func.sum(Sales.total_price)).filter_by(business_id=business2.id).scalar()
-        total_cost_of_goods_sold_2 = db.session.query(
-            db.func.sum(Sales.quantity_sold * Inventory.price_per_unit)
-        ).join(Inventory, Sales.inventory_id == Inventory.id).filter(Sales.business_id == business2.id).scalar()
-        total_inventory_value_2 = db.session.query(
-            db.func.sum(Inventory.quantity * Inventory.price_per_unit)
-        ).filter_by(business_id=business2.id).scalar()
-
-        profit_2 = total_revenue_2 - total_cost_of_goods_sold_2
-        loss_2 = abs(profit_2) if profit_2 < 0 else 0.0
-        average_sales_price_2 = total_revenue_2 / (db.session.query(db.func.count(Sales.id)).filter_by(business_id=business2.id).scalar() or 1)
-
-        # Insert insights into the database for business 2
-        db.session.add(Insights(business_id=business2.id, metric='total_revenue', value=total_revenue_2, recorded_at=datetime.utcnow()))
-        db.session.add(Insights(business_id=business2.id, metric='total_profit', value=profit_2, recorded_at=datetime.utcnow()))
-        db.session.add(Insights(business_id=business2.id, metric='total_losses', value=loss_2, recorded_at=datetime.utcnow()))
-        db.session.add(Insights(business_id=business2.id, metric='inventory_value', value=total_inventory_value_2, recorded_at=datetime.utcnow()))
-        db.session.add(Insights(business_id=business2.id, metric='average_sales_price', value=average_sales_price_2, recorded_at=datetime.utcnow()))
-
-        # Commit all insights
-        db.session.commit()
-
-        print("Sample data seeded successfully!")
+    with app.app_context():
+        generate(args.users, args.businesses_per_user, args.items_per_business, args.sales, args.days,
+                 args.skew, args.seed, args.batch_size)
+    print(f"Seeded {args.users} users with password '{SAMPLE_PASSWORD}'.")
 
 
 # Run the seeding function
 if __name__ == "__main__":
-    seed_data()
+    main()
@@ -0,0 +1,76 @@
+import json
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+from metrics import add_serialize_time
+from models import User, Business, Inventory, Sales, Insights, PriceHistory, StockMovement
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the stdlib fallback is only slower
+    orjson = None
+
+# Columns each resource exposes; list queries select only these, never whole ORM objects
+USER_FIELDS = (User.id, User.username, User.email, User.created_at)
+BUSINESS_FIELDS = (Business.id, Business.user_id, Business.name, Business.category, Business.created_at)
+INVENTORY_FIELDS = (
+    Inventory.id, Inventory.business_id, Inventory.item_name, Inventory.description,
+    Inventory.quantity, Inventory.price_per_unit, Inventory.reorder_point, Inventory.created_at
+)
+SALES_FIELDS = (
+    Sales.id, Sales.business_id, Sales.inventory_id, Sales.quantity_sold, Sales.total_price, Sales.unit_cost,
+    Sales.sold_at
+)
+INSIGHTS_FIELDS = (Insights.id, Insights.business_id, Insights.metric, Insights.value, Insights.recorded_at)
+MOVEMENT_FIELDS = (
+    StockMovement.id, StockMovement.business_id, StockMovement.inventory_id, StockMovement.kind,
+    StockMovement.quantity, StockMovement.unit_cost, StockMovement.occurred_at
+)
+PRICE_FIELDS = (PriceHistory.id, PriceHistory.inventory_id, PriceHistory.price_per_unit, PriceHistory.effective_from)
+
+
+def _default(obj):
+    # Decimals keep their exact text, matching what the API has always returned for Numeric columns
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+if orjson is not None:
+    def encode(obj):
+        """Encode to JSON bytes; Decimal becomes a string and datetimes ISO 8601."""
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def encode(obj):
+        """Encode to JSON bytes; Decimal becomes a string and datetimes ISO 8601."""
+        return json.dumps(obj, default=_default, separators=(',', ':')).encode()
+
+
+def rows_to_dicts(fields, rows):
+    """Turn projected row tuples into dicts keyed by column name."""
+    keys = [field.key for field in fields]
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def instance_to_dict(instance, fields):
+    """Project a single ORM instance onto the same fields a list query would select."""
+    return {field.key: getattr(instance, field.key) for field in fields}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by `encode`, so jsonify takes the same fast path."""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return encode(obj).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        started = time.perf_counter()
+        body = encode(obj)
+        add_serialize_time(time.perf_counter() - started)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,155 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import repeat
+from sqlalchemy import delete, func, insert, select
+from models import db, Business, BusinessTotals, Insights
+from totals import compute_totals, insight_metrics, scope_businesses
+
+CENTS = Decimal('0.01')
+
+
+def latest_snapshot_values(business_ids=None, id_range=None):
+    """Map (business_id, metric) to the value of its most recent snapshot."""
+    latest = scope_businesses(
+        select(func.max(Insights.id)).group_by(Insights.business_id, Insights.metric),
+        Insights.business_id, business_ids, id_range
+    )
+    stmt = select(Insights.business_id, Insights.metric, Insights.value).where(Insights.id.in_(latest))
+    return {(business_id, metric): value for business_id, metric, value in db.session.execute(stmt)}
+
+
+def stored_totals(business_ids=None, id_range=None):
+    """Running totals keyed by business id, computing any business that has no row yet."""
+    stmt = scope_businesses(select(BusinessTotals), BusinessTotals.business_id, business_ids, id_range)
+    totals = {row.business_id: row for row in db.session.execute(stmt).scalars()}
+    missing = db.session.execute(scope_businesses(
+        select(Business.id).outerjoin(BusinessTotals).where(BusinessTotals.business_id.is_(None)),
+        Business.id, business_ids, id_range
+    )).scalars().all()
+    if missing:
+        totals.update(compute_totals(missing))
+    return totals
+
+
+def take_snapshots(business_ids=None, recorded_at=None, id_range=None, recompute=False):
+    """Record the current metrics as Insights rows, skipping values that have not changed.
+
+    Reads the running totals by default, so the cost is one row per business
+    rather than a scan of its sales. With `recompute`, every metric is instead
+    derived from the sales and inventory tables by a few GROUP BY business_id
+    queries covering all selected businesses at once, which is what the
+    nightly batch does. `id_range` limits either to an inclusive block of
+    business ids. Returns the number of rows written.
+    """
+    recorded_at = recorded_at or datetime.utcnow()
+    if recompute:
+        totals = compute_totals(business_ids, id_range)
+    else:
+        totals = stored_totals(business_ids, id_range)
+
+    previous = latest_snapshot_values(business_ids, id_range)
+    rows = []
+    for business_id, row in totals.items():
+        for metric, value in insight_metrics(row).items():
+            value = value.quantize(CENTS)
+            if previous.get((business_id, metric)) == value:
+                continue
+            rows.append({
+                'business_id': business_id,
+                'metric': metric,
+                'value': value,
+                'recorded_at': recorded_at,
+                'created_at': recorded_at
+            })
+
+    if rows:
+        db.session.execute(insert(Insights.__table__), rows)
+    return len(rows)
+
+
+def business_id_ranges(parts):
+    """Split the business id space into up to `parts` contiguous, inclusive ranges."""
+    first, last = db.session.execute(select(func.min(Business.id), func.max(Business.id))).one()
+    if first is None:
+        return []
+    step = -(-(last - first + 1) // parts)
+    return [(start, min(start + step - 1, last)) for start in range(first, last + 1, step)]
+
+
+def _snapshot_range(id_range, recorded_at, recompute):
+    # Runs in a worker process with its own app, engine and transaction
+    from app import app
+    with app.app_context():
+        written = take_snapshots(id_range=id_range, recorded_at=recorded_at, recompute=recompute)
+        db.session.commit()
+    return written
+
+
+def take_snapshots_parallel(workers, recorded_at=None, recompute=False):
+    """Run take_snapshots over `workers` business id ranges in a process pool.
+
+    Each range commits on its own, so a failed worker leaves the others'
+    snapshots in place. Returns the total number of rows written.
+    """
+    recorded_at = recorded_at or datetime.utcnow()
+    ranges = business_id_ranges(workers)
+    # Children must not inherit pooled connections from this process
+    db.session.close()
+    for engine in db.engines.values():
+        engine.dispose()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(_snapshot_range, ranges, repeat(recorded_at), repeat(recompute)))
+
+
+def compaction_bucket(recorded_at, now, raw_window, hourly_window):
+    """Bucket a snapshot falls into under the retention policy, or None to keep it as is."""
+    age = now - recorded_at
+    if age <= raw_window:
+        return None
+    if age <= hourly_window:
+        return recorded_at.replace(minute=0, second=0, microsecond=0)
+    return recorded_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def compact_insights(raw_hours, hourly_days, retention_days=0, now=None, batch_size=1000):
+    """Downsample snapshot history in place.
+
+    Snapshots younger than `raw_hours` are kept as they are, those younger than
+    `hourly_days` are reduced to the last one per hour, and older ones to the
+    last one per day. With `retention_days` set, anything older is deleted.
+    Returns the number of rows removed.
+    """
+    now = now or datetime.utcnow()
+    raw_window = timedelta(hours=raw_hours)
+    hourly_window = timedelta(days=hourly_days)
+    removed = 0
+
+    if retention_days:
+        result = db.session.execute(
+            delete(Insights).where(Insights.recorded_at < now - timedelta(days=retention_days))
+        )
+        removed += result.rowcount
+
+    # Walk candidates newest-first per series so the first row seen in a bucket is the one kept
+    stmt = (
+        select(Insights.id, Insights.business_id, Insights.metric, Insights.recorded_at)
+        .where(Insights.recorded_at < now - raw_window)
+        .order_by(Insights.business_id, Insights.metric, Insights.recorded_at.desc(), Insights.id.desc())
+        .execution_options(yield_per=batch_size)
+    )
+    seen, doomed = set(), []
+    for insight_id, business_id, metric, recorded_at in db.session.execute(stmt):
+        key = (business_id, metric, compaction_bucket(recorded_at, now, raw_window, hourly_window))
+        if key in seen:
+            doomed.append(insight_id)
+        else:
+            seen.add(key)
+        if len(seen) > batch_size * 10:
+            # Buckets never span series, so keys from finished series can be forgotten
+            seen = {k for k in seen if k[:2] == (business_id, metric)}
+
+    for start in range(0, len(doomed), batch_size):
+        result = db.session.execute(delete(Insights).where(Insights.id.in_(doomed[start:start + batch_size])))
+        removed += result.rowcount
+    return removed
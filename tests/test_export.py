@@ -0,0 +1,58 @@
+import io
+import os
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+
+os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'export.db')}"
+os.environ['CACHE_BACKEND'] = 'null'
+os.environ['AUTH_REQUIRED'] = 'false'
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app import app
+from export import export_chunks, export_query
+from models import db, User, Business, Inventory, Sales
+
+
+@pytest.fixture(scope='module')
+def business_id():
+    with app.app_context():
+        db.create_all()
+        user = User(username='export', email='export@example.com', password='x')
+        business = Business(name='Export Shop', owner=user)
+        # Whole-number money comes back from SQLite as ints, which once failed the decimal128 cast
+        whole = Inventory(business=business, item_name='Whole', quantity=3, price_per_unit=Decimal('5'))
+        cents = Inventory(business=business, item_name='Cents', quantity=1, price_per_unit=Decimal('2.35'))
+        db.session.add_all([user, business, whole, cents])
+        db.session.flush()
+        db.session.add_all([
+            Sales(business_id=business.id, inventory_id=whole.id, quantity_sold=4, total_price=Decimal('20'),
+                  unit_cost=Decimal('5'), sold_at=datetime(2025, 1, 1, 9)),
+            Sales(business_id=business.id, inventory_id=cents.id, quantity_sold=1, total_price=Decimal('3.10'),
+                  unit_cost=Decimal('2.35'), sold_at=datetime(2025, 1, 1, 10)),
+        ])
+        db.session.commit()
+        return business.id
+
+
+def read_export(table, business_id, fmt):
+    with app.app_context():
+        stmt, fields = export_query(table, business_id)
+        body = b''.join(export_chunks(stmt, fields, fmt, 1))
+    if fmt == 'parquet':
+        return pq.read_table(io.BytesIO(body))
+    return pa.ipc.open_stream(body).read_all()
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_export_whole_number_money(business_id, fmt):
+    inventory = read_export('inventory', business_id, fmt)
+    assert inventory.schema.field('price_per_unit').type == pa.decimal128(10, 2)
+    assert inventory.column('price_per_unit').to_pylist() == [Decimal('5.00'), Decimal('2.35')]
+
+    sales = read_export('sales', business_id, fmt)
+    assert sales.column('total_price').to_pylist() == [Decimal('20.00'), Decimal('3.10')]
+    assert sales.column('unit_cost').to_pylist() == [Decimal('5.00'), Decimal('2.35')]
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, request
+from flask_jwt_extended import JWTManager, decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
+from sqlalchemy import select
+from models import db, User
+
+
+class ExpiringLRU:
+    """Thread-safe LRU map whose entries also lapse at their own deadline (epoch seconds)."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class TokenVerifier:
+    """Resolve bearer tokens to users without re-verifying or reloading on every request.
+
+    Verified claims are cached by token until the token expires, and the
+    user row by id for at most `user_ttl` seconds and never past the expiry
+    of the token that loaded it. Tokens are never trusted beyond their `exp`.
+    """
+
+    def __init__(self, max_entries=10000, user_ttl=60):
+        self.claims = ExpiringLRU(max_entries)
+        self.users = ExpiringLRU(max_entries)
+        self.user_ttl = user_ttl
+
+    def verify(self, header, now):
+        """Claims of a bearer Authorization header, or None. Needs an app context on a cache miss."""
+        if not header.startswith('Bearer '):
+            return None
+        token = header[7:]
+        claims = self.claims.get(token, now)
+        if claims is None:
+            try:
+                claims = decode_token(token)
+            except (PyJWTError, JWTExtendedException):
+                return None
+            # Tokens issued without an expiry are re-verified after user_ttl
+            self.claims.set(token, claims, claims.get('exp', now + self.user_ttl))
+        return claims
+
+    def remember_user(self, claims, user, now):
+        self.users.set(user['id'], user, min(claims.get('exp', now + self.user_ttl), now + self.user_ttl))
+
+    def authenticate(self, header):
+        now = time.time()
+        claims = self.verify(header, now)
+        if claims is None:
+            return None
+
+        user_id = int(claims['sub'])
+        user = self.users.get(user_id, now)
+        if user is None:
+            row = db.session.execute(user_query(user_id)).first()
+            if row is None:
+                return None
+            user = row._asdict()
+            self.remember_user(claims, user, now)
+        return user
+
+
+def user_query(user_id):
+    """The user columns a request carries on g.current_user."""
+    return select(User.id, User.username, User.email, User.role).where(User.id == user_id)
+
+
+def init_auth(app):
+    JWTManager(app)
+    verifier = TokenVerifier(app.config['AUTH_CACHE_MAX_ENTRIES'], app.config['AUTH_USER_CACHE_TTL'])
+    app.extensions['token_verifier'] = verifier
+    return verifier
+
+
+def auth_required(view):
+    """Reject requests without a valid bearer token; the user is left on g.current_user."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if current_app.config['AUTH_REQUIRED']:
+            user = current_app.extensions['token_verifier'].authenticate(request.headers.get('Authorization', ''))
+            if user is None:
+                return {'message': 'Authentication required'}, 401
+            g.current_user = user
+        return view(*args, **kwargs)
+    return wrapper
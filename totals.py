@@ -0,0 +1,173 @@
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from sqlalchemy import func, select, update, delete
+from sqlalchemy.exc import IntegrityError
+from models import db, Business, BusinessTotals, Inventory, Sales
+
+
+def to_decimal(value):
+    """Coerce request numbers (int, float or str) to a Decimal without float noise."""
+    if value is None:
+        return Decimal(0)
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+# Largest amount a Numeric(10, 2) column holds
+MAX_MONEY = Decimal('99999999.99')
+
+
+def to_money(value):
+    """Parse a request price or amount as it will be stored: a Decimal rounded to cents.
+
+    Raises ValueError, with a message fit for a field error, unless `value`
+    is a finite number from 0 to MAX_MONEY. Rounding matches Postgres numeric,
+    so running totals built from the result agree with a reconcile.
+    """
+    if value is None or isinstance(value, bool):
+        raise ValueError('Must be a number')
+    try:
+        amount = to_decimal(value)
+        if not amount.is_finite():
+            raise ValueError('Must be a finite number')
+        if not 0 <= amount <= MAX_MONEY:
+            raise ValueError(f'Must be between 0 and {MAX_MONEY}')
+        amount = amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    except (ArithmeticError, TypeError):
+        raise ValueError('Must be a number')
+    if amount > MAX_MONEY:
+        raise ValueError(f'Must be between 0 and {MAX_MONEY}')
+    return amount
+
+
+def apply_delta(business_id, revenue=0, cogs=0, inventory_value=0, transactions=0):
+    """Add deltas to a business's running totals inside the current transaction."""
+    stmt = (
+        update(BusinessTotals)
+        .where(BusinessTotals.business_id == business_id)
+        .values(
+            total_revenue=BusinessTotals.total_revenue + to_decimal(revenue),
+            total_cogs=BusinessTotals.total_cogs + to_decimal(cogs),
+            inventory_value=BusinessTotals.inventory_value + to_decimal(inventory_value),
+            transaction_count=BusinessTotals.transaction_count + transactions,
+            updated_at=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.execute(stmt).rowcount:
+        return
+
+    # No row yet (business predates the totals table): seed it from the tables,
+    # which already include the pending write since the session autoflushed above.
+    seeded = compute_totals([business_id]).get(business_id)
+    if seeded is None:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(seeded)
+    except IntegrityError:
+        # A concurrent writer seeded the row first; its snapshot excludes our write.
+        db.session.execute(stmt)
+
+
+def sale_unit_cost():
+    """A sale's unit cost, falling back to the item's current price for sales recorded without one."""
+    return func.coalesce(Sales.unit_cost, Inventory.price_per_unit)
+
+
+def scope_businesses(query, column, business_ids=None, id_range=None):
+    """Limit `query` to a list of business ids and/or an inclusive (first, last) id range."""
+    if business_ids is not None:
+        query = query.where(column.in_(business_ids))
+    if id_range is not None:
+        query = query.where(column.between(*id_range))
+    return query
+
+
+def compute_totals(business_ids=None, id_range=None):
+    """Compute totals from scratch with one GROUP BY query per aggregate.
+
+    Returns a dict of transient BusinessTotals keyed by business id, including
+    businesses that have no sales or inventory yet.
+    """
+    def scoped(query, column):
+        return scope_businesses(query, column, business_ids, id_range)
+
+    ids = db.session.execute(scoped(select(Business.id), Business.id)).scalars()
+    totals = {
+        business_id: BusinessTotals(
+            business_id=business_id,
+            total_revenue=Decimal(0),
+            total_cogs=Decimal(0),
+            inventory_value=Decimal(0),
+            transaction_count=0,
+            updated_at=datetime.utcnow()
+        )
+        for business_id in ids
+    }
+
+    sales = scoped(
+        select(Sales.business_id, func.sum(Sales.total_price), func.count(Sales.id)),
+        Sales.business_id
+    ).group_by(Sales.business_id)
+    for business_id, revenue, count in db.session.execute(sales):
+        if business_id in totals:
+            totals[business_id].total_revenue = revenue or Decimal(0)
+            totals[business_id].transaction_count = count
+
+    cogs = scoped(
+        select(Sales.business_id, func.sum(Sales.quantity_sold * sale_unit_cost()))
+        .join(Inventory, Sales.inventory_id == Inventory.id),
+        Sales.business_id
+    ).group_by(Sales.business_id)
+    for business_id, value in db.session.execute(cogs):
+        if business_id in totals:
+            totals[business_id].total_cogs = value or Decimal(0)
+
+    stock = scoped(
+        select(Inventory.business_id, func.sum(Inventory.quantity * Inventory.price_per_unit)),
+        Inventory.business_id
+    ).group_by(Inventory.business_id)
+    for business_id, value in db.session.execute(stock):
+        if business_id in totals:
+            totals[business_id].inventory_value = value or Decimal(0)
+
+    return totals
+
+
+def rebuild_totals(business_ids=None):
+    """Replace the stored totals for the given businesses (or all) with fresh ones."""
+    totals = compute_totals(business_ids)
+    stmt = delete(BusinessTotals)
+    if business_ids is not None:
+        stmt = stmt.where(BusinessTotals.business_id.in_(business_ids))
+    db.session.execute(stmt)
+    db.session.add_all(totals.values())
+    return len(totals)
+
+
+def get_totals(business_id):
+    """Return the stored totals row, or a transient one computed from the tables if missing."""
+    totals = db.session.get(BusinessTotals, business_id)
+    if totals is None:
+        totals = compute_totals([business_id]).get(business_id)
+    return totals
+
+
+def insight_metrics(totals):
+    """Derive the dashboard metrics from a totals row."""
+    total_revenue = totals.total_revenue if totals else Decimal(0)
+    total_cogs = totals.total_cogs if totals else Decimal(0)
+    total_inventory_value = totals.inventory_value if totals else Decimal(0)
+    total_transactions = (totals.transaction_count if totals else 0) or 1
+
+    profit = total_revenue - total_cogs
+    loss = abs(profit) if profit < 0 else Decimal(0)
+    return {
+        'total_revenue': total_revenue,
+        'total_profit': profit,
+        'total_losses': loss,
+        'inventory_value': total_inventory_value,
+        'average_sales_price': total_revenue / total_transactions
+    }